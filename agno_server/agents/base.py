@@ -1,5 +1,6 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Dict
 
 class Agent(ABC):
     """
@@ -20,3 +21,25 @@ class Agent(ABC):
             Any: Result of the agent's action.
         """
         pass
+
+    async def aact(self, context: Dict[str, Any]) -> Any:
+        """
+        Async variant of act. Defaults to running act in a worker thread;
+        LLM-backed agents override this to await the model directly.
+        Args:
+            context (Dict[str, Any]): Shared context for agent decision making.
+        Returns:
+            Any: Result of the agent's action.
+        """
+        return await asyncio.to_thread(self.act, context)
+
+    async def astream(self, context: Dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Stream the agent's output as text chunks. Defaults to a single chunk
+        holding the full aact result; agents backed by a streaming LLM override it.
+        Args:
+            context (Dict[str, Any]): Shared context for agent decision making.
+        Yields:
+            str: Successive chunks of the agent's output.
+        """
+        yield await self.aact(context)
@@ -1,5 +1,5 @@
 from .base import Agent
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Dict
 from agno_server.llm import GeminiLLM
 
 FINAL_PROMPT_CRAFTER_SYSTEM_PROMPT = """
@@ -35,6 +35,16 @@ class FinalPromptCrafterAgent(Agent):
         super().__init__(name)
         self.llm = llm or GeminiLLM()
 
+    def build_prompt(self, context: Dict[str, Any]) -> str:
+        """
+        Build the final-prompt synthesis prompt from context.
+        Args:
+            context (Dict[str, Any]): Shared pipeline context.
+        Returns:
+            str: The user prompt sent to Gemini.
+        """
+        return f"Synthesize the following PRD and agent outputs into a single, production-ready prompt:\n{context['prd']}\n\nOther agent outputs:\n{context.get('agent_outputs', '')}"
+
     def act(self, context: Dict[str, Any]) -> Any:
         """
         Use Gemini LLM to synthesize the final prompt from PRD and agent outputs.
@@ -43,7 +53,30 @@ class FinalPromptCrafterAgent(Agent):
         Returns:
             Any: Final prompt text.
         """
-        prompt = f"Synthesize the following PRD and agent outputs into a single, production-ready prompt:\n{context['prd']}\n\nOther agent outputs:\n{context.get('agent_outputs', '')}"
+        prompt = self.build_prompt(context)
         system = self.system_prompt
         response = self.llm.chat(prompt, system=system)
         return response
+
+    async def aact(self, context: Dict[str, Any]) -> Any:
+        """
+        Async variant of act; awaits Gemini via GeminiLLM.achat.
+        Args:
+            context (Dict[str, Any]): Shared pipeline context.
+        Returns:
+            Any: Same result as act.
+        """
+        prompt = self.build_prompt(context)
+        return await self.llm.achat(prompt, system=self.system_prompt)
+
+    async def astream(self, context: Dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Stream the final prompt token chunks as Gemini produces them.
+        Args:
+            context (Dict[str, Any]): Shared pipeline context.
+        Yields:
+            str: Successive chunks of the final prompt.
+        """
+        prompt = self.build_prompt(context)
+        async for chunk in self.llm.astream(prompt, system=self.system_prompt):
+            yield chunk
@@ -1,5 +1,6 @@
+import asyncio
 from .base import Agent
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Dict
 from agno_server.llm import GeminiLLM
 
 INFO_TAGGER_SYSTEM_PROMPT = """
@@ -34,6 +35,16 @@ class InfoTaggerAgent(Agent):
         super().__init__(name)
         self.llm = llm or GeminiLLM()
 
+    def build_prompt(self, context: Dict[str, Any]) -> str:
+        """
+        Build the tagging prompt from context.
+        Args:
+            context (Dict[str, Any]): Shared pipeline context.
+        Returns:
+            str: The user prompt sent to Gemini.
+        """
+        return f"Organize the following information into logical categories with tags:\n{context['raw_data']}"
+
     def act(self, context: Dict[str, Any]) -> Any:
         """
         Use Gemini LLM to tag and structure information from context.
@@ -42,7 +53,40 @@ class InfoTaggerAgent(Agent):
         Returns:
             Any: Structured/tagged information.
         """
-        prompt = f"Organize the following information into logical categories with tags:\n{context['raw_data']}"
+        prompt = self.build_prompt(context)
         system = self.system_prompt
         response = self.llm.chat(prompt, system=system)
         return response
+
+    async def aact(self, context: Dict[str, Any]) -> Any:
+        """
+        Async variant of act; awaits Gemini via GeminiLLM.achat.
+        Args:
+            context (Dict[str, Any]): Shared pipeline context.
+        Returns:
+            Any: Same result as act.
+        """
+        prompt = self.build_prompt(context)
+        return await self.llm.achat(prompt, system=self.system_prompt)
+
+    async def aact_incremental(self, sections: AsyncIterator[str]) -> str:
+        """
+        Tag upstream output batch by batch while it is still being produced.
+        Each complete section batch is sent to Gemini as soon as it arrives, and
+        the tagged batches are joined in upstream order.
+        Args:
+            sections (AsyncIterator[str]): Complete section batches, e.g. from iter_sections.
+        Returns:
+            str: Structured/tagged information for all sections.
+        """
+        tasks = []
+        try:
+            async for section in sections:
+                prompt = self.build_prompt({"raw_data": section})
+                tasks.append(asyncio.ensure_future(self.llm.achat(prompt, system=self.system_prompt)))
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        return "\n\n".join(results)
@@ -1,6 +1,11 @@
 from .base import Agent
-from typing import Any, Dict
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional
 from agno_server.llm import GeminiLLM
+from agno_server.research import build_digest, derive_queries, rank_results
+from agno_server.tools.brave_search import BraveSearchTool
+
+logger = logging.getLogger(__name__)
 
 INTERNET_RESEARCHER_SYSTEM_PROMPT = """
 You are the Internet Researcher Agent in the Agno Multi-Agent Prompt Generation System.
@@ -29,22 +34,124 @@ Output:
 class InternetResearcherAgent(Agent):
     """
     Gathers external information via WebSearch and summarizes it using Gemini 2.5 Pro LLM.
+    Args:
+        name (str): Name of the agent.
+        llm (GeminiLLM, optional): Shared LLM client.
+        search_tool (BraveSearchTool, optional): Web search tool; created from BRAVE_SEARCH_API_KEY when omitted.
+            Without one (no key configured) the agent falls back to prompting from the user idea alone.
+        max_queries (int): Sub-queries derived from the user idea and searched in parallel.
+        results_per_query (int): Results requested per sub-query.
+        digest_token_budget (int): Estimated token budget for the search digest sent to Gemini.
     """
     system_prompt = INTERNET_RESEARCHER_SYSTEM_PROMPT
-    def __init__(self, name: str, llm: GeminiLLM = None):
+    def __init__(
+        self,
+        name: str,
+        llm: GeminiLLM = None,
+        search_tool: Optional[BraveSearchTool] = None,
+        max_queries: int = 4,
+        results_per_query: int = 5,
+        digest_token_budget: int = 1500,
+    ):
         super().__init__(name)
         self.llm = llm or GeminiLLM()
+        if search_tool is None:
+            try:
+                search_tool = BraveSearchTool()
+            except ValueError:
+                logger.warning("BRAVE_SEARCH_API_KEY is not set; researching without web search.")
+        self.search_tool = search_tool
+        self.max_queries = max_queries
+        self.results_per_query = results_per_query
+        self.digest_token_budget = digest_token_budget
+
+    def _digest(self, result_lists: List[Any]) -> str:
+        successful = []
+        for results in result_lists:
+            if isinstance(results, BaseException):
+                # Reason: one failed sub-query should not sink the research stage; use what the others found.
+                logger.warning("Web search sub-query failed: %s", results)
+            else:
+                successful.append(results)
+        return build_digest(rank_results(successful), self.digest_token_budget)
+
+    def gather(self, context: Dict[str, Any]) -> str:
+        """
+        Search the derived sub-queries in parallel and return the ranked, budgeted digest.
+        Args:
+            context (Dict[str, Any]): Shared pipeline context with 'user_idea'.
+        Returns:
+            str: Search digest ("" without a search tool or results).
+        """
+        queries = derive_queries(context.get("user_idea", ""), self.max_queries)
+        if self.search_tool is None or not queries:
+            return ""
+        return self._digest(self.search_tool.search_many(queries, self.results_per_query, return_exceptions=True))
+
+    async def agather(self, context: Dict[str, Any]) -> str:
+        """
+        Async variant of gather; the sub-queries share one round trip on the event loop.
+        Args:
+            context (Dict[str, Any]): Shared pipeline context with 'user_idea'.
+        Returns:
+            str: Search digest ("" without a search tool or results).
+        """
+        queries = derive_queries(context.get("user_idea", ""), self.max_queries)
+        if self.search_tool is None or not queries:
+            return ""
+        return self._digest(await self.search_tool.asearch_many(queries, self.results_per_query, return_exceptions=True))
+
+    def build_prompt(self, context: Dict[str, Any]) -> str:
+        """
+        Build the research prompt from context.
+        Args:
+            context (Dict[str, Any]): Shared pipeline context; 'search_digest' holds gathered web results.
+        Returns:
+            str: The user prompt sent to Gemini.
+        """
+        digest = context.get("search_digest")
+        if not digest:
+            # Use the user idea as the research query input, not context['search_results']
+            return f"Summarize and organize the following web search results for project requirements:\n{context['user_idea']}"
+        return (
+            "Summarize and organize the following web search results for project requirements.\n"
+            f"Project idea:\n{context['user_idea']}\n\n"
+            f"Web search results (ranked, with sources):\n{digest}"
+        )
 
     def act(self, context: Dict[str, Any]) -> Any:
         """
-        Use Gemini LLM to summarize and organize web search results from context.
+        Search the web for the user idea, then use Gemini LLM to summarize and organize the results.
         Args:
-            context (Dict[str, Any]): The web search results to process.
+            context (Dict[str, Any]): Shared pipeline context with 'user_idea'.
         Returns:
             Any: Structured summary/information.
         """
-        # Use the user idea as the research query input, not context['search_results']
-        prompt = f"Summarize and organize the following web search results for project requirements:\n{context['user_idea']}"
+        prompt = self.build_prompt(dict(context, search_digest=self.gather(context)))
         system = self.system_prompt
         response = self.llm.chat(prompt, system=system)
         return response
+
+    async def aact(self, context: Dict[str, Any]) -> Any:
+        """
+        Async variant of act; awaits Gemini via GeminiLLM.achat.
+        Args:
+            context (Dict[str, Any]): Shared pipeline context.
+        Returns:
+            Any: Same result as act.
+        """
+        prompt = self.build_prompt(dict(context, search_digest=await self.agather(context)))
+        return await self.llm.achat(prompt, system=self.system_prompt)
+
+    async def astream(self, context: Dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Stream the research summary as Gemini produces it, so downstream agents
+        can start on complete sections early.
+        Args:
+            context (Dict[str, Any]): Shared pipeline context.
+        Yields:
+            str: Successive chunks of the research summary.
+        """
+        prompt = self.build_prompt(dict(context, search_digest=await self.agather(context)))
+        async for chunk in self.llm.astream(prompt, system=self.system_prompt):
+            yield chunk
@@ -35,6 +35,16 @@ class PRDWriterAgent(Agent):
         super().__init__(name)
         self.llm = llm or GeminiLLM()
 
+    def build_prompt(self, context: Dict[str, Any]) -> str:
+        """
+        Build the PRD-writing prompt from context.
+        Args:
+            context (Dict[str, Any]): Shared pipeline context.
+        Returns:
+            str: The user prompt sent to Gemini.
+        """
+        return f"Write a detailed product requirements document (PRD) based on the following structured information:\n{context['structured_info']}"
+
     def act(self, context: Dict[str, Any]) -> Any:
         """
         Use Gemini LLM to write a product requirements document from context.
@@ -43,7 +53,18 @@ class PRDWriterAgent(Agent):
         Returns:
             Any: Product requirements document (PRD) text.
         """
-        prompt = f"Write a detailed product requirements document (PRD) based on the following structured information:\n{context['structured_info']}"
+        prompt = self.build_prompt(context)
         system = self.system_prompt
         response = self.llm.chat(prompt, system=system)
         return response
+
+    async def aact(self, context: Dict[str, Any]) -> Any:
+        """
+        Async variant of act; awaits Gemini via GeminiLLM.achat.
+        Args:
+            context (Dict[str, Any]): Shared pipeline context.
+        Returns:
+            Any: Same result as act.
+        """
+        prompt = self.build_prompt(context)
+        return await self.llm.achat(prompt, system=self.system_prompt)
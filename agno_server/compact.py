@@ -0,0 +1,106 @@
+"""
+compact.py
+Helpers for the compact internal record form used by MemoryStore and KnowledgeBase.
+
+Purpose:
+- Hold hundreds of thousands of entries without paying for a full pydantic model, two datetime
+  objects, a 36-character id string and a fresh tag list per entry.
+
+Design:
+1. Ids: canonical UUID strings are stored as their 16-byte binary form; any other id string is kept
+   as-is so caller-chosen ids still round-trip. encode_id/decode_id convert at the API boundary.
+2. Timestamps: integer microseconds since the Unix epoch (UTC). Naive datetimes are taken as UTC,
+   matching the datetime.utcnow() defaults of the models; materialized datetimes are naive UTC.
+3. Tags and other low-cardinality strings are interned, so repeated values share one object.
+4. Stores keep records in __slots__ classes and materialize pydantic models only when an entry
+   leaves the store (get_entry/query_entries).
+"""
+
+import re
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional, Tuple, Union
+
+RecordKey = Union[bytes, str]
+
+_CANONICAL_UUID = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def encode_id(entry_id: str) -> RecordKey:
+    """
+    Convert an entry id to its internal key.
+    Args:
+        entry_id (str): Public entry id.
+    Returns:
+        RecordKey: 16 bytes for canonical UUID strings, otherwise the id itself.
+    """
+    # Reason: only canonical (lowercase, hyphenated) strings decode back to the same text; hex
+    # conversion is several times cheaper than constructing uuid.UUID objects on the load path.
+    if len(entry_id) == 36 and _CANONICAL_UUID.fullmatch(entry_id):
+        return bytes.fromhex(entry_id.replace("-", ""))
+    return entry_id
+
+
+def decode_id(key: RecordKey) -> str:
+    """
+    Convert an internal key back to the public entry id.
+    Args:
+        key (RecordKey): Key produced by encode_id.
+    Returns:
+        str: Public entry id.
+    """
+    if not isinstance(key, bytes):
+        return key
+    h = key.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+def to_epoch_us(value: datetime) -> int:
+    """
+    Convert a datetime to integer microseconds since the epoch (naive values are UTC).
+    Args:
+        value (datetime): Timestamp.
+    Returns:
+        int: Microseconds since 1970-01-01T00:00:00 UTC.
+    """
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def from_epoch_us(value: int) -> datetime:
+    """
+    Convert integer microseconds since the epoch to a naive UTC datetime.
+    Args:
+        value (int): Microseconds since the epoch.
+    Returns:
+        datetime: Naive UTC datetime.
+    """
+    return _EPOCH + timedelta(microseconds=value)
+
+
+def intern_tags(tags: Optional[Iterable[str]]) -> Optional[Tuple[str, ...]]:
+    """
+    Freeze tags into a tuple of interned strings.
+    Args:
+        tags (Optional[Iterable[str]]): Tags, or None.
+    Returns:
+        Optional[Tuple[str, ...]]: Interned tags; None stays None.
+    """
+    if tags is None:
+        return None
+    return tuple(sys.intern(tag) for tag in tags)
+
+
+def intern_optional(value: Optional[str]) -> Optional[str]:
+    """
+    Intern a low-cardinality string such as a source, type or conversation id.
+    Args:
+        value (Optional[str]): String, or None.
+    Returns:
+        Optional[str]: The interned string; None stays None.
+    """
+    return sys.intern(value) if value is not None else None
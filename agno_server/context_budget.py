@@ -0,0 +1,216 @@
+"""
+context_budget.py
+Token budgeting and context compaction between pipeline stages.
+
+Purpose:
+- Keep every Gemini prompt within a per-stage token budget, and stop forwarding the same research
+  text twice (raw search results and the tagged version derived from them), to cut latency and cost.
+
+Design:
+1. estimate_tokens(): ~4 characters per token; cheap and good enough for budgeting (no tokenizer call).
+2. dedupe_sections(): drops paragraphs and long lines already seen in an earlier (higher-priority)
+   section, comparing case- and whitespace-insensitively and ignoring list markers.
+3. compact_text(): extractive compaction of an oversized input; every paragraph keeps a share of the
+   budget proportional to its size, cut at a sentence or word boundary and marked with "…".
+4. ContextBudget.fit(stage, sections): dedupe, then compact the sections to the stage budget, and
+   record original vs. sent tokens per stage; TokenUsageStats aggregates those counts across runs.
+5. ContextBudget.fit_stream(stage, sections): the same for input that arrives section by section
+   (incremental handoff). Each section is deduplicated against those already sent and compacted to the
+   budget still left, so the stage never receives more than its budget in total.
+"""
+
+import re
+from threading import Lock
+from typing import AsyncIterator, Dict, List, Optional, Set
+
+CHARS_PER_TOKEN = 4
+# Reason: shorter lines ("## Overview", "- Tags:") legitimately repeat across sections.
+MIN_DEDUPE_LINE_CHARS = 40
+DEFAULT_STAGE_BUDGETS: Dict[str, int] = {"tagging": 4000, "prd": 4000, "final_prompt": 6000}
+
+_PARAGRAPH_SPLIT = re.compile(r"\n\s*\n")
+_LIST_MARKER = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+_SENTENCE_END = re.compile(r"[.!?](?=\s)")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate (~4 characters per token) for budgeting prompts.
+    Args:
+        text (str): Text to measure.
+    Returns:
+        int: Estimated token count.
+    """
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _normalize(text: str) -> str:
+    return " ".join(_LIST_MARKER.sub("", text).lower().split())
+
+
+def dedupe_sections(sections: List[str]) -> List[str]:
+    """
+    Remove content repeated across sections; earlier sections win.
+    Args:
+        sections (List[str]): Texts in priority order.
+    Returns:
+        List[str]: Sections with repeated paragraphs and long lines removed.
+    """
+    seen_paragraphs: Set[str] = set()
+    seen_lines: Set[str] = set()
+    return [_dedupe(section, seen_paragraphs, seen_lines) for section in sections]
+
+
+def _dedupe(section: str, seen_paragraphs: Set[str], seen_lines: Set[str]) -> str:
+    kept_paragraphs = []
+    for paragraph in _PARAGRAPH_SPLIT.split(section):
+        key = _normalize(paragraph)
+        if not key or key in seen_paragraphs:
+            continue
+        seen_paragraphs.add(key)
+        kept_lines = []
+        for line in paragraph.splitlines():
+            line_key = _normalize(line)
+            if len(line_key) >= MIN_DEDUPE_LINE_CHARS:
+                if line_key in seen_lines:
+                    continue
+                seen_lines.add(line_key)
+            kept_lines.append(line)
+        if any(line.strip() for line in kept_lines):
+            kept_paragraphs.append("\n".join(kept_lines))
+    return "\n\n".join(kept_paragraphs)
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    if max_chars <= 1:
+        return "…" if max_chars == 1 else ""
+    head = text[:max_chars - 1]
+    sentence_ends = [match.end() for match in _SENTENCE_END.finditer(head)]
+    # Reason: prefer a sentence boundary unless it would throw away most of the allowance.
+    if sentence_ends and sentence_ends[-1] >= max_chars // 2:
+        return head[:sentence_ends[-1]] + " …"
+    if " " in head:
+        head = head.rsplit(" ", 1)[0]
+    return head + "…"
+
+
+def compact_text(text: str, token_budget: int) -> str:
+    """
+    Shrink text to roughly token_budget tokens, keeping the start of every paragraph.
+    Args:
+        text (str): Text to compact.
+        token_budget (int): Target estimated tokens.
+    Returns:
+        str: Text unchanged if within budget, otherwise compacted.
+    """
+    if estimate_tokens(text) <= token_budget:
+        return text
+    paragraphs = [p.strip() for p in _PARAGRAPH_SPLIT.split(text) if p.strip()]
+    # Reason: two characters per paragraph go to the blank-line separators between them.
+    available = max(token_budget * CHARS_PER_TOKEN - 2 * len(paragraphs), 0)
+    total = sum(len(p) for p in paragraphs)
+    compacted = [_truncate(p, available * len(p) // total) for p in paragraphs]
+    return "\n\n".join(p for p in compacted if p)
+
+
+class TokenUsageStats:
+    """
+    Thread-safe running totals of per-stage token usage across refinements.
+    """
+    def __init__(self):
+        self._lock = Lock()
+        self._stages: Dict[str, Dict[str, int]] = {}
+
+    def add(self, stage: str, original_tokens: int, sent_tokens: int) -> None:
+        with self._lock:
+            totals = self._stages.setdefault(stage, {"calls": 0, "original_tokens": 0, "sent_tokens": 0})
+            totals["calls"] += 1
+            totals["original_tokens"] += original_tokens
+            totals["sent_tokens"] += sent_tokens
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """
+        Returns:
+            Dict[str, Dict[str, int]]: Per stage: calls, original_tokens, sent_tokens and saved_tokens.
+        """
+        with self._lock:
+            return {
+                stage: dict(totals, saved_tokens=totals["original_tokens"] - totals["sent_tokens"])
+                for stage, totals in self._stages.items()
+            }
+
+
+class ContextBudget:
+    """
+    Fits stage inputs into per-stage token budgets and records what each stage was sent.
+    Args:
+        budgets (Dict[str, int], optional): Token budget per stage name.
+        default_budget (int): Budget for stages not listed in budgets.
+        stats (TokenUsageStats, optional): Aggregate to report each fit() to.
+    """
+    def __init__(self, budgets: Optional[Dict[str, int]] = None, default_budget: int = 6000, stats: Optional[TokenUsageStats] = None):
+        self.budgets = dict(DEFAULT_STAGE_BUDGETS if budgets is None else budgets)
+        self.default_budget = default_budget
+        self.stats = stats
+        self.usage: Dict[str, Dict[str, int]] = {}
+
+    def budget_for(self, stage: str) -> int:
+        return self.budgets.get(stage, self.default_budget)
+
+    def fit(self, stage: str, sections: Dict[str, str]) -> Dict[str, str]:
+        """
+        Deduplicate and compact a stage's inputs to its budget.
+        Args:
+            stage (str): Stage name.
+            sections (Dict[str, str]): Input texts by name, in priority order (earlier wins on duplicates).
+        Returns:
+            Dict[str, str]: The fitted texts, same keys.
+        """
+        names = list(sections)
+        texts = [str(sections[name] or "") for name in names]
+        original_tokens = sum(estimate_tokens(text) for text in texts)
+        texts = dedupe_sections(texts)
+        budget = self.budget_for(stage)
+        sizes = [estimate_tokens(text) for text in texts]
+        total = sum(sizes)
+        if total > budget:
+            # Reason: split the budget in proportion to what survived dedupe, so no input is dropped outright.
+            texts = [compact_text(text, budget * size // total) for text, size in zip(texts, sizes)]
+        sent_tokens = sum(estimate_tokens(text) for text in texts)
+        self._record(stage, original_tokens, sent_tokens)
+        return dict(zip(names, texts))
+
+    async def fit_stream(self, stage: str, sections: AsyncIterator[str]) -> AsyncIterator[str]:
+        """
+        Deduplicate and compact streamed input section by section within the stage budget.
+        Args:
+            stage (str): Stage name.
+            sections (AsyncIterator[str]): Input sections in arrival order.
+        Yields:
+            str: Fitted sections; sections with nothing new, or arriving after the budget is spent, are dropped.
+        """
+        seen_paragraphs: Set[str] = set()
+        seen_lines: Set[str] = set()
+        remaining = self.budget_for(stage)
+        original_tokens = sent_tokens = 0
+        async for section in sections:
+            original_tokens += estimate_tokens(section)
+            if remaining <= 0:
+                continue
+            # Reason: the total size is unknown until the stream ends, so sections are served first come,
+            # first served; the stage still never receives more than its budget overall.
+            text = compact_text(_dedupe(section, seen_paragraphs, seen_lines), remaining)
+            if not text:
+                continue
+            cost = estimate_tokens(text)
+            remaining -= cost
+            sent_tokens += cost
+            yield text
+        self._record(stage, original_tokens, sent_tokens)
+
+    def _record(self, stage: str, original_tokens: int, sent_tokens: int) -> None:
+        self.usage[stage] = {"original_tokens": original_tokens, "sent_tokens": sent_tokens}
+        if self.stats is not None:
+            self.stats.add(stage, original_tokens, sent_tokens)
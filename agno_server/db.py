@@ -0,0 +1,365 @@
+"""
+db.py
+Async Supabase data-access layer for the /tools/* CRUD endpoints.
+
+Purpose:
+- Serve table reads and writes without blocking the event loop, so concurrent CRUD requests are
+  bounded by the connection pool rather than by the threadpool that sync endpoints run on.
+
+Design:
+1. SupabaseDB.connect() builds one pooled httpx.AsyncClient (keep-alive, HTTP/2 when h2 is installed)
+   and hands it to supabase.acreate_client, so every PostgREST call reuses those connections.
+2. Each method builds a PostgREST query, awaits execute() and returns the response rows (QueryResult
+   carries the optional count too). Projection (columns), operator filters (apply_filters), ordering
+   (apply_order) and counting all happen in PostgREST, so only the requested data crosses the wire.
+3. Keyset pagination: with order_by set, rows come back sorted by that (unique, non-null) column and
+   `after` resumes past the last key seen, so page N costs the same as page 1 (no OFFSET scan).
+   iter_pages() walks a whole table that way, holding one page in memory at a time.
+4. Bulk ingest: insert_chunks() sends pre-chunked records with at most max_concurrency inserts in
+   flight, asking PostgREST not to echo rows back (return=minimal); it pulls the next chunk only when a
+   slot frees up, so a streamed source is never buffered whole. Each chunk reports its own result.
+5. The endpoints hold a single SupabaseDB on app.state.db; it is created at startup and closed at shutdown.
+"""
+
+import asyncio
+from importlib.util import find_spec
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, NamedTuple, Optional, Union
+
+import httpx
+from postgrest import ReturnMethod
+from supabase import AsyncClient, AsyncClientOptions, acreate_client
+
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_INGEST_CONCURRENCY = 4
+FILTER_OPERATORS = ("eq", "neq", "gt", "gte", "lt", "lte", "in", "like", "ilike", "is")
+# Reason: HTTP/2 multiplexes concurrent queries over one connection, but needs the optional h2 package.
+_HTTP2 = find_spec("h2") is not None
+
+
+class QueryResult(NamedTuple):
+    rows: List[Dict[str, Any]]
+    count: Optional[int] = None
+
+
+def build_http_client(max_connections: int = DEFAULT_MAX_CONNECTIONS, timeout: float = DEFAULT_TIMEOUT) -> httpx.AsyncClient:
+    """
+    Create the pooled HTTP client shared by all Supabase requests.
+    Args:
+        max_connections (int): Upper bound on open connections to Supabase.
+        timeout (float): Per-request timeout in seconds.
+    Returns:
+        httpx.AsyncClient: Pooled client.
+    """
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=_HTTP2, follow_redirects=True)
+
+
+class SupabaseDB:
+    """
+    Async CRUD access to Supabase tables.
+    Args:
+        client (AsyncClient): Async Supabase client.
+        http_client (httpx.AsyncClient, optional): Pooled HTTP client owned by this instance, closed by aclose().
+    """
+    def __init__(self, client: AsyncClient, http_client: Optional[httpx.AsyncClient] = None):
+        self.client = client
+        self.http_client = http_client
+
+    @classmethod
+    async def connect(
+        cls,
+        url: str,
+        key: str,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        timeout: float = DEFAULT_TIMEOUT,
+        http_client: Optional[httpx.AsyncClient] = None,
+    ) -> "SupabaseDB":
+        """
+        Create an async Supabase client on a pooled HTTP transport.
+        Args:
+            url (str): Supabase project URL.
+            key (str): Service role key.
+            max_connections (int): Connection pool size.
+            timeout (float): Per-request timeout in seconds.
+            http_client (httpx.AsyncClient, optional): Client to use instead of building one.
+        Returns:
+            SupabaseDB: Connected data-access layer.
+        """
+        http_client = http_client or build_http_client(max_connections, timeout)
+        client = await acreate_client(url, key, options=AsyncClientOptions(httpx_client=http_client))
+        return cls(client, http_client)
+
+    async def aclose(self) -> None:
+        """
+        Close the pooled HTTP connections.
+        """
+        if self.http_client is not None:
+            await self.http_client.aclose()
+
+    async def read_rows(
+        self,
+        table: str,
+        filters: Optional[Dict[str, Any]] = None,
+        limit: int = 100,
+        order_by: Optional[str] = None,
+        after: Any = None,
+        columns: Optional[List[str]] = None,
+        order: Optional[List[str]] = None,
+        count: Optional[str] = None,
+    ) -> QueryResult:
+        """
+        Read rows matching the filters.
+        Args:
+            table (str): Table name.
+            filters (Dict[str, Any], optional): Filters (see apply_filters).
+            limit (int): Maximum rows returned; 0 with count set returns only the count.
+            order_by (str, optional): Unique column to sort by (ascending) for keyset pagination.
+            after (Any, optional): Return only rows whose order_by value is greater than this cursor.
+            columns (List[str], optional): Columns to return (all when omitted).
+            order (List[str], optional): Sort terms, e.g. "created_at.desc" (applied after order_by).
+            count (str, optional): "exact", "planned" or "estimated" to also count all matching rows.
+        Returns:
+            QueryResult: Matching rows and, if requested, the total count.
+        """
+        head = count is not None and limit == 0
+        if columns and order_by and order_by not in columns:
+            # Reason: the next cursor is read from the last row, so the key column must be returned.
+            columns = [*columns, order_by]
+        query = apply_filters(self.client.table(table).select(*(columns or ()), count=count, head=head), filters)
+        if order_by:
+            if after is not None:
+                query = query.gt(order_by, after)
+            query = query.order(order_by)
+        query = apply_order(query, order)
+        if not head:
+            query = query.limit(limit)
+        response = await query.execute()
+        return QueryResult([] if head else response.data, response.count)
+
+    async def iter_pages(
+        self,
+        table: str,
+        order_by: str,
+        filters: Optional[Dict[str, Any]] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        after: Any = None,
+        columns: Optional[List[str]] = None,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Page through every matching row with keyset pagination.
+        Args:
+            table (str): Table name.
+            order_by (str): Unique, non-null column to paginate on.
+            filters (Dict[str, Any], optional): Filters (see apply_filters).
+            page_size (int): Rows per request.
+            after (Any, optional): Start after this order_by value.
+            columns (List[str], optional): Columns to return (order_by is always included).
+        Returns:
+            AsyncIterator[List[Dict[str, Any]]]: Pages in order_by order; the first page is always yielded, even if empty.
+        """
+        while True:
+            rows = (await self.read_rows(table, filters, page_size, order_by=order_by, after=after, columns=columns)).rows
+            yield rows
+            if len(rows) < page_size:
+                return
+            after = rows[-1][order_by]
+
+    async def insert(self, table: str, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Insert records.
+        Args:
+            table (str): Table name.
+            records (List[Dict[str, Any]]): Rows to insert.
+        Returns:
+            List[Dict[str, Any]]: The inserted rows.
+        """
+        response = await self.client.table(table).insert(records).execute()
+        return response.data
+
+    async def _insert_chunk(self, table: str, index: int, offset: int, chunk: List[Dict[str, Any]]) -> Dict[str, Any]:
+        result = {"chunk": index, "offset": offset, "count": len(chunk), "inserted": 0, "error": None}
+        try:
+            await self.client.table(table).insert(chunk, returning=ReturnMethod.minimal).execute()
+            result["inserted"] = len(chunk)
+        except Exception as e:
+            result["error"] = str(e)
+        return result
+
+    async def insert_chunks(
+        self,
+        table: str,
+        chunks: Union[Iterable[Union[List[Dict[str, Any]], Exception]], AsyncIterable[Union[List[Dict[str, Any]], Exception]]],
+        max_concurrency: int = DEFAULT_INGEST_CONCURRENCY,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Insert chunks of records with bounded parallelism.
+        Args:
+            table (str): Table name.
+            chunks (Iterable or AsyncIterable of List[Dict]): Record chunks, each sent as one insert. An
+                exception in place of a chunk (a record the source rejected) is reported as a failed one-record chunk.
+            max_concurrency (int): Maximum inserts in flight.
+        Returns:
+            AsyncIterator[Dict[str, Any]]: One result per chunk in completion order: chunk index, offset of its
+            first record, count, inserted and error (None on success). A failed chunk does not stop the others;
+            an error raised by the chunk source is re-raised after in-flight chunks have reported.
+        """
+        source = chunks.__aiter__() if hasattr(chunks, "__aiter__") else _aiter(chunks)
+        pending = set()
+        index = offset = 0
+        source_error: Optional[Exception] = None
+        while True:
+            if len(pending) >= max_concurrency:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+                continue
+            try:
+                chunk = await source.__anext__()
+            except StopAsyncIteration:
+                break
+            except Exception as e:
+                source_error = e
+                break
+            if isinstance(chunk, Exception):
+                yield {"chunk": index, "offset": offset, "count": 1, "inserted": 0, "error": str(chunk)}
+                index += 1
+                offset += 1
+                continue
+            if not chunk:
+                continue
+            pending.add(asyncio.ensure_future(self._insert_chunk(table, index, offset, chunk)))
+            index += 1
+            offset += len(chunk)
+        for task in asyncio.as_completed(pending):
+            yield await task
+        if source_error is not None:
+            raise source_error
+
+    async def update(
+        self,
+        table: str,
+        filters: Dict[str, Any],
+        values: Dict[str, Any],
+        columns: Optional[List[str]] = None,
+        count: Optional[str] = None,
+    ) -> QueryResult:
+        """
+        Update rows matching the filters.
+        Args:
+            table (str): Table name.
+            filters (Dict[str, Any]): Filters (see apply_filters).
+            values (Dict[str, Any]): Column -> new value.
+            columns (List[str], optional): Columns of the updated rows to return (all when omitted).
+            count (str, optional): "exact", "planned" or "estimated" to also count the updated rows.
+        Returns:
+            QueryResult: The updated rows and, if requested, their count.
+        """
+        query = apply_filters(self.client.table(table).update(values, count=count), filters)
+        if columns:
+            query = query.select(*columns)
+        response = await query.execute()
+        return QueryResult(response.data, response.count)
+
+    async def delete(
+        self,
+        table: str,
+        filters: Dict[str, Any],
+        columns: Optional[List[str]] = None,
+        count: Optional[str] = None,
+    ) -> QueryResult:
+        """
+        Delete rows matching the filters.
+        Args:
+            table (str): Table name.
+            filters (Dict[str, Any]): Filters (see apply_filters).
+            columns (List[str], optional): Columns of the deleted rows to return (all when omitted).
+            count (str, optional): "exact", "planned" or "estimated" to also count the deleted rows.
+        Returns:
+            QueryResult: The deleted rows and, if requested, their count.
+        """
+        query = apply_filters(self.client.table(table).delete(count=count), filters)
+        if columns:
+            query = query.select(*columns)
+        response = await query.execute()
+        return QueryResult(response.data, response.count)
+
+
+def apply_filters(query: Any, filters: Optional[Dict[str, Any]]) -> Any:
+    """
+    Push filters down to PostgREST.
+    Args:
+        query (Any): PostgREST filter builder.
+        filters (Dict[str, Any], optional): Column -> value for equality, or column -> {operator: operand}
+            with operators eq, neq, gt, gte, lt, lte, in (list operand), like, ilike (% wildcards) and
+            is (null, true or false); several operators on one column are ANDed.
+    Returns:
+        Any: The filtered builder.
+    Raises:
+        ValueError: On an unknown operator or a malformed operand.
+    """
+    for column, value in (filters or {}).items():
+        if not isinstance(value, dict):
+            query = query.eq(column, value)
+            continue
+        for operator, operand in value.items():
+            if operator not in FILTER_OPERATORS:
+                raise ValueError(f"Unknown filter operator {operator!r} on {column!r}; expected one of {', '.join(FILTER_OPERATORS)}")
+            if operator == "in":
+                if not isinstance(operand, list):
+                    raise ValueError(f"Filter 'in' on {column!r} needs a list")
+                query = query.in_(column, operand)
+            elif operator == "is":
+                if operand not in (None, True, False):
+                    raise ValueError(f"Filter 'is' on {column!r} needs null, true or false")
+                query = query.is_(column, operand)
+            else:
+                query = getattr(query, operator)(column, operand)
+    return query
+
+
+def apply_order(query: Any, order: Optional[List[str]]) -> Any:
+    """
+    Push sort terms down to PostgREST.
+    Args:
+        query (Any): PostgREST select builder.
+        order (List[str], optional): Terms "column[.asc|.desc][.nullsfirst|.nullslast]", highest priority first.
+    Returns:
+        Any: The ordered builder.
+    Raises:
+        ValueError: On an unknown modifier.
+    """
+    for term in order or ():
+        column, *modifiers = term.split(".")
+        unknown = set(modifiers) - {"asc", "desc", "nullsfirst", "nullslast"}
+        if not column or unknown:
+            raise ValueError(f"Invalid order term {term!r}")
+        nullsfirst = True if "nullsfirst" in modifiers else False if "nullslast" in modifiers else None
+        query = query.order(column, desc="desc" in modifiers, nullsfirst=nullsfirst)
+    return query
+
+
+def chunked(records: Iterable[Dict[str, Any]], chunk_size: int) -> Iterable[List[Dict[str, Any]]]:
+    """
+    Split records into lists of at most chunk_size.
+    Args:
+        records (Iterable[Dict[str, Any]]): Rows.
+        chunk_size (int): Maximum rows per chunk.
+    Returns:
+        Iterable[List[Dict[str, Any]]]: Chunks in input order.
+    """
+    chunk: List[Dict[str, Any]] = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def _aiter(items: Iterable[Any]) -> AsyncIterator[Any]:
+    for item in items:
+        yield item
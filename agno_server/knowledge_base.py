@@ -22,17 +22,38 @@ Requirements:
    - query_entries(tags: Optional[List[str]], text: Optional[str], source: Optional[str]) -> List[KnowledgeBaseEntry]
    - update_entry(entry_id: str, content: str, metadata: Optional[dict]) -> bool
    - delete_entry(entry_id: str) -> bool
-3. Thread-safe, in-memory implementation for MVP (can be swapped for DB or vector store later).
+   - Bulk forms add_entries / get_entries / delete_entries / upsert_entries take the lock once,
+     update indexes in one pass and embed new text in a single batch.
+3. Thread-safe, in-memory implementation for MVP (can be swapped for DB or vector store later). Writes
+   serialize on one lock. get_entry/get_entries take no lock. query_entries holds it only to copy its
+   filter and full-text index results, and semantic_query only for the vector search; ordering,
+   substring filtering and materialization run without it, so long queries do not block add_entry.
 4. Pydantic for data validation. Use UTC timestamps.
 5. Agents access KB via KnowledgeBase interface.
-6. Support basic text search (case-insensitive substring match) and tag/source filtering.
+6. Support ranked full-text search and tag/source filtering:
+   - Text queries use an incrementally maintained inverted index (see text_index.py); every query
+     word must appear in the entry's title or content, and results are ordered by BM25 score.
+   - Queries without word characters fall back to a case-insensitive substring match.
+7. Tag and source filters are answered from secondary indexes (see secondary_index.py).
+8. Optional semantic search: constructing KnowledgeBase with an embedder (e.g. HashingEmbedder from
+   vector_index.py) maintains a VectorIndex of title + content and enables semantic_query().
+9. Entries are held internally as compact __slots__ records (binary ids, epoch-microsecond timestamps,
+   interned tags and sources; see compact.py). Reads materialize a fresh KnowledgeBaseEntry per call, with
+   copied tags and metadata, so mutating a returned entry does not change the store.
 """
 
-from typing import Optional, List, Dict, Any
+import copy
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime
 from uuid import uuid4
 from pydantic import BaseModel, Field
 from threading import Lock
+from .text_index import InvertedIndex, tokenize
+from .vector_index import VectorIndex
+from .secondary_index import SecondaryIndex, intersect
+from .compact import (
+    RecordKey, decode_id, encode_id, from_epoch_us, intern_optional, intern_tags, to_epoch_us,
+)
 
 class KnowledgeBaseEntry(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid4()))
@@ -44,50 +65,266 @@ class KnowledgeBaseEntry(BaseModel):
     tags: Optional[List[str]] = None
     metadata: Optional[Dict[str, Any]] = None
 
+class _KnowledgeRecord:
+    """
+    Compact internal form of a KnowledgeBaseEntry.
+    """
+    __slots__ = ("key", "title", "content", "source", "created_at", "updated_at", "tags", "metadata")
+
+    def __init__(self, key, title, content, source, created_at, updated_at, tags, metadata):
+        self.key: RecordKey = key
+        self.title: str = title
+        self.content: str = content
+        self.source: Optional[str] = source
+        self.created_at: int = created_at
+        self.updated_at: int = updated_at
+        self.tags: Optional[Tuple[str, ...]] = tags
+        self.metadata: Optional[Dict[str, Any]] = metadata
+
+    @classmethod
+    def from_entry(cls, entry: KnowledgeBaseEntry) -> "_KnowledgeRecord":
+        return cls(
+            encode_id(entry.id),
+            entry.title,
+            entry.content,
+            intern_optional(entry.source),
+            to_epoch_us(entry.created_at),
+            to_epoch_us(entry.updated_at),
+            intern_tags(entry.tags),
+            entry.metadata,
+        )
+
+    def to_entry(self) -> KnowledgeBaseEntry:
+        # Reason: the entry was validated when it entered the store; model_construct skips re-validation.
+        # The mutable payloads are deep-copied so callers mutating the result cannot change the store.
+        return KnowledgeBaseEntry.model_construct(
+            id=decode_id(self.key),
+            title=self.title,
+            content=self.content,
+            source=self.source,
+            created_at=from_epoch_us(self.created_at),
+            updated_at=from_epoch_us(self.updated_at),
+            tags=list(self.tags) if self.tags is not None else None,
+            metadata=copy.deepcopy(self.metadata),
+        )
+
 class KnowledgeBase:
     """
     Thread-safe in-memory store for KnowledgeBaseEntry objects.
+    Args:
+        embedder (optional): Object with `dim` and `embed(texts) -> np.ndarray`. When given,
+            entries are also indexed for semantic_query().
     """
-    def __init__(self):
-        self._store: Dict[str, KnowledgeBaseEntry] = {}
+    def __init__(self, embedder: Any = None):
+        self._store: Dict[RecordKey, _KnowledgeRecord] = {}
+        self._order: Dict[RecordKey, int] = {}
+        self._next_order = 0
+        self._by_tag = SecondaryIndex()
+        self._by_source = SecondaryIndex()
+        self._text_index = InvertedIndex()
+        self._embedder = embedder
+        self._vector_index = VectorIndex(embedder.dim) if embedder is not None else None
         self._lock = Lock()
 
+    @staticmethod
+    def _index_text(record: _KnowledgeRecord) -> str:
+        return f"{record.title or ''}\n{record.content}"
+
+    def _index_vectors(self, records: List[_KnowledgeRecord]) -> None:
+        if self._vector_index is not None and records:
+            vectors = self._embedder.embed([self._index_text(r) for r in records])
+            self._vector_index.add([r.key for r in records], vectors)
+
+    def _filter_ids(self, tags: Optional[List[str]], source: Optional[str]) -> Optional[set]:
+        candidate_sets = []
+        if tags:
+            candidate_sets.append(self._by_tag.lookup(tags))
+        if source:
+            candidate_sets.append(self._by_source.lookup([source]))
+        return intersect(candidate_sets) if candidate_sets else None
+
+    def _write_records(self, records: List[_KnowledgeRecord], upsert: bool) -> int:
+        """
+        Insert records under the held write lock.
+        Returns:
+            int: Number of records that replaced an existing entry.
+        """
+        replaced = 0
+        now = to_epoch_us(datetime.utcnow()) if upsert else None
+        for record in records:
+            key = record.key
+            previous = self._store.get(key)
+            if previous is not None:
+                replaced += 1
+                self._by_tag.remove(key, previous.tags)
+                self._by_source.remove(key, [previous.source])
+                if upsert:
+                    record.created_at = previous.created_at
+                    record.updated_at = now
+            else:
+                self._order[key] = self._next_order
+                self._next_order += 1
+            self._store[key] = record
+            self._by_tag.add(key, record.tags)
+            self._by_source.add(key, [record.source])
+            self._text_index.add(key, self._index_text(record))
+        # Reason: one embed() call for the whole batch amortizes the embedder's per-call overhead.
+        self._index_vectors(records)
+        return replaced
+
     def add_entry(self, entry: KnowledgeBaseEntry) -> str:
+        record = _KnowledgeRecord.from_entry(entry)
         with self._lock:
-            self._store[entry.id] = entry
+            self._write_records([record], upsert=False)
             return entry.id
 
-    def get_entry(self, entry_id: str) -> Optional[KnowledgeBaseEntry]:
+    def add_entries(self, entries: List[KnowledgeBaseEntry]) -> List[str]:
+        """
+        Add (or replace) many entries under a single lock acquisition.
+        Args:
+            entries (List[KnowledgeBaseEntry]): Entries to store.
+        Returns:
+            List[str]: Entry ids, in input order.
+        """
+        records = [_KnowledgeRecord.from_entry(entry) for entry in entries]
+        with self._lock:
+            self._write_records(records, upsert=False)
+        return [entry.id for entry in entries]
+
+    def upsert_entries(self, entries: List[KnowledgeBaseEntry]) -> Dict[str, int]:
+        """
+        Insert new entries and overwrite existing ones, keeping each existing entry's created_at
+        and position and stamping updated_at with the current time.
+        Args:
+            entries (List[KnowledgeBaseEntry]): Entries to insert or update.
+        Returns:
+            Dict[str, int]: Counts of "inserted" and "updated" entries.
+        """
+        records = [_KnowledgeRecord.from_entry(entry) for entry in entries]
         with self._lock:
-            return self._store.get(entry_id)
+            updated = self._write_records(records, upsert=True)
+        return {"inserted": len(records) - updated, "updated": updated}
+
+    def get_entry(self, entry_id: str) -> Optional[KnowledgeBaseEntry]:
+        # Reason: a single dict lookup is atomic, so point reads skip the store lock entirely.
+        record = self._store.get(encode_id(entry_id))
+        return record.to_entry() if record is not None else None
+
+    def get_entries(self, entry_ids: List[str]) -> List[Optional[KnowledgeBaseEntry]]:
+        """
+        Fetch many entries without taking the store lock.
+        Args:
+            entry_ids (List[str]): Entry ids.
+        Returns:
+            List[Optional[KnowledgeBaseEntry]]: Entries aligned with entry_ids; None where missing.
+        """
+        records = [self._store.get(encode_id(entry_id)) for entry_id in entry_ids]
+        return [record.to_entry() if record is not None else None for record in records]
 
     def query_entries(self, tags: Optional[List[str]] = None, text: Optional[str] = None, source: Optional[str] = None) -> List[KnowledgeBaseEntry]:
+        ranked_search = bool(text and tokenize(text))
         with self._lock:
-            results = list(self._store.values())
-            if tags:
-                results = [e for e in results if e.tags and any(tag in e.tags for tag in tags)]
+            allowed = self._filter_ids(tags, source)
+            if ranked_search:
+                # Reason: postings lookup touches only matching entries, already ranked by BM25.
+                keys = [key for key, _ in self._text_index.search(text)]
+            elif allowed is None:
+                keys = list(self._store)
+        store = self._store
+        if ranked_search:
+            records = [store.get(key) for key in keys if allowed is None or key in allowed]
+        else:
+            if allowed is not None:
+                order = self._order
+                # Reason: entries deleted after the lookup have no position; they are dropped just below.
+                keys = sorted((key for key in allowed if key in order), key=lambda key: order.get(key, -1))
+            records = [store.get(key) for key in keys]
             if text:
                 text_lower = text.lower()
-                results = [e for e in results if text_lower in e.content.lower() or text_lower in (e.title.lower() if e.title else "")]
-            if source:
-                results = [e for e in results if e.source == source]
-            return results
+                records = [r for r in records if r is not None and (text_lower in r.content.lower() or text_lower in (r.title.lower() if r.title else ""))]
+        return [record.to_entry() for record in records if record is not None]
+
+    def semantic_query(self, text: str, top_k: int = 5, tags: Optional[List[str]] = None, source: Optional[str] = None, nprobe: Optional[int] = None) -> List[KnowledgeBaseEntry]:
+        """
+        Return the entries most similar in meaning to text, best first.
+        Args:
+            text (str): Free-text query.
+            top_k (int): Maximum number of entries to return.
+            tags (Optional[List[str]]): Keep only entries with any of these tags.
+            source (Optional[str]): Keep only entries from this source.
+            nprobe (Optional[int]): Probe count for an approximate (IVF) search; see build_ann_index.
+        Returns:
+            List[KnowledgeBaseEntry]: Matching entries ordered by cosine similarity.
+        Raises:
+            RuntimeError: If the knowledge base was created without an embedder.
+        """
+        if self._vector_index is None:
+            raise RuntimeError("Semantic search requires a KnowledgeBase created with an embedder.")
+        query_vector = self._embedder.embed([text])[0]
+        with self._lock:
+            # Reason: over-fetch when filtering so post-filtering still fills top_k.
+            fetch = top_k if not (tags or source) else len(self._vector_index)
+            allowed = self._filter_ids(tags, source)
+            hits = self._vector_index.search(query_vector, fetch, nprobe=nprobe)
+        records = []
+        for key, _ in hits:
+            if allowed is not None and key not in allowed:
+                continue
+            record = self._store.get(key)
+            if record is not None:
+                records.append(record)
+                if len(records) == top_k:
+                    break
+        return [record.to_entry() for record in records]
+
+    def build_ann_index(self, n_lists: int) -> None:
+        """
+        Build an IVF approximate index over the current entries for large corpora.
+        Args:
+            n_lists (int): Number of clusters; roughly sqrt(number of entries) works well.
+        """
+        if self._vector_index is None:
+            raise RuntimeError("Semantic search requires a KnowledgeBase created with an embedder.")
+        with self._lock:
+            self._vector_index.build_ivf(n_lists)
 
     def update_entry(self, entry_id: str, content: str, metadata: Optional[dict] = None) -> bool:
+        key = encode_id(entry_id)
         with self._lock:
-            entry = self._store.get(entry_id)
-            if not entry:
+            record = self._store.get(key)
+            if not record:
                 return False
-            entry.content = content
-            entry.updated_at = datetime.utcnow()
+            record.content = content
+            record.updated_at = to_epoch_us(datetime.utcnow())
             if metadata:
-                entry.metadata = metadata
-            self._store[entry_id] = entry
+                record.metadata = metadata
+            self._text_index.add(key, self._index_text(record))
+            self._index_vectors([record])
             return True
 
+    def _remove(self, key: RecordKey) -> bool:
+        record = self._store.pop(key, None)
+        if record is None:
+            return False
+        self._by_tag.remove(key, record.tags)
+        self._by_source.remove(key, [record.source])
+        del self._order[key]
+        self._text_index.remove(key)
+        if self._vector_index is not None:
+            self._vector_index.remove(key)
+        return True
+
     def delete_entry(self, entry_id: str) -> bool:
         with self._lock:
-            if entry_id in self._store:
-                del self._store[entry_id]
-                return True
-            return False
+            return self._remove(encode_id(entry_id))
+
+    def delete_entries(self, entry_ids: List[str]) -> int:
+        """
+        Delete many entries under a single lock acquisition.
+        Args:
+            entry_ids (List[str]): Entry ids; unknown ids are ignored.
+        Returns:
+            int: Number of entries deleted.
+        """
+        with self._lock:
+            return sum(self._remove(encode_id(entry_id)) for entry_id in entry_ids)
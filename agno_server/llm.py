@@ -1,26 +1,111 @@
+import json
 import os
-import google.generativeai as genai
+from threading import Lock
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Tuple
+from google import genai
+from google.genai import types
+from agno_server.llm_cache import LLMCache, make_cache_key
+
+# Reason: a genai.Client owns its HTTP connection pool, so one client per API key is shared by every
+# GeminiLLM using that key; clients are independent, so different keys can coexist in one process.
+_registry_lock = Lock()
+_shared_clients: Dict[str, genai.Client] = {}
+_shared_models: Dict[Tuple[str, str, str], "SharedModel"] = {}
+
+class SharedModel:
+    """
+    A Gemini model bound to a shared client and a fixed generation config.
+    Args:
+        client (genai.Client): Client for the API key.
+        model_name (str): The Gemini model identifier.
+        generation_config (Dict[str, Any]): Generation parameters sent with every request.
+    """
+    def __init__(self, client: genai.Client, model_name: str, generation_config: Dict[str, Any]):
+        self.client = client
+        self.model_name = model_name
+        self.config = types.GenerateContentConfig(**generation_config)
+
+    def generate_content(self, prompt: str, stream: bool = False) -> Any:
+        """
+        Generate a reply synchronously.
+        Args:
+            prompt (str): Full prompt text.
+            stream (bool): Return an iterator of partial responses instead of one response.
+        Returns:
+            Any: The response, or an iterator of response chunks when stream is set.
+        """
+        if stream:
+            return self.client.models.generate_content_stream(model=self.model_name, contents=prompt, config=self.config)
+        return self.client.models.generate_content(model=self.model_name, contents=prompt, config=self.config)
+
+    async def generate_content_async(self, prompt: str, stream: bool = False) -> Any:
+        """
+        Generate a reply on the client's async transport.
+        Args:
+            prompt (str): Full prompt text.
+            stream (bool): Return an async iterator of partial responses instead of one response.
+        Returns:
+            Any: The response, or an async iterator of response chunks when stream is set.
+        """
+        if stream:
+            return await self.client.aio.models.generate_content_stream(model=self.model_name, contents=prompt, config=self.config)
+        return await self.client.aio.models.generate_content(model=self.model_name, contents=prompt, config=self.config)
+
+def get_shared_model(api_key: str, model_name: str, generation_config: Dict[str, Any]) -> SharedModel:
+    """
+    Return the process-wide model for the given key, model and config.
+    Args:
+        api_key (str): Gemini API key; each key gets its own shared client.
+        model_name (str): The Gemini model identifier.
+        generation_config (Dict[str, Any]): Generation parameters bound to the model.
+    Returns:
+        SharedModel: A shared model instance, created on first use.
+    """
+    registry_key = (api_key, model_name, json.dumps(generation_config, sort_keys=True))
+    with _registry_lock:
+        model = _shared_models.get(registry_key)
+        if model is None:
+            client = _shared_clients.get(api_key)
+            if client is None:
+                client = _shared_clients[api_key] = genai.Client(api_key=api_key)
+            model = _shared_models[registry_key] = SharedModel(client, model_name, generation_config)
+        return model
+
+def reset_shared_models() -> None:
+    """
+    Drop every shared model and client so the next GeminiLLM creates fresh ones.
+    """
+    with _registry_lock:
+        _shared_models.clear()
+        _shared_clients.clear()
 
 class GeminiLLM:
     """
     Wrapper for Google Gemini 2.5 Pro API.
+    Args:
+        api_key (str, optional): Gemini API key; defaults to GEMINI_API_KEY.
+        cache (LLMCache, optional): Response cache consulted before every request.
     """
-    def __init__(self, api_key: str = None):
+    model_name = "gemini-2.5-pro-preview-03-25"
+
+    def __init__(self, api_key: str = None, cache: Optional[LLMCache] = None):
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
         if not self.api_key:
             raise RuntimeError("GEMINI_API_KEY is not set in environment variables.")
-        genai.configure(api_key=self.api_key)
-        generation_config = {
+        self.cache = cache
+        self.generation_config = {
             "temperature": 1,
             "top_p": 0.95,
             "top_k": 64,
             "max_output_tokens": 65536,
             "response_mime_type": "text/plain",
         }
-        self.model = genai.GenerativeModel(
-            model_name="gemini-2.5-pro-preview-03-25",
-            generation_config=generation_config,
-        )
+        self.model = get_shared_model(self.api_key, self.model_name, self.generation_config)
+
+    def _cache_key(self, prompt: str, system: Optional[str]) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return make_cache_key(self.model_name, self.generation_config, system, prompt)
 
     def chat(self, prompt: str, system: str = None) -> str:
         """
@@ -31,11 +116,102 @@ class GeminiLLM:
         Returns:
             str: The model's reply.
         """
+        key = self._cache_key(prompt, system)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
         # Gemini expects a string, not a list of dicts. Prepend system prompt if provided.
         if system:
             full_prompt = f"{system}\n\n{prompt}"
         else:
             full_prompt = prompt
-        chat_session = self.model.start_chat(history=[])
-        response = chat_session.send_message(full_prompt)
-        return response.text if hasattr(response, "text") else response['text']
+        # Reason: single-shot generate_content avoids building a chat session per call.
+        response = self.model.generate_content(full_prompt)
+        text = response.text if hasattr(response, "text") else response['text']
+        if key is not None:
+            self.cache.set(key, text)
+        return text
+
+    async def achat(self, prompt: str, system: str = None) -> str:
+        """
+        Async variant of chat; awaits Gemini without blocking the event loop.
+        Args:
+            prompt (str): The user prompt.
+            system (str, optional): System instructions/context for the model.
+        Returns:
+            str: The model's reply.
+        """
+        key = self._cache_key(prompt, system)
+        if key is not None:
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                return cached
+        if system:
+            full_prompt = f"{system}\n\n{prompt}"
+        else:
+            full_prompt = prompt
+        response = await self.model.generate_content_async(full_prompt)
+        text = response.text if hasattr(response, "text") else response['text']
+        if key is not None:
+            await self.cache.aset(key, text)
+        return text
+
+    def stream(self, prompt: str, system: str = None) -> Iterator[str]:
+        """
+        Stream the model's reply as text chunks, synchronously.
+        Args:
+            prompt (str): The user prompt.
+            system (str, optional): System instructions/context for the model.
+        Yields:
+            str: Successive chunks of the reply.
+        """
+        key = self._cache_key(prompt, system)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+        if system:
+            full_prompt = f"{system}\n\n{prompt}"
+        else:
+            full_prompt = prompt
+        response = self.model.generate_content(full_prompt, stream=True)
+        chunks = []
+        for chunk in response:
+            text = chunk.text if hasattr(chunk, "text") else chunk['text']
+            if text:
+                chunks.append(text)
+                yield text
+        if key is not None:
+            self.cache.set(key, "".join(chunks))
+
+    async def astream(self, prompt: str, system: str = None) -> AsyncIterator[str]:
+        """
+        Stream the model's reply as text chunks as Gemini produces them.
+        Args:
+            prompt (str): The user prompt.
+            system (str, optional): System instructions/context for the model.
+        Yields:
+            str: Successive chunks of the reply.
+        """
+        key = self._cache_key(prompt, system)
+        if key is not None:
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                yield cached
+                return
+        if system:
+            full_prompt = f"{system}\n\n{prompt}"
+        else:
+            full_prompt = prompt
+        response = await self.model.generate_content_async(full_prompt, stream=True)
+        chunks = []
+        async for chunk in response:
+            text = chunk.text if hasattr(chunk, "text") else chunk['text']
+            if text:
+                chunks.append(text)
+                yield text
+        # Reason: only cache complete replies, so an abandoned stream never poisons the cache.
+        if key is not None:
+            await self.cache.aset(key, "".join(chunks))
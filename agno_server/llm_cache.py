@@ -0,0 +1,242 @@
+"""
+llm_cache.py
+Content-addressed response cache for GeminiLLM.
+
+Purpose:
+- Avoid re-sending identical (model, generation config, system, prompt) requests to Gemini.
+- Serve repeated ideas and retries with zero tokens and zero latency.
+
+Design:
+1. Keys are SHA-256 hashes of the model name, generation config, system prompt and prompt.
+2. In-process LRU tier (OrderedDict) bounded by entry count, with per-entry TTL.
+3. Optional on-disk SQLite tier with the same TTL and a max-entries bound (least recently used rows evicted).
+4. Thread-safe; hit/miss counters exposed via stats().
+5. Async callers use aget()/aset(): the memory tier is served inline, SQLite work runs in a worker
+   thread (asyncio.to_thread) so disk I/O never blocks the event loop. Disk-hit accessed_at updates
+   are buffered and written in one batch with the next set() (or every ACCESS_FLUSH_SIZE hits)
+   instead of an UPDATE + commit per hit.
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+
+ACCESS_FLUSH_SIZE = 64
+
+
+def make_cache_key(model_name: str, generation_config: Dict[str, Any], system: Optional[str], prompt: str) -> str:
+    """
+    Build a content-addressed cache key for an LLM request.
+    Args:
+        model_name (str): The Gemini model identifier.
+        generation_config (Dict[str, Any]): Generation parameters sent with the request.
+        system (Optional[str]): System instructions, if any.
+        prompt (str): The user prompt.
+    Returns:
+        str: Hex SHA-256 digest identifying the request.
+    """
+    payload = json.dumps([model_name, generation_config, system or "", prompt], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Two-tier (memory LRU + optional SQLite) cache of LLM responses.
+    Args:
+        max_entries (int): Maximum entries held in the in-process LRU tier.
+        ttl (Optional[float]): Seconds a response stays valid; None disables expiry.
+        db_path (Optional[str]): SQLite file for the on-disk tier; None keeps the cache in memory only.
+        max_disk_entries (int): Maximum rows kept in the on-disk tier.
+    """
+    def __init__(self, max_entries: int = 256, ttl: Optional[float] = 3600, db_path: Optional[str] = None, max_disk_entries: int = 10000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self._entries: "OrderedDict[str, Tuple[Optional[float], str]]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._db: Optional[sqlite3.Connection] = None
+        self._pending_access: Dict[str, float] = {}
+        if db_path:
+            # Reason: access is serialized by self._lock, so one shared connection is safe.
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL, accessed_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache(accessed_at)")
+            self._db.commit()
+
+    def _expiry(self, now: float) -> Optional[float]:
+        return now + self.ttl if self.ttl is not None else None
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response, promoting disk hits into the memory tier.
+        Args:
+            key (str): Cache key from make_cache_key.
+        Returns:
+            Optional[str]: The cached response, or None on a miss or expired entry.
+        """
+        now = time.time()
+        with self._lock:
+            value = self._get_memory(key, now)
+            if value is None and self._db is not None:
+                value = self._get_disk(key, now)
+            if value is None:
+                self.misses += 1
+            return value
+
+    async def aget(self, key: str) -> Optional[str]:
+        """
+        Async get(); memory hits return inline, the SQLite lookup runs in a worker thread.
+        Args:
+            key (str): Cache key from make_cache_key.
+        Returns:
+            Optional[str]: The cached response, or None on a miss or expired entry.
+        """
+        with self._lock:
+            value = self._get_memory(key, time.time())
+            if value is not None:
+                return value
+            if self._db is None:
+                self.misses += 1
+                return None
+        return await asyncio.to_thread(self._get_disk_locked, key)
+
+    def _get_memory(self, key: str, now: float) -> Optional[str]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at is None or expires_at > now:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+        del self._entries[key]
+        return None
+
+    def _get_disk_locked(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            # Reason: another caller may have promoted the entry while this one waited for a thread.
+            value = self._get_memory(key, now)
+            if value is None:
+                value = self._get_disk(key, now)
+            if value is None:
+                self.misses += 1
+            return value
+
+    def _get_disk(self, key: str, now: float) -> Optional[str]:
+        row = self._db.execute("SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at <= now:
+            self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            self._db.commit()
+            return None
+        self._pending_access[key] = now
+        if len(self._pending_access) >= ACCESS_FLUSH_SIZE:
+            self._flush_access()
+            self._db.commit()
+        self._put_memory(key, expires_at, value)
+        self.hits += 1
+        self.disk_hits += 1
+        return value
+
+    def _flush_access(self) -> None:
+        if self._pending_access:
+            self._db.executemany(
+                "UPDATE llm_cache SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._pending_access.items()],
+            )
+            self._pending_access.clear()
+
+    def set(self, key: str, value: str) -> None:
+        """
+        Store a response in every configured tier, evicting as needed.
+        Args:
+            key (str): Cache key from make_cache_key.
+            value (str): The model response to cache.
+        """
+        now = time.time()
+        expires_at = self._expiry(now)
+        with self._lock:
+            self._put_memory(key, expires_at, value)
+            if self._db is not None:
+                self._set_disk(key, value, expires_at, now)
+
+    async def aset(self, key: str, value: str) -> None:
+        """
+        Async set(); the memory tier is filled inline, the SQLite write runs in a worker thread.
+        Args:
+            key (str): Cache key from make_cache_key.
+            value (str): The model response to cache.
+        """
+        now = time.time()
+        expires_at = self._expiry(now)
+        with self._lock:
+            self._put_memory(key, expires_at, value)
+        if self._db is not None:
+            await asyncio.to_thread(self._set_disk_locked, key, value, expires_at, now)
+
+    def _set_disk_locked(self, key: str, value: str, expires_at: Optional[float], now: float) -> None:
+        with self._lock:
+            self._set_disk(key, value, expires_at, now)
+
+    def _set_disk(self, key: str, value: str, expires_at: Optional[float], now: float) -> None:
+        # Reason: buffered accessed_at updates must land before LRU eviction reads them.
+        self._flush_access()
+        self._db.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, value, expires_at, now),
+        )
+        self._db.execute("DELETE FROM llm_cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        self._db.execute(
+            "DELETE FROM llm_cache WHERE key IN ("
+            "SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,),
+        )
+        self._db.commit()
+
+    def _put_memory(self, key: str, expires_at: Optional[float], value: str) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Drop every cached response from all tiers and reset counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._pending_access.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+            self.hits = self.disk_hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report cache effectiveness counters.
+        Returns:
+            Dict[str, Any]: hits, disk_hits, misses, hit_rate and memory_entries.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._entries),
+            }
@@ -3,27 +3,36 @@ Entry point for the Agno FastMCP Supabase server.
 """
 
 import os
-from fastapi import FastAPI, HTTPException, Depends, Request
-from pydantic import BaseModel
+import json
+import logging
+from fastapi import FastAPI, HTTPException, Depends, Request, Query
+from pydantic import BaseModel, Field, model_validator
 from dotenv import load_dotenv
-from typing import Any, Dict, Optional, List
-from supabase import create_client, Client
+from typing import Any, AsyncIterator, Dict, Literal, Optional, List, Union
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from agno_server.orchestrator import AgnoOrchestrator
 from agno_server.orchestrator_agno import AgnoOrchestratorAgno
+from agno_server.tools.brave_search import aclose_http_clients
+from agno_server.db import SupabaseDB
+from agno_server.query_cache import QueryCache, make_query_key
+
+logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
-def get_supabase_client():
+async def get_db() -> SupabaseDB:
     if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
         raise RuntimeError("Supabase credentials are not set in environment variables.")
-    return create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+    return await SupabaseDB.connect(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
 
 app = FastAPI()
+# Reason: short TTL; writes through this server invalidate immediately, others' writes show up within the TTL.
+query_cache = QueryCache(ttl=float(os.getenv("QUERY_CACHE_TTL") or 2.0))
 
 # Enable CORS for Cloudflare Pages and local dev
 app.add_middleware(
@@ -41,16 +50,42 @@ app.add_middleware(
 app.mount("/static", StaticFiles(directory="static", html=True), name="static")
 
 @app.on_event("startup")
-def startup_event():
-    app.state.supabase = get_supabase_client()
+async def startup_event():
+    app.state.db = await get_db()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await aclose_http_clients()
+    db = getattr(app.state, "db", None)
+    if db is not None:
+        await db.aclose()
+
+CountMode = Literal["exact", "planned", "estimated"]
 
 class ReadRowsRequest(BaseModel):
     table: str
     filters: Optional[Dict[str, Any]] = None
-    limit: Optional[int] = 100
+    limit: Optional[int] = Field(100, ge=0)
+    columns: Optional[List[str]] = None
+    order: Optional[List[str]] = None
+    count: Optional[CountMode] = None
+    order_by: Optional[str] = None
+    cursor: Optional[Any] = None
+    stream: bool = False
+    page_size: int = Field(1000, ge=1, le=10000)
+    cache: bool = True
+
+    @model_validator(mode="after")
+    def check_pagination(self):
+        # Reason: keyset pagination (cursor and stream export) needs a unique sort column to resume from.
+        if (self.cursor is not None or self.stream) and not self.order_by:
+            raise ValueError("order_by is required when cursor or stream is set")
+        return self
 
 class ReadRowsResponse(BaseModel):
     rows: List[Dict[str, Any]]
+    next_cursor: Optional[Any] = None
+    count: Optional[int] = None
 
 class CreateRecordRequest(BaseModel):
     table: str
@@ -59,20 +94,39 @@ class CreateRecordRequest(BaseModel):
 class CreateRecordResponse(BaseModel):
     inserted: List[Dict[str, Any]]
 
+class BulkChunkResult(BaseModel):
+    chunk: int
+    offset: int
+    count: int
+    inserted: int
+    error: Optional[str] = None
+
+class BulkCreateRecordResponse(BaseModel):
+    inserted: int
+    failed: int
+    chunks: List[BulkChunkResult]
+    error: Optional[str] = None
+
 class UpdateRecordRequest(BaseModel):
     table: str
     filters: Dict[str, Any]
     values: Dict[str, Any]
+    columns: Optional[List[str]] = None
+    count: Optional[CountMode] = None
 
 class UpdateRecordResponse(BaseModel):
     updated: List[Dict[str, Any]]
+    count: Optional[int] = None
 
 class DeleteRecordRequest(BaseModel):
     table: str
     filters: Dict[str, Any]
+    columns: Optional[List[str]] = None
+    count: Optional[CountMode] = None
 
 class DeleteRecordResponse(BaseModel):
     deleted: List[Dict[str, Any]]
+    count: Optional[int] = None
 
 class RefinePromptRequest(BaseModel):
     user_idea: str
@@ -80,37 +134,99 @@ class RefinePromptRequest(BaseModel):
 class RefinePromptResponse(BaseModel):
     prompt: str
 
+class BatchRefinePromptRequest(BaseModel):
+    user_ideas: List[str]
+    max_concurrency: int = Field(4, ge=1, le=32)
+    stream: bool = False
+
+class BatchRefinePromptResult(BaseModel):
+    index: int
+    prompt: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchRefinePromptResponse(BaseModel):
+    results: List[BatchRefinePromptResult]
+
 # Reason: Placeholder for MCP server startup logic
 @app.get("/", include_in_schema=True)
 def root():
     return {"status": "Agno MCP server running"}
 
 @app.post("/tools/read_rows", response_model=ReadRowsResponse)
-def read_rows(request: ReadRowsRequest, http_request: Request):
+async def read_rows(request: ReadRowsRequest, http_request: Request):
     """
     Reads rows from a specified Supabase table using optional filters.
+    Filters map a column to a value (equality) or to {operator: operand} with operators
+    eq, neq, gt, gte, lt, lte, in, like, ilike and is; columns, order and count are
+    pushed down to PostgREST as well (limit 0 with count returns only the count).
+    With order_by set, rows are sorted by that unique column and next_cursor (the last
+    row's key, when the page is full) can be sent back as cursor to fetch the next page.
+    With stream set, every matching row is exported as application/x-ndjson, fetched
+    page_size rows at a time. Non-stream reads are served from the query cache
+    unless cache is false.
     Args:
         request (ReadRowsRequest): The request parameters.
     Returns:
-        ReadRowsResponse: The rows from the table.
+        ReadRowsResponse: The rows from the table, or a StreamingResponse when stream is true.
     Raises:
         HTTPException: If the table does not exist or query fails.
     """
-    supabase = http_request.app.state.supabase
+    db = http_request.app.state.db
     table = request.table
     filters = request.filters or {}
-    limit = request.limit or 100
+    limit = 100 if request.limit is None else request.limit
+    if request.stream:
+        return await export_rows(db, request)
+    params = dict(filters=filters, limit=limit, order_by=request.order_by, cursor=request.cursor, columns=request.columns, order=request.order, count=request.count)
+
+    async def fetch():
+        return await db.read_rows(
+            table, filters, limit, order_by=request.order_by, after=request.cursor,
+            columns=request.columns, order=request.order, count=request.count,
+        )
+
     try:
-        query = supabase.table(table).select("*")
-        for key, value in filters.items():
-            query = query.eq(key, value)
-        rows = query.limit(limit).execute().data
-        return ReadRowsResponse(rows=rows)
+        if request.cache:
+            result = await query_cache.get_or_fetch(make_query_key(table, **params), fetch)
+        else:
+            result = await fetch()
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    rows = result.rows
+    next_cursor = rows[-1][request.order_by] if request.order_by and rows and len(rows) == limit else None
+    return ReadRowsResponse(rows=rows, next_cursor=next_cursor, count=result.count)
+
+async def export_rows(db: SupabaseDB, request: ReadRowsRequest) -> StreamingResponse:
+    """
+    Stream every matching row as NDJSON, one keyset page in memory at a time.
+    Args:
+        db (SupabaseDB): Data-access layer.
+        request (ReadRowsRequest): A read_rows request with stream and order_by set.
+    Returns:
+        StreamingResponse: application/x-ndjson stream of rows.
+    Raises:
+        HTTPException: If the first page cannot be read.
+    """
+    pages = db.iter_pages(request.table, request.order_by, request.filters, request.page_size, after=request.cursor, columns=request.columns)
+    # Reason: fetch the first page before responding so a bad table or filter is still a 400.
+    try:
+        first_page = await pages.__anext__()
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def row_stream():
+        try:
+            yield "".join(json.dumps(row) + "\n" for row in first_page)
+            async for page in pages:
+                yield "".join(json.dumps(row) + "\n" for row in page)
+        except Exception as e:
+            # Reason: headers are already sent, so failures are reported in-band.
+            yield json.dumps({"error": f"Export failed: {str(e)}"}) + "\n"
+
+    return StreamingResponse(row_stream(), media_type="application/x-ndjson")
 
 @app.post("/tools/create_record", response_model=CreateRecordResponse)
-def create_record(request: CreateRecordRequest, http_request: Request):
+async def create_record(request: CreateRecordRequest, http_request: Request):
     """
     Creates one or more records in a Supabase table.
     Args:
@@ -120,17 +236,138 @@ def create_record(request: CreateRecordRequest, http_request: Request):
     Raises:
         HTTPException: If insertion fails.
     """
-    supabase = http_request.app.state.supabase
+    db = http_request.app.state.db
     table = request.table
     records = request.records
     try:
-        inserted = supabase.table(table).insert(records).execute().data
+        inserted = await db.insert(table, records)
         return CreateRecordResponse(inserted=inserted)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        query_cache.invalidate(table)
+
+async def ndjson_lines(byte_stream: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[Optional[bytes]]:
+    """
+    Split a byte stream into lines without rescanning or holding more than one line.
+    Args:
+        byte_stream (AsyncIterator[bytes]): Request body chunks.
+        max_line_bytes (int): Longest line kept; the bytes of a longer line are dropped as they arrive.
+    Returns:
+        AsyncIterator[Optional[bytes]]: Each line without its newline, or None for a line over max_line_bytes.
+    """
+    parts: List[bytes] = []
+    size = 0
+    async for data in byte_stream:
+        start = 0
+        # Reason: only the newly received bytes are searched; a line's pieces are joined once, when it ends.
+        while True:
+            end = data.find(b"\n", start)
+            if end < 0:
+                break
+            size += end - start
+            if size <= max_line_bytes:
+                parts.append(data[start:end])
+            yield b"".join(parts) if size <= max_line_bytes else None
+            parts, size = [], 0
+            start = end + 1
+        size += len(data) - start
+        if size <= max_line_bytes:
+            parts.append(data[start:])
+        else:
+            parts = []
+    if size:
+        yield b"".join(parts) if size <= max_line_bytes else None
+
+async def ndjson_chunks(byte_stream: AsyncIterator[bytes], chunk_size: int, max_chunk_bytes: int) -> AsyncIterator[Union[List[Dict[str, Any]], ValueError]]:
+    """
+    Parse an NDJSON byte stream into record chunks as it arrives.
+    Args:
+        byte_stream (AsyncIterator[bytes]): Request body chunks.
+        chunk_size (int): Maximum records per chunk.
+        max_chunk_bytes (int): A chunk is closed once its records reach this many JSON bytes;
+            a single line longer than this is rejected.
+    Returns:
+        AsyncIterator[Union[List[Dict[str, Any]], ValueError]]: Record chunks in input order; a rejected
+        line is yielded in its place as a ValueError, which insert_chunks reports as a failed chunk.
+    Raises:
+        ValueError: If a line is not a JSON object.
+    """
+    chunk: List[Dict[str, Any]] = []
+    chunk_bytes = 0
+    line_number = 0
+    async for line in ndjson_lines(byte_stream, max_chunk_bytes):
+        line_number += 1
+        if line is None:
+            if chunk:
+                yield chunk
+                chunk, chunk_bytes = [], 0
+            yield ValueError(f"line {line_number}: longer than max_chunk_bytes ({max_chunk_bytes})")
+            continue
+        if not line.strip():
+            continue
+        chunk.append(_parse_ndjson_line(line, line_number))
+        chunk_bytes += len(line)
+        if len(chunk) >= chunk_size or chunk_bytes >= max_chunk_bytes:
+            yield chunk
+            chunk, chunk_bytes = [], 0
+    if chunk:
+        yield chunk
+
+def _parse_ndjson_line(line: bytes, line_number: int) -> Dict[str, Any]:
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        raise ValueError(f"line {line_number}: invalid JSON ({e})")
+    if not isinstance(record, dict):
+        raise ValueError(f"line {line_number}: expected a JSON object")
+    return record
+
+@app.post("/tools/create_record/bulk", response_model=BulkCreateRecordResponse)
+async def bulk_create_record(
+    http_request: Request,
+    table: str,
+    chunk_size: int = Query(500, ge=1, le=10000),
+    max_concurrency: int = Query(4, ge=1, le=32),
+    max_chunk_bytes: int = Query(1_000_000, ge=1024),
+):
+    """
+    Bulk-ingest records streamed as an NDJSON request body (one JSON object per line).
+    Records are grouped into chunks of at most chunk_size records / max_chunk_bytes bytes
+    and inserted with up to max_concurrency requests in flight while the body is still
+    being received. A line longer than max_chunk_bytes is skipped and reported as a
+    failed one-record chunk.
+    Args:
+        http_request (Request): Request whose body is the NDJSON record stream.
+        table (str): Target table.
+        chunk_size (int): Maximum records per insert.
+        max_concurrency (int): Maximum inserts in flight.
+        max_chunk_bytes (int): Maximum JSON bytes per insert.
+    Returns:
+        BulkCreateRecordResponse: Totals and per-chunk results ordered by chunk; error is set
+        if the body could not be parsed (chunks before the bad line are still reported).
+    """
+    db = http_request.app.state.db
+    chunks = ndjson_chunks(http_request.stream(), chunk_size, max_chunk_bytes)
+    results: List[Dict[str, Any]] = []
+    error = None
+    try:
+        async for result in db.insert_chunks(table, chunks, max_concurrency):
+            results.append(result)
+    except ValueError as e:
+        error = str(e)
+    finally:
+        query_cache.invalidate(table)
+    results.sort(key=lambda result: result["chunk"])
+    return BulkCreateRecordResponse(
+        inserted=sum(result["inserted"] for result in results),
+        failed=sum(result["count"] - result["inserted"] for result in results),
+        chunks=results,
+        error=error,
+    )
 
 @app.post("/tools/update_record", response_model=UpdateRecordResponse)
-def update_record(request: UpdateRecordRequest, http_request: Request):
+async def update_record(request: UpdateRecordRequest, http_request: Request):
     """
     Updates one or more records in a Supabase table.
     Args:
@@ -140,21 +377,20 @@ def update_record(request: UpdateRecordRequest, http_request: Request):
     Raises:
         HTTPException: If update fails.
     """
-    supabase = http_request.app.state.supabase
+    db = http_request.app.state.db
     table = request.table
     filters = request.filters
     values = request.values
     try:
-        query = supabase.table(table)
-        for key, value in filters.items():
-            query = query.eq(key, value)
-        updated = query.update(values).execute().data
-        return UpdateRecordResponse(updated=updated)
+        result = await db.update(table, filters, values, columns=request.columns, count=request.count)
+        return UpdateRecordResponse(updated=result.rows, count=result.count)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        query_cache.invalidate(table)
 
 @app.post("/tools/delete_record", response_model=DeleteRecordResponse)
-def delete_record(request: DeleteRecordRequest, http_request: Request):
+async def delete_record(request: DeleteRecordRequest, http_request: Request):
     """
     Deletes one or more records in a Supabase table.
     Args:
@@ -164,23 +400,22 @@ def delete_record(request: DeleteRecordRequest, http_request: Request):
     Raises:
         HTTPException: If deletion fails.
     """
-    supabase = http_request.app.state.supabase
+    db = http_request.app.state.db
     table = request.table
     filters = request.filters
     try:
-        query = supabase.table(table)
-        for key, value in filters.items():
-            query = query.eq(key, value)
-        deleted = query.delete().execute().data
-        return DeleteRecordResponse(deleted=deleted)
+        result = await db.delete(table, filters, columns=request.columns, count=request.count)
+        return DeleteRecordResponse(deleted=result.rows, count=result.count)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        query_cache.invalidate(table)
 
 orchestrator = AgnoOrchestrator()
 agno_orchestrator = AgnoOrchestratorAgno()
 
 @app.post("/refine_prompt", response_model=RefinePromptResponse)
-def refine_prompt(request: RefinePromptRequest):
+async def refine_prompt(request: RefinePromptRequest):
     """
     Refine a rough user idea into a production-ready prompt using the multi-agent workflow.
     Args:
@@ -189,7 +424,7 @@ def refine_prompt(request: RefinePromptRequest):
         RefinePromptResponse: The final, production-ready prompt.
     """
     try:
-        prompt = orchestrator.refine_prompt(request.user_idea)
+        prompt = await orchestrator.arefine_prompt(request.user_idea)
         return RefinePromptResponse(prompt=prompt)
     except Exception as e:
         import traceback
@@ -197,9 +432,77 @@ def refine_prompt(request: RefinePromptRequest):
         print(f"Prompt refinement failed: {e}\n{tb}")
         raise HTTPException(status_code=500, detail=f"Prompt refinement failed: {str(e)}\n{tb}")
 
+@app.post("/refine_prompt/stream")
+async def refine_prompt_stream(request: RefinePromptRequest):
+    """
+    Stream the multi-agent refinement as newline-delimited JSON events.
+    Emits stage_start/stage_done events for each agent, token events for the
+    Final Prompt Crafter output, then a final done event with the full prompt.
+    Args:
+        request (RefinePromptRequest): The user's rough idea.
+    Returns:
+        StreamingResponse: application/x-ndjson stream of progress events.
+    """
+    async def event_stream():
+        try:
+            async for event in orchestrator.astream_refine_prompt(request.user_idea):
+                yield json.dumps(event) + "\n"
+        except Exception as e:
+            # Reason: headers are already sent, so failures are reported in-band.
+            logger.exception("Prompt refinement stream failed: %s", e)
+            yield json.dumps({"event": "error", "detail": f"Prompt refinement failed: {str(e)}"}) + "\n"
+
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
+@app.post("/refine_prompt/batch", response_model=BatchRefinePromptResponse)
+async def refine_prompt_batch(request: BatchRefinePromptRequest):
+    """
+    Refine many ideas in one call with bounded concurrency and a shared LLM cache.
+    Args:
+        request (BatchRefinePromptRequest): The ideas, concurrency limit and response mode.
+    Returns:
+        BatchRefinePromptResponse: Results in input order, or, when stream is true, an
+        application/x-ndjson stream of results in completion order.
+    """
+    if request.stream:
+        async def result_stream():
+            async for result in orchestrator.aiter_refine_batch(request.user_ideas, request.max_concurrency):
+                yield json.dumps(result) + "\n"
+
+        return StreamingResponse(result_stream(), media_type="application/x-ndjson")
+    results = await orchestrator.arefine_batch(request.user_ideas, request.max_concurrency)
+    return BatchRefinePromptResponse(results=results)
+
+@app.get("/metrics/llm_cache")
+def llm_cache_metrics():
+    """
+    Report hit/miss counters for the orchestrator's LLM response cache.
+    Returns:
+        dict: Cache statistics (hits, disk_hits, misses, hit_rate, memory_entries).
+    """
+    return orchestrator.llm_cache.stats()
+
+@app.get("/metrics/query_cache")
+def query_cache_metrics():
+    """
+    Report hit rate, invalidations and staleness of the read_rows query cache.
+    Returns:
+        dict: Cache statistics (hits, coalesced, misses, hit_rate, invalidations, entries, ttl, avg_hit_age, max_hit_age).
+    """
+    return query_cache.stats()
+
+@app.get("/metrics/token_usage")
+def token_usage_metrics():
+    """
+    Report per-stage token usage before and after context budgeting.
+    Returns:
+        dict: Per stage: calls, original_tokens, sent_tokens and saved_tokens.
+    """
+    return orchestrator.token_stats.snapshot()
+
 # --- AGNO MULTI-AGENT ENDPOINT ---
 @app.post("/refine_prompt_agno", response_model=RefinePromptResponse)
-def refine_prompt_agno(request: RefinePromptRequest):
+async def refine_prompt_agno(request: RefinePromptRequest):
     """
     Refine a rough user idea into a production-ready prompt using Agno's official multi-agent abstractions.
     Args:
@@ -207,5 +510,5 @@ def refine_prompt_agno(request: RefinePromptRequest):
     Returns:
         RefinePromptResponse: The final, production-ready prompt.
     """
-    prompt = agno_orchestrator.refine_prompt(request.user_idea)
+    prompt = await agno_orchestrator.arefine_prompt(request.user_idea)
     return RefinePromptResponse(prompt=prompt)
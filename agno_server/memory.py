@@ -22,17 +22,54 @@ Requirements:
    - query_entries(agent: Optional[AgentRole], type: Optional[str], tags: Optional[List[str]]) -> List[MemoryEntry]
    - update_entry(entry_id: str, data: dict) -> bool
    - delete_entry(entry_id: str) -> bool
-3. Thread-safe, in-memory implementation for MVP (can be swapped for DB later).
+   - Bulk forms add_entries / get_entries / delete_entries / upsert_entries take the lock once,
+     update indexes in one pass and issue a single backend write per call.
+3. Thread-safe, in-memory implementation for MVP (can be swapped for DB later). Writes serialize on one
+   lock. Reads never hold it for more than copying candidate id sets: get_entry/get_entries take no lock,
+   and query_entries copies its index lookups under the lock, then filters, orders and materializes
+   without it, so a long query does not block add_entry. Reads record LRU use in a buffer that the
+   next write applies.
 4. Pydantic for data validation. Use UTC timestamps.
 5. Agents access shared memory via MemoryStore interface.
+6. query_entries is answered from secondary indexes (agent, type, tag -> ids; see secondary_index.py)
+   combined by set intersection; results keep insertion order.
+7. Optional persistence: with a MemoryBackend (e.g. LogBackend from memory_backend.py), long_term
+   entries are written through on every change and reloaded on startup; short_term entries stay in memory.
+8. Bounded short_term memory:
+   - Entries may carry a conversation_id; query_entries(conversation_id=...) and clear_conversation()
+     scope short_term memory to one conversation.
+   - Each short_term entry expires short_term_ttl seconds after its last write (per-entry override via
+     add_entry(ttl=...)); deadlines live in a min-heap and are reaped on writes or via expire().
+   - The estimated size of all short_term entries is capped at short_term_max_bytes; the least recently
+     used entries (reads and writes both count as use) are evicted first.
+9. Entries are held internally as compact __slots__ records (binary ids, epoch-microsecond timestamps,
+   interned tags; see compact.py). get_entry/query_entries materialize a fresh MemoryEntry per call, with
+   deep-copied data and metadata, so mutating a returned entry does not change the store; use update_entry
+   or add_entry instead.
 """
 
-from typing import Optional, List, Dict, Any
+import copy
+import heapq
+import json
+import time
+from collections import OrderedDict, deque
+from itertools import count
+from typing import Callable, Optional, List, Dict, Any, Tuple
 from datetime import datetime
 from uuid import uuid4
 from pydantic import BaseModel, Field
 from threading import Lock
 from .communication import AgentRole
+from .secondary_index import SecondaryIndex, intersect
+from .memory_backend import MemoryBackend
+from .compact import (
+    RecordKey, decode_id, encode_id, from_epoch_us, intern_optional, intern_tags, to_epoch_us,
+)
+
+LONG_TERM = "long_term"
+SHORT_TERM = "short_term"
+# Reason: bounds the read-use buffer when no write drains it; dropping the oldest uses only blurs LRU order.
+TOUCH_BUFFER_SIZE = 65536
 
 class MemoryEntry(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid4()))
@@ -43,48 +80,461 @@ class MemoryEntry(BaseModel):
     updated_at: datetime = Field(default_factory=lambda: datetime.utcnow())
     tags: Optional[List[str]] = None
     metadata: Optional[Dict[str, Any]] = None
+    conversation_id: Optional[str] = None
+
+class _MemoryRecord:
+    """
+    Compact internal form of a MemoryEntry.
+    """
+    __slots__ = ("key", "agent", "type", "data", "created_at", "updated_at", "tags", "metadata", "conversation_id", "ttl")
+
+    def __init__(self, key, agent, type, data, created_at, updated_at, tags, metadata, conversation_id, ttl=None):
+        self.key: RecordKey = key
+        self.agent: AgentRole = agent
+        self.type: str = type
+        self.data: Dict[str, Any] = data
+        self.created_at: int = created_at
+        self.updated_at: int = updated_at
+        self.tags: Optional[Tuple[str, ...]] = tags
+        self.metadata: Optional[Dict[str, Any]] = metadata
+        self.conversation_id: Optional[str] = conversation_id
+        # Reason: per-entry short_term TTL override from add_entry(ttl=...); None means the store default.
+        self.ttl: Optional[float] = ttl
+
+    @classmethod
+    def from_entry(cls, entry: MemoryEntry) -> "_MemoryRecord":
+        return cls(
+            encode_id(entry.id),
+            AgentRole(entry.agent),
+            intern_optional(entry.type),
+            entry.data,
+            to_epoch_us(entry.created_at),
+            to_epoch_us(entry.updated_at),
+            intern_tags(entry.tags),
+            entry.metadata,
+            intern_optional(entry.conversation_id),
+        )
+
+    def to_entry(self) -> MemoryEntry:
+        # Reason: the entry was validated when it entered the store; model_construct skips re-validation.
+        # The mutable payloads are deep-copied so callers mutating the result cannot change the store.
+        return MemoryEntry.model_construct(
+            id=decode_id(self.key),
+            agent=self.agent,
+            type=self.type,
+            data=copy.deepcopy(self.data),
+            created_at=from_epoch_us(self.created_at),
+            updated_at=from_epoch_us(self.updated_at),
+            tags=list(self.tags) if self.tags is not None else None,
+            metadata=copy.deepcopy(self.metadata),
+            conversation_id=self.conversation_id,
+        )
+
+    @classmethod
+    def from_dict(cls, record: Dict[str, Any]) -> "_MemoryRecord":
+        created_at, updated_at = record["created_at"], record["updated_at"]
+        # Reason: snapshots written before compact records stored ISO-8601 strings.
+        if isinstance(created_at, str):
+            created_at = to_epoch_us(datetime.fromisoformat(created_at))
+            updated_at = to_epoch_us(datetime.fromisoformat(updated_at))
+        return cls(
+            encode_id(record["id"]),
+            AgentRole(record["agent"]),
+            intern_optional(record["type"]),
+            record["data"],
+            created_at,
+            updated_at,
+            intern_tags(record.get("tags")),
+            record.get("metadata"),
+            intern_optional(record.get("conversation_id")),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": decode_id(self.key),
+            "agent": self.agent.value,
+            "type": self.type,
+            "data": self.data,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "tags": list(self.tags) if self.tags is not None else None,
+            "metadata": self.metadata,
+            "conversation_id": self.conversation_id,
+        }
+
+def _estimate_bytes(record: _MemoryRecord) -> int:
+    # Reason: the serialized size is a cheap, stable proxy for the entry's memory footprint.
+    return len(json.dumps(record.to_dict(), default=str))
 
 class MemoryStore:
     """
     Thread-safe in-memory store for MemoryEntry objects.
+    Args:
+        backend (MemoryBackend, optional): Persists long_term entries and reloads them on startup.
+        short_term_ttl (float, optional): Seconds a short_term entry lives after its last write; None disables expiry.
+        short_term_max_bytes (int, optional): Cap on the estimated size of all short_term entries; None disables it.
+        clock (Callable[[], float]): Monotonic time source (injectable for tests).
     """
-    def __init__(self):
-        self._store: Dict[str, MemoryEntry] = {}
+    def __init__(
+        self,
+        backend: Optional[MemoryBackend] = None,
+        short_term_ttl: Optional[float] = 3600.0,
+        short_term_max_bytes: Optional[int] = 64 * 1024 * 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._store: Dict[RecordKey, _MemoryRecord] = {}
+        self._order: Dict[RecordKey, int] = {}
+        self._next_order = 0
+        self._by_agent = SecondaryIndex()
+        self._by_type = SecondaryIndex()
+        self._by_tag = SecondaryIndex()
+        self._by_conversation = SecondaryIndex()
         self._lock = Lock()
+        self._backend = backend
+        self.short_term_ttl = short_term_ttl
+        self.short_term_max_bytes = short_term_max_bytes
+        self._clock = clock
+        self._deadlines: Dict[RecordKey, float] = {}
+        self._expiry_heap: List[Tuple[float, int, RecordKey]] = []
+        self._heap_seq = count()
+        self._short_term_lru: "OrderedDict[RecordKey, int]" = OrderedDict()
+        self._short_term_bytes = 0
+        self._touched: "deque[RecordKey]" = deque(maxlen=TOUCH_BUFFER_SIZE)
+        if backend is not None:
+            self._load(backend.load().values())
+
+    def _index(self, record: _MemoryRecord) -> None:
+        self._by_agent.add(record.key, [record.agent])
+        self._by_type.add(record.key, [record.type])
+        self._by_tag.add(record.key, record.tags)
+        if record.conversation_id is not None:
+            self._by_conversation.add(record.key, [record.conversation_id])
+
+    def _unindex(self, record: _MemoryRecord) -> None:
+        self._by_agent.remove(record.key, [record.agent])
+        self._by_type.remove(record.key, [record.type])
+        self._by_tag.remove(record.key, record.tags)
+        if record.conversation_id is not None:
+            self._by_conversation.remove(record.key, [record.conversation_id])
+
+    def _insert(self, record: _MemoryRecord, ttl: Optional[float] = None) -> Optional[_MemoryRecord]:
+        key = record.key
+        previous = self._store.get(key)
+        if previous is not None:
+            self._unindex(previous)
+            self._untrack(key)
+        else:
+            self._order[key] = self._next_order
+            self._next_order += 1
+        self._store[key] = record
+        self._index(record)
+        if record.type == SHORT_TERM:
+            record.ttl = ttl
+            self._track(record)
+        return previous
+
+    def _remove(self, key: RecordKey) -> Optional[_MemoryRecord]:
+        record = self._store.pop(key, None)
+        if record is not None:
+            self._unindex(record)
+            self._untrack(key)
+            del self._order[key]
+        return record
+
+    def _track(self, record: _MemoryRecord) -> None:
+        ttl = self.short_term_ttl if record.ttl is None else record.ttl
+        if ttl is not None:
+            deadline = self._clock() + ttl
+            self._deadlines[record.key] = deadline
+            # Reason: the sequence number breaks deadline ties, since bytes and str keys are not orderable.
+            heapq.heappush(self._expiry_heap, (deadline, next(self._heap_seq), record.key))
+        size = _estimate_bytes(record)
+        self._short_term_lru[record.key] = size
+        self._short_term_bytes += size
+
+    def _untrack(self, key: RecordKey) -> None:
+        # Reason: the heap item is left behind and skipped when popped, since its deadline no longer matches.
+        self._deadlines.pop(key, None)
+        size = self._short_term_lru.pop(key, None)
+        if size is not None:
+            self._short_term_bytes -= size
+
+    def _is_live(self, key: RecordKey, now: float) -> bool:
+        deadline = self._deadlines.get(key)
+        return deadline is None or deadline > now
+
+    def _expire(self) -> int:
+        now = self._clock()
+        heap = self._expiry_heap
+        removed = 0
+        while heap and heap[0][0] <= now:
+            deadline, _, key = heapq.heappop(heap)
+            if self._deadlines.get(key) == deadline:
+                self._remove(key)
+                removed += 1
+        # Reason: rebuild when stale heap items (from rewrites/deletes) dominate, so the heap stays bounded too.
+        if len(heap) > 2 * len(self._deadlines) + 64:
+            self._expiry_heap = [(d, next(self._heap_seq), key) for key, d in self._deadlines.items()]
+            heapq.heapify(self._expiry_heap)
+        return removed
+
+    def _evict(self) -> None:
+        if self.short_term_max_bytes is None:
+            return
+        while self._short_term_bytes > self.short_term_max_bytes and self._short_term_lru:
+            self._remove(next(iter(self._short_term_lru)))
+
+    def _touch(self, keys: List[RecordKey]) -> None:
+        # Reason: reads run without the store lock, so they only queue their keys (deque.extend is atomic);
+        # writers replay the queue into the LRU under the lock before they can evict.
+        self._touched.extend(keys)
+
+    def _apply_touches(self) -> None:
+        lru, touched = self._short_term_lru, self._touched
+        while touched:
+            key = touched.popleft()
+            if key in lru:
+                lru.move_to_end(key)
 
-    def add_entry(self, entry: MemoryEntry) -> str:
+    def _load(self, records) -> None:
+        # Reason: bulk path for startup; ids are unique, so skip _insert's replace handling.
+        store, order = self._store, self._order
+        for raw in records:
+            record = _MemoryRecord.from_dict(raw)
+            store[record.key] = record
+            order[record.key] = self._next_order
+            self._next_order += 1
+            self._index(record)
+
+    def _maybe_compact(self) -> None:
+        if self._backend.should_compact(self._by_type.count(LONG_TERM)):
+            self._compact()
+
+    def _compact(self) -> None:
+        keys = sorted(self._by_type.lookup([LONG_TERM]), key=self._order.__getitem__)
+        self._backend.compact(self._store[key].to_dict() for key in keys)
+
+    def _write_records(self, records: List[_MemoryRecord], ttl: Optional[float], upsert: bool) -> int:
+        """
+        Insert records under the held write lock and persist the net long_term changes in one write.
+        Returns:
+            int: Number of records that replaced an existing entry.
+        """
+        self._apply_touches()
+        self._expire()
+        was_long_term: Dict[RecordKey, bool] = {}
+        replaced = 0
+        now = to_epoch_us(datetime.utcnow()) if upsert else None
+        for record in records:
+            previous = self._store.get(record.key)
+            if previous is not None:
+                replaced += 1
+                if upsert:
+                    record.created_at = previous.created_at
+                    record.updated_at = now
+            was_long_term.setdefault(record.key, previous is not None and previous.type == LONG_TERM)
+            self._insert(record, ttl)
+        self._evict()
+        if self._backend is not None:
+            # Reason: persist each key's final state once, so repeated ids in a batch cost a single line.
+            puts, deletes = [], []
+            for key, persisted in was_long_term.items():
+                current = self._store.get(key)
+                if current is not None and current.type == LONG_TERM:
+                    puts.append(current.to_dict())
+                elif persisted:
+                    deletes.append(decode_id(key))
+            if puts:
+                self._backend.put(puts)
+            if deletes:
+                self._backend.delete(deletes)
+            self._maybe_compact()
+        return replaced
+
+    def add_entry(self, entry: MemoryEntry, ttl: Optional[float] = None) -> str:
+        record = _MemoryRecord.from_entry(entry)
         with self._lock:
-            self._store[entry.id] = entry
+            self._write_records([record], ttl, upsert=False)
             return entry.id
 
-    def get_entry(self, entry_id: str) -> Optional[MemoryEntry]:
+    def add_entries(self, entries: List[MemoryEntry], ttl: Optional[float] = None) -> List[str]:
+        """
+        Add (or replace) many entries under a single lock acquisition and backend write.
+        Args:
+            entries (List[MemoryEntry]): Entries to store.
+            ttl (float, optional): TTL override applied to the short_term entries.
+        Returns:
+            List[str]: Entry ids, in input order.
+        """
+        records = [_MemoryRecord.from_entry(entry) for entry in entries]
         with self._lock:
-            return self._store.get(entry_id)
+            self._write_records(records, ttl, upsert=False)
+        return [entry.id for entry in entries]
+
+    def upsert_entries(self, entries: List[MemoryEntry], ttl: Optional[float] = None) -> Dict[str, int]:
+        """
+        Insert new entries and overwrite existing ones, keeping each existing entry's created_at
+        and position and stamping updated_at with the current time.
+        Args:
+            entries (List[MemoryEntry]): Entries to insert or update.
+            ttl (float, optional): TTL override applied to the short_term entries.
+        Returns:
+            Dict[str, int]: Counts of "inserted" and "updated" entries.
+        """
+        records = [_MemoryRecord.from_entry(entry) for entry in entries]
+        with self._lock:
+            updated = self._write_records(records, ttl, upsert=True)
+        return {"inserted": len(records) - updated, "updated": updated}
+
+    def get_entry(self, entry_id: str) -> Optional[MemoryEntry]:
+        key = encode_id(entry_id)
+        # Reason: a single dict lookup is atomic, so point reads skip the store lock entirely.
+        record = self._store.get(key)
+        if record is None or not self._is_live(key, self._clock()):
+            return None
+        self._touch([key])
+        return record.to_entry()
+
+    def get_entries(self, entry_ids: List[str]) -> List[Optional[MemoryEntry]]:
+        """
+        Fetch many entries without taking the store lock.
+        Args:
+            entry_ids (List[str]): Entry ids.
+        Returns:
+            List[Optional[MemoryEntry]]: Entries aligned with entry_ids; None where missing or expired.
+        """
+        now = self._clock()
+        records = []
+        for entry_id in entry_ids:
+            key = encode_id(entry_id)
+            record = self._store.get(key)
+            records.append(record if record is not None and self._is_live(key, now) else None)
+        self._touch([record.key for record in records if record is not None])
+        return [record.to_entry() if record is not None else None for record in records]
 
-    def query_entries(self, agent: Optional[AgentRole] = None, type: Optional[str] = None, tags: Optional[List[str]] = None) -> List[MemoryEntry]:
+    def query_entries(
+        self,
+        agent: Optional[AgentRole] = None,
+        type: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        conversation_id: Optional[str] = None,
+    ) -> List[MemoryEntry]:
         with self._lock:
-            results = list(self._store.values())
+            # Reason: only the index lookups run under the lock; they are C-level set copies, so a writer
+            # waits for at most that, never for the per-entry work below.
+            candidate_sets = []
             if agent:
-                results = [e for e in results if e.agent == agent]
+                candidate_sets.append(self._by_agent.lookup([agent]))
             if type:
-                results = [e for e in results if e.type == type]
+                candidate_sets.append(self._by_type.lookup([type]))
             if tags:
-                results = [e for e in results if e.tags and any(tag in e.tags for tag in tags)]
-            return results
+                candidate_sets.append(self._by_tag.lookup(tags))
+            if conversation_id is not None:
+                candidate_sets.append(self._by_conversation.lookup([conversation_id]))
+            keys = intersect(candidate_sets) if candidate_sets else list(self._store)
+        store, order = self._store, self._order
+        now = self._clock()
+        hits = []
+        for key in keys:
+            # Reason: an entry removed after the lookup above is skipped rather than returned stale.
+            record = store.get(key)
+            position = order.get(key)
+            if record is not None and position is not None and self._is_live(key, now):
+                hits.append((position, record))
+        hits.sort(key=lambda hit: hit[0])
+        self._touch([record.key for _, record in hits])
+        return [record.to_entry() for _, record in hits]
 
     def update_entry(self, entry_id: str, data: Dict[str, Any]) -> bool:
+        key = encode_id(entry_id)
         with self._lock:
-            entry = self._store.get(entry_id)
-            if not entry:
+            self._apply_touches()
+            self._expire()
+            record = self._store.get(key)
+            if not record:
                 return False
-            entry.data = data
-            entry.updated_at = datetime.utcnow()
-            self._store[entry_id] = entry
+            record.data = data
+            record.updated_at = to_epoch_us(datetime.utcnow())
+            if record.type == SHORT_TERM:
+                # Reason: re-track so the new size is accounted and the TTL restarts from this write.
+                self._untrack(key)
+                self._track(record)
+                self._evict()
+            if self._backend is not None and record.type == LONG_TERM:
+                self._backend.put([record.to_dict()])
+                self._maybe_compact()
             return True
 
     def delete_entry(self, entry_id: str) -> bool:
         with self._lock:
-            if entry_id in self._store:
-                del self._store[entry_id]
+            record = self._remove(encode_id(entry_id))
+            if record is not None:
+                if self._backend is not None and record.type == LONG_TERM:
+                    self._backend.delete([entry_id])
+                    self._maybe_compact()
                 return True
             return False
+
+    def delete_entries(self, entry_ids: List[str]) -> int:
+        """
+        Delete many entries under a single lock acquisition and backend write.
+        Args:
+            entry_ids (List[str]): Entry ids; unknown ids are ignored.
+        Returns:
+            int: Number of entries deleted.
+        """
+        with self._lock:
+            removed = [self._remove(encode_id(entry_id)) for entry_id in entry_ids]
+            removed = [record for record in removed if record is not None]
+            if self._backend is not None:
+                deletes = [decode_id(record.key) for record in removed if record.type == LONG_TERM]
+                if deletes:
+                    self._backend.delete(deletes)
+                    self._maybe_compact()
+            return len(removed)
+
+    def clear_conversation(self, conversation_id: str) -> int:
+        """
+        Drop every short_term entry belonging to a conversation (e.g. when the session ends).
+        Args:
+            conversation_id (str): Conversation namespace to clear.
+        Returns:
+            int: Number of entries removed.
+        """
+        with self._lock:
+            keys = intersect([self._by_conversation.lookup([conversation_id]), self._by_type.lookup([SHORT_TERM])])
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def expire(self) -> int:
+        """
+        Remove short_term entries whose TTL has elapsed. Writes do this automatically;
+        call it periodically on servers that see long read-only stretches.
+        Returns:
+            int: Number of entries removed.
+        """
+        with self._lock:
+            return self._expire()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Memory usage counters.
+        Returns:
+            Dict[str, int]: entries, short_term_entries and short_term_bytes.
+        """
+        with self._lock:
+            return {
+                "entries": len(self._store),
+                "short_term_entries": len(self._short_term_lru),
+                "short_term_bytes": self._short_term_bytes,
+            }
+
+    def compact(self) -> None:
+        """
+        Rewrite the persistence backend so it holds only live long_term entries.
+        """
+        if self._backend is None:
+            return
+        with self._lock:
+            self._compact()
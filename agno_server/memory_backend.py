@@ -0,0 +1,199 @@
+"""
+memory_backend.py
+Pluggable persistence backends for MemoryStore long_term entries.
+
+Purpose:
+- Keep long_term memory across restarts behind the existing MemoryStore
+  add_entry/get_entry/query_entries interface.
+
+Design:
+1. MemoryBackend: load() every live record, put()/delete() batches of records, compact().
+   Records are plain JSON-compatible dicts; MemoryStore owns the conversion to MemoryEntry.
+2. LogBackend: an append-only JSONL operation log plus a compacted snapshot file.
+   - Writes append one line per record and flush once per batch (optional fsync).
+   - load() reads the snapshot, then replays the log. An unterminated final log line (a crash mid-append)
+     is truncated; a corrupt line anywhere else raises ValueError instead of silently dropping later ops.
+   - compact() atomically rewrites the snapshot from the live records and truncates the log.
+   - Single writer: a process only ever sees its own writes after load(), so one directory must not be
+     shared by several workers. The backend holds an exclusive flock on memory.lock while open and
+     refuses (RuntimeError) a directory another backend holds.
+"""
+
+import json
+import mmap
+import os
+try:
+    import fcntl
+except ImportError:  # Reason: flock is POSIX-only; elsewhere the single-writer rule is not enforced.
+    fcntl = None
+from abc import ABC, abstractmethod
+from threading import Lock
+from typing import Any, Dict, Iterable, Iterator, List
+
+
+class MemoryBackend(ABC):
+    """
+    Abstract persistence backend for MemoryStore records.
+    """
+    @abstractmethod
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Load every live record.
+        Returns:
+            Dict[str, Dict[str, Any]]: Records keyed by id, in original insertion order.
+        """
+        pass
+
+    @abstractmethod
+    def put(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Persist (insert or replace) a batch of records in a single write.
+        Args:
+            records (List[Dict[str, Any]]): Records with an "id" key.
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, ids: List[str]) -> None:
+        """
+        Persist the deletion of a batch of record ids in a single write.
+        Args:
+            ids (List[str]): Record ids to delete.
+        """
+        pass
+
+    def compact(self, records: Iterable[Dict[str, Any]]) -> None:
+        """
+        Rewrite storage so it holds only the given live records. Optional.
+        Args:
+            records (Iterable[Dict[str, Any]]): Every live record.
+        """
+        pass
+
+    def should_compact(self, live_count: int) -> bool:
+        """
+        Whether enough dead data has accumulated to make compact() worthwhile.
+        Args:
+            live_count (int): Number of live records.
+        Returns:
+            bool: True if the caller should compact now.
+        """
+        return False
+
+    def close(self) -> None:
+        pass
+
+
+class LogBackend(MemoryBackend):
+    """
+    Append-only log + compacted snapshot stored in a directory.
+    Args:
+        directory (str): Directory holding memory.snapshot and memory.log (created if missing).
+            Only one backend, in one process, may use a directory at a time.
+        fsync (bool): fsync after every batch for durability against power loss.
+        compact_min_ops (int): Minimum logged operations before should_compact() can trigger.
+    """
+    SNAPSHOT_NAME = "memory.snapshot"
+    LOG_NAME = "memory.log"
+    LOCK_NAME = "memory.lock"
+
+    def __init__(self, directory: str, fsync: bool = False, compact_min_ops: int = 10000):
+        os.makedirs(directory, exist_ok=True)
+        self._dir_lock = self._lock_directory(os.path.join(directory, self.LOCK_NAME))
+        self.snapshot_path = os.path.join(directory, self.SNAPSHOT_NAME)
+        self.log_path = os.path.join(directory, self.LOG_NAME)
+        self.fsync = fsync
+        self.compact_min_ops = compact_min_ops
+        self._log_ops = 0
+        self._lock = Lock()
+        self._log = open(self.log_path, "ab")
+
+    @staticmethod
+    def _lock_directory(path: str):
+        lock_file = open(path, "ab")
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                raise RuntimeError(f"{os.path.dirname(path)} is already in use by another LogBackend")
+        return lock_file
+
+    @staticmethod
+    def _iter_lines(path: str) -> Iterator[bytes]:
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for line in iter(mm.readline, b""):
+                yield line
+
+    def _load_snapshot(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.snapshot_path) or os.path.getsize(self.snapshot_path) == 0:
+            return []
+        with open(self.snapshot_path, "rb") as f:
+            body = f.read().rstrip(b"\n").replace(b"\n", b",")
+        # Reason: JSON strings never contain raw newlines, so the JSONL snapshot becomes one
+        # JSON array and is decoded in a single C-level json.loads call instead of one per line.
+        return json.loads(b"[" + body + b"]")
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        records: Dict[str, Dict[str, Any]] = {record["id"]: record for record in self._load_snapshot()}
+        log_ops = 0
+        valid_end = 0
+        for line in self._iter_lines(self.log_path):
+            if not line.endswith(b"\n"):
+                # Reason: only the last line can be unterminated; a crash mid-append left it torn, so drop it below.
+                break
+            try:
+                op = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"{self.log_path}: corrupt log entry at byte {valid_end}") from e
+            valid_end += len(line)
+            log_ops += 1
+            if op["op"] == "put":
+                records[op["record"]["id"]] = op["record"]
+            else:
+                records.pop(op["id"], None)
+        if os.path.getsize(self.log_path) > valid_end:
+            with self._lock:
+                self._log.truncate(valid_end)
+        self._log_ops = log_ops
+        return records
+
+    def _append(self, lines: List[str]) -> None:
+        if not lines:
+            return
+        with self._lock:
+            self._log.write("".join(lines).encode("utf-8"))
+            self._log.flush()
+            if self.fsync:
+                os.fsync(self._log.fileno())
+            self._log_ops += len(lines)
+
+    def put(self, records: List[Dict[str, Any]]) -> None:
+        self._append([json.dumps({"op": "put", "record": record}) + "\n" for record in records])
+
+    def delete(self, ids: List[str]) -> None:
+        self._append([json.dumps({"op": "del", "id": record_id}) + "\n" for record_id in ids])
+
+    def compact(self, records: Iterable[Dict[str, Any]]) -> None:
+        tmp_path = self.snapshot_path + ".tmp"
+        with self._lock:
+            with open(tmp_path, "wb") as f:
+                for record in records:
+                    f.write((json.dumps(record) + "\n").encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            # Reason: the snapshot now holds every live record, so the log can restart empty.
+            self._log.close()
+            self._log = open(self.log_path, "wb")
+            self._log_ops = 0
+
+    def should_compact(self, live_count: int) -> bool:
+        return self._log_ops >= max(self.compact_min_ops, live_count)
+
+    def close(self) -> None:
+        with self._lock:
+            self._log.close()
+            self._dir_lock.close()
@@ -1,4 +1,10 @@
-from typing import Any, Dict
+import asyncio
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional
+from agno_server.llm import GeminiLLM
+from agno_server.llm_cache import LLMCache
+from agno_server.pipeline import Pipeline, Stage, iter_sections
+from agno_server.context_budget import ContextBudget, TokenUsageStats
 from agno_server.agents.team_lead import TeamLeadAgent
 from agno_server.agents.internet_researcher import InternetResearcherAgent
 from agno_server.agents.info_tagger import InfoTaggerAgent
@@ -8,13 +14,31 @@ from agno_server.agents.final_prompt_crafter import FinalPromptCrafterAgent
 class AgnoOrchestrator:
     """
     Orchestrates the multi-agent prompt refinement workflow.
+    Args:
+        llm_cache (LLMCache, optional): Response cache shared by every agent's LLM.
+            Defaults to an in-memory cache, backed by SQLite when LLM_CACHE_PATH is set.
+        incremental_handoff (bool, optional): Stream research output into the Info Tagger, which
+            tags complete sections while the researcher is still writing. Defaults to the
+            INCREMENTAL_HANDOFF environment variable ("1"/"true"/"yes"), otherwise off.
+        handoff_min_chars (int, optional): Minimum section batch size handed to the tagger.
+            Defaults to HANDOFF_MIN_CHARS, otherwise 1500.
+        stage_budgets (Dict[str, int], optional): Token budget per stage ("tagging", "prd", "final_prompt");
+            inputs are deduplicated and compacted to fit before each LLM call.
     """
-    def __init__(self):
+    def __init__(self, llm_cache: Optional[LLMCache] = None, incremental_handoff: Optional[bool] = None, handoff_min_chars: Optional[int] = None, stage_budgets: Optional[Dict[str, int]] = None):
+        self.llm_cache = llm_cache or LLMCache(db_path=os.getenv("LLM_CACHE_PATH"))
+        if incremental_handoff is None:
+            incremental_handoff = os.getenv("INCREMENTAL_HANDOFF", "").strip().lower() in ("1", "true", "yes")
+        self.incremental_handoff = incremental_handoff
+        self.handoff_min_chars = handoff_min_chars or int(os.getenv("HANDOFF_MIN_CHARS") or 1500)
+        self.stage_budgets = stage_budgets
+        self.token_stats = TokenUsageStats()
+        llm = GeminiLLM(cache=self.llm_cache)
         self.team_lead = TeamLeadAgent("Team Lead")
-        self.researcher = InternetResearcherAgent("Internet Researcher")
-        self.tagger = InfoTaggerAgent("Info Tagger")
-        self.prd_writer = PRDWriterAgent("PRD Writer")
-        self.prompt_crafter = FinalPromptCrafterAgent("Final Prompt Crafter")
+        self.researcher = InternetResearcherAgent("Internet Researcher", llm=llm)
+        self.tagger = InfoTaggerAgent("Info Tagger", llm=llm)
+        self.prd_writer = PRDWriterAgent("PRD Writer", llm=llm)
+        self.prompt_crafter = FinalPromptCrafterAgent("Final Prompt Crafter", llm=llm)
 
     def refine_prompt(self, user_idea: str) -> str:
         """
@@ -24,16 +48,171 @@ class AgnoOrchestrator:
         Returns:
             str: The final, production-ready prompt.
         """
+        budget = self.new_budget()
         # Step 1: Team Lead clarifies and delegates
         context = {"user_idea": user_idea}
         # Step 2: Researcher fetches and summarizes external info
         context["search_results"] = self.researcher.act(context)
         # Step 3: Info Tagger organizes and tags info
-        context["raw_data"] = context["search_results"]
-        context["structured_info"] = self.tagger.act(context)
+        context["structured_info"] = self.tagger.act(self.tagging_context(context, budget))
         # Step 4: PRD Writer drafts requirements
-        context["prd"] = self.prd_writer.act(context)
+        context["prd"] = self.prd_writer.act(self.prd_context(context, budget))
         # Step 5: Final Prompt Crafter synthesizes everything
-        context["agent_outputs"] = f"Research: {context['search_results']}\nTags: {context['structured_info']}"
-        final_prompt = self.prompt_crafter.act(context)
+        final_prompt = self.prompt_crafter.act(self.craft_context(context, budget))
         return final_prompt
+
+    def new_budget(self) -> ContextBudget:
+        """
+        Create the per-refinement token budget, reporting into this orchestrator's token_stats.
+        Returns:
+            ContextBudget: Fresh budget for one refinement run.
+        """
+        return ContextBudget(self.stage_budgets, stats=self.token_stats)
+
+    @staticmethod
+    def tagging_context(ctx: Dict[str, Any], budget: ContextBudget) -> Dict[str, Any]:
+        """Info Tagger input: the research text, fitted to the "tagging" budget."""
+        fitted = budget.fit("tagging", {"raw_data": ctx["search_results"]})
+        return dict(ctx, raw_data=fitted["raw_data"])
+
+    @staticmethod
+    def prd_context(ctx: Dict[str, Any], budget: ContextBudget) -> Dict[str, Any]:
+        """PRD Writer input: the tagged info, fitted to the "prd" budget."""
+        return dict(ctx, **budget.fit("prd", {"structured_info": ctx["structured_info"]}))
+
+    @staticmethod
+    def craft_context(ctx: Dict[str, Any], budget: ContextBudget) -> Dict[str, Any]:
+        """Final Prompt Crafter input: PRD, tags and research deduplicated against each other and fitted to the "final_prompt" budget."""
+        # Reason: the tags are derived from the research, so research paragraphs the PRD or tags already
+        # carry are dropped instead of sending the same text to the crafter twice.
+        fitted = budget.fit("final_prompt", {"prd": ctx["prd"], "structured_info": ctx["structured_info"], "search_results": ctx["search_results"]})
+        agent_outputs = f"Research: {fitted['search_results']}\nTags: {fitted['structured_info']}"
+        return dict(ctx, prd=fitted["prd"], agent_outputs=agent_outputs)
+
+    def build_pipeline(self, stream: bool = False, budget: Optional[ContextBudget] = None) -> Pipeline:
+        """
+        Declare the workflow as stages wired by their context inputs. Stages with
+        disjoint inputs run concurrently; extra stages can be appended to fan out.
+        Args:
+            stream (bool): Whether the Final Prompt Crafter stage streams token chunks.
+            budget (ContextBudget, optional): Token budget for this run; a fresh one is created if omitted.
+        Returns:
+            Pipeline: The refinement workflow DAG.
+        """
+        budget = budget or self.new_budget()
+
+        def craft_context(ctx: Dict[str, Any]) -> Dict[str, Any]:
+            return self.craft_context(ctx, budget)
+
+        if stream:
+            final_stage = Stage("final_prompt", lambda ctx: self.prompt_crafter.astream(craft_context(ctx)), inputs=["prd", "search_results", "structured_info"], stream=True)
+        else:
+            final_stage = Stage("final_prompt", lambda ctx: self.prompt_crafter.aact(craft_context(ctx)), inputs=["prd", "search_results", "structured_info"])
+        if self.incremental_handoff:
+            research_stage = Stage("research", lambda ctx: self.researcher.astream(ctx), inputs=["user_idea"], output="search_results", stream=True, partial_output="search_results_stream")
+            # Reason: the tagging budget applies per section here, so both modes send the tagger the same amount of context.
+            tagging_stage = Stage("tagging", lambda ctx: self.tagger.aact_incremental(budget.fit_stream("tagging", iter_sections(ctx["search_results_stream"], self.handoff_min_chars))), inputs=["search_results_stream"], output="structured_info")
+        else:
+            research_stage = Stage("research", lambda ctx: self.researcher.aact(ctx), inputs=["user_idea"], output="search_results")
+            tagging_stage = Stage("tagging", lambda ctx: self.tagger.aact(self.tagging_context(ctx, budget)), inputs=["search_results"], output="structured_info")
+        return Pipeline([
+            research_stage,
+            tagging_stage,
+            Stage("prd", lambda ctx: self.prd_writer.aact(self.prd_context(ctx, budget)), inputs=["structured_info"]),
+            final_stage,
+        ])
+
+    async def arefine_prompt(self, user_idea: str) -> str:
+        """
+        Async variant of refine_prompt. Stages run through the pipeline DAG, so
+        a single event loop can hold many refinements in flight.
+        Args:
+            user_idea (str): The rough user idea or request.
+        Returns:
+            str: The final, production-ready prompt.
+        """
+        context = await self.build_pipeline().run({"user_idea": user_idea})
+        return context["final_prompt"]
+
+    async def astream_refine_prompt(self, user_idea: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Runs the workflow like arefine_prompt, yielding progress events as it goes.
+        Events are dicts with an "event" key:
+        - stage_start: {"stage"}
+        - stage_done: {"stage", "output"} (output omitted for the streamed final stage)
+        - token: {"stage", "text"} for each Final Prompt Crafter chunk
+        - done: {"prompt"} with the full final prompt
+        Args:
+            user_idea (str): The rough user idea or request.
+        Yields:
+            Dict[str, Any]: Progress events in the order stages start and finish.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        finished = object()
+
+        async def run() -> Dict[str, Any]:
+            try:
+                return await self.build_pipeline(stream=True).run({"user_idea": user_idea}, on_event=queue.put)
+            finally:
+                await queue.put(finished)
+
+        task = asyncio.ensure_future(run())
+        try:
+            while True:
+                event = await queue.get()
+                if event is finished:
+                    break
+                yield event
+            context = await task
+        finally:
+            # Reason: a disconnected client closes this generator; stop the pipeline too.
+            task.cancel()
+        yield {"event": "done", "prompt": context["final_prompt"]}
+
+    async def aiter_refine_batch(self, user_ideas: List[str], max_concurrency: int = 4) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Refine many ideas with bounded concurrency, yielding results as they finish.
+        Identical ideas are refined once and fanned out to every index that asked for them.
+        A failing idea yields an error result instead of aborting the batch.
+        Args:
+            user_ideas (List[str]): The rough ideas to refine.
+            max_concurrency (int): Maximum refinements in flight at once.
+        Yields:
+            Dict[str, Any]: {"index", "prompt"} on success or {"index", "error"} on failure.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        indexes_by_idea: Dict[str, List[int]] = {}
+        for index, user_idea in enumerate(user_ideas):
+            indexes_by_idea.setdefault(user_idea, []).append(index)
+
+        async def run(user_idea: str):
+            async with semaphore:
+                try:
+                    return user_idea, await self.arefine_prompt(user_idea), None
+                except Exception as e:
+                    return user_idea, None, e
+
+        tasks = [asyncio.ensure_future(run(user_idea)) for user_idea in indexes_by_idea]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                user_idea, prompt, error = await next_done
+                for index in indexes_by_idea[user_idea]:
+                    if error is None:
+                        yield {"index": index, "prompt": prompt}
+                    else:
+                        yield {"index": index, "error": str(error)}
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def arefine_batch(self, user_ideas: List[str], max_concurrency: int = 4) -> List[Dict[str, Any]]:
+        """
+        Refine many ideas with bounded concurrency and return results in input order.
+        Args:
+            user_ideas (List[str]): The rough ideas to refine.
+            max_concurrency (int): Maximum refinements in flight at once.
+        Returns:
+            List[Dict[str, Any]]: One result per idea, ordered by index (see aiter_refine_batch).
+        """
+        results = [result async for result in self.aiter_refine_batch(user_ideas, max_concurrency)]
+        return sorted(results, key=lambda result: result["index"])
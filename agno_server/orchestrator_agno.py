@@ -1,3 +1,4 @@
+import asyncio
 from agno_server.agents.info_tagger_agno import tag_info
 from agno_server.agents.internet_researcher_agno import research
 from agno_server.agents.prd_writer_agno import write_prd
@@ -25,3 +26,15 @@ class AgnoOrchestratorAgno:
         agent_outputs = f"Research: {search_results}\nTags: {structured_info}"
         final_prompt = craft_prompt(prd, agent_outputs)
         return final_prompt
+
+    async def arefine_prompt(self, user_idea: str) -> str:
+        """
+        Async entry point for the Agno workflow.
+        Args:
+            user_idea (str): The rough user idea or request.
+        Returns:
+            str: The final, production-ready prompt.
+        """
+        # Reason: the Agno helper functions are synchronous, so the whole run is
+        # moved off the event loop instead of blocking it.
+        return await asyncio.to_thread(self.refine_prompt, user_idea)
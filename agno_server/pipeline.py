@@ -0,0 +1,190 @@
+"""
+pipeline.py
+Dependency-driven stage executor for the Agno multi-agent workflow.
+
+Purpose:
+- Let each workflow stage declare which context keys it needs and which key it produces.
+- Run every stage as soon as its inputs exist, so independent stages execute concurrently
+  and wall-clock time follows the critical path instead of the sum of stage latencies.
+
+Design:
+1. Stage: name, async run(context) callable, input keys, output key, optional token streaming.
+2. Pipeline.run(context, on_event) schedules ready stages with asyncio and writes each result into context.
+3. Progress is reported through an optional on_event callback using the same event dicts
+   as AgnoOrchestrator.astream_refine_prompt (stage_start, stage_done, token).
+4. A failing stage cancels the stages still running and re-raises its exception.
+5. A streaming stage can publish a TextChannel under partial_output as soon as it starts, so
+   downstream stages consume its chunks (e.g. via iter_sections) before it finishes.
+"""
+
+import asyncio
+import inspect
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+EventCallback = Callable[[Dict[str, Any]], Any]
+
+
+class TextChannel:
+    """
+    Append-only buffer of text chunks that any number of readers can iterate while it fills.
+    Each reader sees every chunk from the beginning and finishes once the channel is closed.
+    """
+    def __init__(self):
+        self._chunks: List[str] = []
+        self._closed = False
+        self._changed = asyncio.Event()
+
+    def put(self, chunk: str) -> None:
+        self._chunks.append(chunk)
+        self._notify()
+
+    def close(self) -> None:
+        self._closed = True
+        self._notify()
+
+    def _notify(self) -> None:
+        # Reason: swap in a fresh Event so waiters wake once per change without clearing races.
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        position = 0
+        while True:
+            while position < len(self._chunks):
+                yield self._chunks[position]
+                position += 1
+            if self._closed:
+                return
+            await self._changed.wait()
+
+
+async def iter_sections(chunks: AsyncIterator[str], min_chars: int = 1500) -> AsyncIterator[str]:
+    """
+    Regroup a token stream into complete sections of at least min_chars characters.
+    A section ends at a blank line or before a markdown heading, so downstream agents
+    never receive a half-written paragraph.
+    Args:
+        chunks (AsyncIterator[str]): Upstream text chunks.
+        min_chars (int): Minimum section batch size before it is released.
+    Yields:
+        str: Complete section batches, followed by whatever remains at end of stream.
+    """
+    buffer = ""
+    async for chunk in chunks:
+        buffer += chunk
+        if len(buffer) < min_chars:
+            continue
+        cut = max(buffer.rfind("\n\n"), buffer.rfind("\n#"))
+        if cut >= min_chars:
+            section, buffer = buffer[:cut].strip(), buffer[cut:]
+            if section:
+                yield section
+    if buffer.strip():
+        yield buffer.strip()
+
+
+class Stage:
+    """
+    A single unit of pipeline work.
+    Args:
+        name (str): Stage name, used in progress events.
+        run (Callable): Called with the shared context. Returns an awaitable result, or an
+            async iterator of text chunks when stream is True.
+        inputs (List[str], optional): Context keys that must exist before the stage starts.
+        output (str, optional): Context key receiving the result. Defaults to name.
+        stream (bool): Whether run yields text chunks that are relayed as token events.
+        partial_output (str, optional): For streaming stages, context key that receives a
+            TextChannel of chunks as soon as the stage starts, for incremental handoff.
+    """
+    def __init__(self, name: str, run: Callable[[Dict[str, Any]], Any], inputs: Optional[List[str]] = None, output: Optional[str] = None, stream: bool = False, partial_output: Optional[str] = None):
+        if partial_output and not stream:
+            raise ValueError(f"Stage {name!r} can only publish partial_output when stream is True")
+        self.name = name
+        self.run = run
+        self.inputs = list(inputs or [])
+        self.output = output or name
+        self.stream = stream
+        self.partial_output = partial_output
+
+
+class Pipeline:
+    """
+    Executes a set of stages as a DAG over a shared context dict.
+    Args:
+        stages (List[Stage]): The stages to run. Output keys must be unique.
+    Raises:
+        ValueError: If two stages write the same output key.
+    """
+    def __init__(self, stages: List[Stage]):
+        outputs = [stage.output for stage in stages] + [stage.partial_output for stage in stages if stage.partial_output]
+        duplicates = {key for key in outputs if outputs.count(key) > 1}
+        if duplicates:
+            raise ValueError(f"Stages share output keys: {sorted(duplicates)}")
+        self.stages = list(stages)
+
+    async def run(self, context: Dict[str, Any], on_event: Optional[EventCallback] = None) -> Dict[str, Any]:
+        """
+        Run every stage once its inputs are available.
+        Args:
+            context (Dict[str, Any]): Initial context; updated in place with stage outputs.
+            on_event (Callable, optional): Receives progress event dicts; may be sync or async.
+        Returns:
+            Dict[str, Any]: The context, including every stage output.
+        Raises:
+            ValueError: If some stages can never start because their inputs are never produced.
+        """
+        async def emit(event: Dict[str, Any]) -> None:
+            if on_event is None:
+                return
+            result = on_event(event)
+            if inspect.isawaitable(result):
+                await result
+
+        pending = list(self.stages)
+        running: Dict[asyncio.Task, Stage] = {}
+        try:
+            while pending or running:
+                launched = True
+                while launched:
+                    launched = False
+                    ready = [stage for stage in pending if all(key in context for key in stage.inputs)]
+                    for stage in ready:
+                        pending.remove(stage)
+                        await emit({"event": "stage_start", "stage": stage.name})
+                        channel = None
+                        if stage.partial_output:
+                            # Reason: publishing the channel may unblock consumers right away.
+                            channel = context[stage.partial_output] = TextChannel()
+                            launched = True
+                        running[asyncio.ensure_future(self._run_stage(stage, context, emit, channel))] = stage
+                if not running:
+                    missing = {stage.name: [key for key in stage.inputs if key not in context] for stage in pending}
+                    raise ValueError(f"Pipeline stages have unsatisfiable inputs: {missing}")
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    stage = running.pop(task)
+                    result = task.result()
+                    context[stage.output] = result
+                    event = {"event": "stage_done", "stage": stage.name}
+                    if not stage.stream:
+                        event["output"] = result
+                    await emit(event)
+        finally:
+            for task in running:
+                task.cancel()
+        return context
+
+    async def _run_stage(self, stage: Stage, context: Dict[str, Any], emit: Callable[[Dict[str, Any]], Awaitable[None]], channel: Optional[TextChannel] = None) -> Any:
+        if not stage.stream:
+            return await stage.run(context)
+        chunks = []
+        try:
+            async for chunk in stage.run(context):
+                chunks.append(chunk)
+                if channel is not None:
+                    channel.put(chunk)
+                await emit({"event": "token", "stage": stage.name, "text": chunk})
+        finally:
+            if channel is not None:
+                channel.close()
+        return "".join(chunks)
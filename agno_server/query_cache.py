@@ -0,0 +1,164 @@
+"""
+query_cache.py
+Read-through result cache for /tools/read_rows.
+
+Purpose:
+- Serve dashboards that poll the same table + filters + limit many times per second from memory,
+  so only one Supabase round trip per query is made per TTL window.
+
+Design:
+1. Keys are (table, canonical JSON of the query parameters), so equal queries match regardless of
+   filter order.
+2. Entries live for a short TTL in an LRU (OrderedDict) bounded by entry count.
+3. Identical concurrent misses share one in-flight fetch (a shielded asyncio task).
+4. Writes through this server call invalidate(table), which drops that table's entries and bumps its
+   generation; a fetch that started before the write is then not stored, so it cannot resurrect
+   pre-write rows.
+5. stats() reports hit rate and the age of the rows served from cache (staleness).
+"""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Awaitable, Callable, Dict, Set, Tuple
+
+QueryKey = Tuple[str, str]
+# Reason: whatever the fetch returns (db.QueryResult for read_rows); stored and shared as-is.
+Result = Any
+
+
+def make_query_key(table: str, **params: Any) -> QueryKey:
+    """
+    Build the normalized cache key for a read query.
+    Args:
+        table (str): Table name.
+        **params: Query parameters (filters, limit, ordering, cursor, ...).
+    Returns:
+        QueryKey: (table, canonical JSON of params).
+    """
+    return table, json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class QueryCache:
+    """
+    TTL + LRU cache of query results with per-table invalidation and in-flight coalescing.
+    Args:
+        ttl (float): Seconds a cached result is served.
+        max_entries (int): Maximum cached queries.
+        clock (Callable[[], float]): Monotonic time source (injectable for tests).
+    """
+    def __init__(self, ttl: float = 2.0, max_entries: int = 1024, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._items: "OrderedDict[QueryKey, Tuple[float, Result]]" = OrderedDict()
+        self._by_table: Dict[str, Set[QueryKey]] = {}
+        self._generations: Dict[str, int] = {}
+        self._in_flight: Dict[QueryKey, "asyncio.Task[Result]"] = {}
+        self._lock = Lock()
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._hit_age_total = 0.0
+        self._hit_age_max = 0.0
+
+    async def get_or_fetch(self, key: QueryKey, fetch: Callable[[], Awaitable[Result]]) -> Result:
+        """
+        Return a fresh cached result, join an identical in-flight fetch, or run fetch() once.
+        Args:
+            key (QueryKey): Key from make_query_key().
+            fetch (Callable[[], Awaitable[Result]]): Runs the query against Supabase.
+        Returns:
+            Result: Query result (shared; callers must not mutate it).
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                age = self.clock() - item[0]
+                if age < self.ttl:
+                    self._items.move_to_end(key)
+                    self.hits += 1
+                    self._hit_age_total += age
+                    self._hit_age_max = max(self._hit_age_max, age)
+                    return item[1]
+            task = self._in_flight.get(key)
+            if task is None or task.get_loop() is not loop:
+                task = self._in_flight[key] = loop.create_task(self._fill(key, fetch, self._generations.get(key[0], 0)))
+                # Reason: if every awaiting caller was cancelled, retrieve a fetch error here so asyncio does not
+                # log "Task exception was never retrieved".
+                task.add_done_callback(lambda done: done.cancelled() or done.exception())
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        # Reason: shield so one caller being cancelled does not cancel the fetch other callers await.
+        return await asyncio.shield(task)
+
+    async def _fill(self, key: QueryKey, fetch: Callable[[], Awaitable[Result]], generation: int) -> Result:
+        try:
+            result = await fetch()
+        finally:
+            with self._lock:
+                if self._in_flight.get(key) is asyncio.current_task():
+                    del self._in_flight[key]
+        with self._lock:
+            if self._generations.get(key[0], 0) == generation:
+                self._store(key, result)
+        return result
+
+    def _store(self, key: QueryKey, result: Result) -> None:
+        self._items[key] = (self.clock(), result)
+        self._items.move_to_end(key)
+        self._by_table.setdefault(key[0], set()).add(key)
+        while len(self._items) > self.max_entries:
+            evicted, _ = self._items.popitem(last=False)
+            self._by_table[evicted[0]].discard(evicted)
+
+    def invalidate(self, table: str) -> int:
+        """
+        Drop every cached query on a table after a write to it.
+        Args:
+            table (str): Table that was written.
+        Returns:
+            int: Number of entries dropped.
+        """
+        with self._lock:
+            self._generations[table] = self._generations.get(table, 0) + 1
+            # Reason: in-flight reads may already hold pre-write rows; new callers must not join them.
+            for key in [key for key in self._in_flight if key[0] == table]:
+                del self._in_flight[key]
+            keys = self._by_table.pop(table, set())
+            for key in keys:
+                self._items.pop(key, None)
+            self.invalidations += 1
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._by_table.clear()
+            self._in_flight.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report cache effectiveness and staleness.
+        Returns:
+            Dict[str, Any]: hits, coalesced, misses, hit_rate, invalidations, entries, ttl, and
+            avg_hit_age / max_hit_age (seconds between a result being fetched and being served from cache).
+        """
+        with self._lock:
+            lookups = self.hits + self.coalesced + self.misses
+            return {
+                "hits": self.hits,
+                "coalesced": self.coalesced,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "entries": len(self._items),
+                "ttl": self.ttl,
+                "avg_hit_age": self._hit_age_total / self.hits if self.hits else 0.0,
+                "max_hit_age": self._hit_age_max,
+            }
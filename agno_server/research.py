@@ -0,0 +1,130 @@
+"""
+research.py
+Search fan-out helpers for the Internet Researcher agent.
+
+Purpose:
+- Turn one user idea into a handful of web searches, merge their results locally and hand the LLM
+  a compact digest instead of asking it to research from the bare idea.
+
+Design:
+1. derive_queries(): the idea itself plus keyword-focused variants (best practices, architecture,
+   existing tools), built without an LLM round trip.
+2. rank_results(): dedupe by normalized URL and rank with reciprocal-rank fusion, so results that
+   several queries rank highly come first.
+3. build_digest(): numbered "title — url — snippet" lines, added best-first until the token budget
+   (see context_budget.estimate_tokens) is spent; long snippets are truncated.
+"""
+
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import urlsplit
+
+from .context_budget import estimate_tokens
+from .text_index import tokenize
+
+STOPWORDS = frozenset(
+    "a an and app application are as at be build building by can create for from how i in into is it "
+    "its make me my of on or our should so that the their this to tool using we want with would you your".split()
+)
+QUERY_SUFFIXES = ("best practices", "architecture", "existing tools and alternatives")
+
+
+def extract_keywords(text: str, limit: int = 6) -> List[str]:
+    """
+    Pick the most frequent non-stopword terms, keeping first-seen order among ties.
+    Args:
+        text (str): Source text.
+        limit (int): Maximum number of keywords.
+    Returns:
+        List[str]: Keywords.
+    """
+    counts: Dict[str, int] = {}
+    for token in tokenize(text):
+        if token not in STOPWORDS and len(token) > 2 and not token.isdigit():
+            counts[token] = counts.get(token, 0) + 1
+    ordered = sorted(counts, key=lambda token: -counts[token])
+    return ordered[:limit]
+
+
+def derive_queries(user_idea: str, max_queries: int = 4) -> List[str]:
+    """
+    Derive web search queries from a user idea.
+    Args:
+        user_idea (str): The rough user idea.
+        max_queries (int): Maximum number of queries.
+    Returns:
+        List[str]: Distinct queries, the idea itself first.
+    """
+    idea = " ".join(user_idea.split())
+    if not idea:
+        return []
+    queries = [idea[:200]]
+    keywords = " ".join(extract_keywords(idea))
+    if keywords:
+        queries.extend(f"{keywords} {suffix}" for suffix in QUERY_SUFFIXES)
+    return list(dict.fromkeys(queries))[:max_queries]
+
+
+def normalize_url(url: Optional[str]) -> str:
+    """
+    Canonical form used to spot the same page reached through different URLs.
+    Args:
+        url (Optional[str]): Result URL.
+    Returns:
+        str: Lowercased host (without www.) and path without trailing slash, query or fragment.
+    """
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return f"{host}{parts.path.rstrip('/')}"
+
+
+def rank_results(result_lists: Sequence[Sequence[Dict[str, Optional[str]]]], k: int = 60) -> List[Dict[str, Optional[str]]]:
+    """
+    Merge per-query result lists with reciprocal-rank fusion, deduplicating by URL.
+    Args:
+        result_lists (Sequence[Sequence[Dict]]): One ranked result list per query.
+        k (int): RRF damping constant.
+    Returns:
+        List[Dict[str, Optional[str]]]: Unique results, best first.
+    """
+    scores: Dict[str, float] = {}
+    best: Dict[str, Dict[str, Optional[str]]] = {}
+    for results in result_lists:
+        for rank, item in enumerate(results):
+            key = normalize_url(item.get("url")) or (item.get("title") or "")
+            if not key:
+                continue
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank + 1)
+            # Reason: keep the variant with the longest snippet, since it carries the most information.
+            if key not in best or len(item.get("description") or "") > len(best[key].get("description") or ""):
+                best[key] = item
+    ordered = sorted(scores, key=lambda key: -scores[key])
+    return [best[key] for key in ordered]
+
+
+def build_digest(results: Sequence[Dict[str, Optional[str]]], token_budget: int = 1500, max_snippet_chars: int = 300) -> str:
+    """
+    Render ranked results as a numbered, source-attributed digest within a token budget.
+    Args:
+        results (Sequence[Dict]): Ranked results with title, url and description.
+        token_budget (int): Maximum estimated tokens for the whole digest.
+        max_snippet_chars (int): Snippets longer than this are truncated.
+    Returns:
+        str: Digest text ("" when no result fits).
+    """
+    lines: List[str] = []
+    used = 0
+    for item in results:
+        snippet = " ".join((item.get("description") or "").split())
+        if len(snippet) > max_snippet_chars:
+            snippet = snippet[:max_snippet_chars].rsplit(" ", 1)[0] + "…"
+        line = f"{len(lines) + 1}. {item.get('title') or 'Untitled'} — {item.get('url') or ''}\n   {snippet}"
+        cost = estimate_tokens(line) + 1
+        if used + cost > token_budget:
+            break
+        lines.append(line)
+        used += cost
+    return "\n".join(lines)
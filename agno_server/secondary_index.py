@@ -0,0 +1,90 @@
+"""
+secondary_index.py
+Attribute -> ids indexes shared by MemoryStore and KnowledgeBase.
+
+Purpose:
+- Answer tag/source/agent/type filters with set lookups and intersections instead of
+  copying and scanning every stored entry on each query.
+
+Design:
+1. SecondaryIndex maps each attribute value to the set of entry ids carrying it; multi-valued
+   attributes (tags) register the id under every value.
+2. lookup() returns the union of ids for the requested values ("any of" semantics).
+3. intersect() combines per-filter candidate sets, iterating the smallest set first.
+4. Not thread-safe on its own; callers hold their store lock while mutating or querying.
+"""
+
+from typing import Dict, Hashable, Iterable, List, Optional, Set
+
+
+class SecondaryIndex:
+    """
+    Maps attribute values to the ids of entries that carry them.
+    """
+    def __init__(self):
+        self._ids: Dict[Hashable, Set[str]] = {}
+
+    def add(self, item_id: str, values: Optional[Iterable[Hashable]]) -> None:
+        """
+        Register an id under each value.
+        Args:
+            item_id (str): Entry identifier.
+            values (Optional[Iterable[Hashable]]): Attribute values; None or empty is a no-op.
+        """
+        for value in values or ():
+            self._ids.setdefault(value, set()).add(item_id)
+
+    def remove(self, item_id: str, values: Optional[Iterable[Hashable]]) -> None:
+        """
+        Unregister an id from each value, dropping values left without ids.
+        Args:
+            item_id (str): Entry identifier.
+            values (Optional[Iterable[Hashable]]): Attribute values the id was added under.
+        """
+        for value in values or ():
+            ids = self._ids.get(value)
+            if ids is None:
+                continue
+            ids.discard(item_id)
+            if not ids:
+                del self._ids[value]
+
+    def lookup(self, values: Iterable[Hashable]) -> Set[str]:
+        """
+        Return ids carrying any of the values.
+        Args:
+            values (Iterable[Hashable]): Attribute values to match.
+        Returns:
+            Set[str]: Matching ids (a new set, safe to mutate).
+        """
+        result: Set[str] = set()
+        for value in values:
+            result |= self._ids.get(value, set())
+        return result
+
+    def count(self, value: Hashable) -> int:
+        """
+        Number of ids registered under a value.
+        Args:
+            value (Hashable): Attribute value.
+        Returns:
+            int: Count of ids carrying the value.
+        """
+        return len(self._ids.get(value, ()))
+
+
+def intersect(candidate_sets: List[Set[str]]) -> Set[str]:
+    """
+    Intersect candidate id sets, smallest first.
+    Args:
+        candidate_sets (List[Set[str]]): One set per active filter (must be non-empty list).
+    Returns:
+        Set[str]: Ids present in every set.
+    """
+    ordered = sorted(candidate_sets, key=len)
+    result = set(ordered[0])
+    for ids in ordered[1:]:
+        if not result:
+            break
+        result &= ids
+    return result
@@ -0,0 +1,342 @@
+"""
+supabase_knowledge_base.py
+Supabase (PostgREST) backed KnowledgeBase for multi-worker deployments.
+
+Purpose:
+- Let several API workers share one knowledge base stored in a Supabase table, with the same
+  add/get/query/update/delete interface as the in-memory KnowledgeBase.
+- Keep traffic small: filtering happens server-side and only matching rows cross the wire.
+
+Design:
+1. One pooled httpx.Client (keep-alive connections) talks to {url}/rest/v1/{table}.
+2. Writes are batched: add_entries/upsert_entries/delete_entries send at most batch_size rows or ids per request.
+3. query_entries pushes filters to PostgREST:
+   - tags -> tags=ov.{...} (any of the tags), source -> source=eq.<source>
+   - text -> every word must appear (case-insensitive) in the title or content, via and=(or(ilike...)).
+   Results are ordered by created_at, id and fetched page by page (page_size rows per request).
+4. A local read-through LRU cache (with TTL, so other workers' writes become visible) serves get_entry
+   and get_entries; this worker's writes update or invalidate it immediately. query_entries results
+   are not cached.
+5. Expected table (ids are text so caller-chosen ids work):
+   create table knowledge_base (
+     id text primary key, title text not null, content text not null, source text,
+     created_at timestamptz not null default now(), updated_at timestamptz not null default now(),
+     tags text[], metadata jsonb);
+"""
+
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+from .knowledge_base import KnowledgeBaseEntry
+from .text_index import tokenize
+
+
+def _pg_quote(value: str) -> str:
+    # Reason: PostgREST list syntax splits on commas and parentheses/braces; double quotes protect them.
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _like_escape(value: str) -> str:
+    # Reason: '%' and '_' are LIKE wildcards; escape them (and the backslash escape itself) to match literally.
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _pg_timestamp(value: datetime) -> str:
+    # Reason: model timestamps are naive UTC; mark them explicitly so timestamptz columns store them as UTC.
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.isoformat()
+
+
+def _parse_timestamp(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _entry_to_row(entry: KnowledgeBaseEntry) -> Dict[str, Any]:
+    return {
+        "id": entry.id,
+        "title": entry.title,
+        "content": entry.content,
+        "source": entry.source,
+        "created_at": _pg_timestamp(entry.created_at),
+        "updated_at": _pg_timestamp(entry.updated_at),
+        "tags": entry.tags,
+        "metadata": entry.metadata,
+    }
+
+
+def _row_to_entry(row: Dict[str, Any]) -> KnowledgeBaseEntry:
+    return KnowledgeBaseEntry(
+        id=row["id"],
+        title=row["title"],
+        content=row["content"],
+        source=row.get("source"),
+        created_at=_parse_timestamp(row["created_at"]),
+        updated_at=_parse_timestamp(row["updated_at"]),
+        tags=row.get("tags"),
+        metadata=row.get("metadata"),
+    )
+
+
+class _EntryCache:
+    """
+    Thread-safe LRU of entries by id with a TTL.
+    """
+    def __init__(self, max_entries: int, ttl: Optional[float]):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._items: "OrderedDict[str, Tuple[Optional[float], KnowledgeBaseEntry]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, entry_id: str) -> Optional[KnowledgeBaseEntry]:
+        with self._lock:
+            item = self._items.get(entry_id)
+            if item is None:
+                return None
+            expires_at, entry = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._items[entry_id]
+                return None
+            self._items.move_to_end(entry_id)
+            return entry.model_copy(deep=True)
+
+    def put(self, entries: List[KnowledgeBaseEntry]) -> None:
+        if self.max_entries <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            for entry in entries:
+                # Reason: store a private copy so callers mutating returned entries cannot poison the cache.
+                self._items[entry.id] = (expires_at, entry.model_copy(deep=True))
+                self._items.move_to_end(entry.id)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def discard(self, entry_ids: List[str]) -> None:
+        with self._lock:
+            for entry_id in entry_ids:
+                self._items.pop(entry_id, None)
+
+
+class SupabaseKnowledgeBase:
+    """
+    KnowledgeBase stored in a Supabase table and accessed through PostgREST.
+    Args:
+        url (str): Supabase project URL (e.g. SUPABASE_URL).
+        key (str): API key sent as apikey and bearer token (e.g. SUPABASE_SERVICE_ROLE_KEY).
+        table (str): Table name.
+        client (httpx.Client, optional): Pre-configured client; a pooled keep-alive client is created otherwise.
+        batch_size (int): Maximum rows or ids per write/lookup request.
+        page_size (int): Rows fetched per request when paging query results.
+        cache_size (int): Entries kept in the local read-through cache (0 disables it).
+        cache_ttl (float, optional): Seconds a cached entry is trusted before re-fetching.
+        timeout (float): Request timeout in seconds.
+    """
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        table: str = "knowledge_base",
+        client: Optional[httpx.Client] = None,
+        batch_size: int = 500,
+        page_size: int = 1000,
+        cache_size: int = 1024,
+        cache_ttl: Optional[float] = 60.0,
+        timeout: float = 10.0,
+    ):
+        self.table = table
+        self.batch_size = batch_size
+        self.page_size = page_size
+        self._owns_client = client is None
+        self._client = client or httpx.Client(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+        self._endpoint = f"{url.rstrip('/')}/rest/v1/{table}"
+        self._headers = {"apikey": key, "Authorization": f"Bearer {key}"}
+        self._cache = _EntryCache(cache_size, cache_ttl)
+
+    def close(self) -> None:
+        if self._owns_client:
+            self._client.close()
+
+    def __enter__(self) -> "SupabaseKnowledgeBase":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _request(self, method: str, params: Optional[Dict[str, str]] = None, json: Any = None, prefer: Optional[str] = None) -> Any:
+        headers = dict(self._headers)
+        if prefer:
+            headers["Prefer"] = prefer
+        response = self._client.request(method, self._endpoint, params=params, json=json, headers=headers)
+        response.raise_for_status()
+        return response.json() if response.content else None
+
+    def _batches(self, items: List[Any]) -> Iterator[List[Any]]:
+        for start in range(0, len(items), self.batch_size):
+            yield items[start:start + self.batch_size]
+
+    def _id_filter(self, entry_ids: List[str]) -> str:
+        return f"in.({','.join(_pg_quote(entry_id) for entry_id in entry_ids)})"
+
+    def _existing_ids(self, entry_ids: List[str]) -> set:
+        existing = set()
+        for batch in self._batches(list(dict.fromkeys(entry_ids))):
+            rows = self._request("GET", params={"select": "id", "id": self._id_filter(batch)})
+            existing.update(row["id"] for row in rows)
+        return existing
+
+    def add_entry(self, entry: KnowledgeBaseEntry) -> str:
+        return self.add_entries([entry])[0]
+
+    def add_entries(self, entries: List[KnowledgeBaseEntry]) -> List[str]:
+        """
+        Add (or replace) entries with one request per batch_size rows.
+        Args:
+            entries (List[KnowledgeBaseEntry]): Entries to store.
+        Returns:
+            List[str]: Entry ids, in input order.
+        """
+        # Reason: one upsert statement cannot touch the same id twice, so keep each id's last version.
+        rows = list({entry.id: _entry_to_row(entry) for entry in entries}.values())
+        for batch in self._batches(rows):
+            self._request("POST", json=batch, prefer="resolution=merge-duplicates,return=minimal")
+        self._cache.put(entries)
+        return [entry.id for entry in entries]
+
+    def upsert_entries(self, entries: List[KnowledgeBaseEntry]) -> Dict[str, int]:
+        """
+        Insert new entries and overwrite existing ones, keeping each existing row's created_at
+        and stamping updated_at with the current time.
+        Args:
+            entries (List[KnowledgeBaseEntry]): Entries to insert or update.
+        Returns:
+            Dict[str, int]: Counts of "inserted" and "updated" entries (distinct ids).
+        """
+        existing = self._existing_ids([entry.id for entry in entries])
+        now = _pg_timestamp(datetime.utcnow())
+        rows = []
+        for entry in {entry.id: entry for entry in entries}.values():
+            row = _entry_to_row(entry)
+            if entry.id in existing:
+                # Reason: omitting created_at from a merge-duplicates upsert leaves the stored value untouched.
+                del row["created_at"]
+                row["updated_at"] = now
+            rows.append(row)
+        # Reason: PostgREST bulk inserts require every row in a request to have the same keys.
+        for has_created_at in (True, False):
+            subset = [row for row in rows if ("created_at" in row) == has_created_at]
+            for batch in self._batches(subset):
+                self._request("POST", json=batch, prefer="resolution=merge-duplicates,return=minimal")
+        self._cache.discard([entry.id for entry in entries])
+        updated = sum(1 for row in rows if row["id"] in existing)
+        return {"inserted": len(rows) - updated, "updated": updated}
+
+    def get_entry(self, entry_id: str) -> Optional[KnowledgeBaseEntry]:
+        return self.get_entries([entry_id])[0]
+
+    def get_entries(self, entry_ids: List[str]) -> List[Optional[KnowledgeBaseEntry]]:
+        """
+        Fetch entries, serving what it can from the local cache and batching the rest.
+        Args:
+            entry_ids (List[str]): Entry ids.
+        Returns:
+            List[Optional[KnowledgeBaseEntry]]: Entries aligned with entry_ids; None where missing.
+        """
+        found: Dict[str, KnowledgeBaseEntry] = {}
+        missing = []
+        for entry_id in dict.fromkeys(entry_ids):
+            cached = self._cache.get(entry_id)
+            if cached is not None:
+                found[entry_id] = cached
+            else:
+                missing.append(entry_id)
+        for batch in self._batches(missing):
+            fetched = [_row_to_entry(row) for row in self._request("GET", params={"select": "*", "id": self._id_filter(batch)})]
+            self._cache.put(fetched)
+            found.update((entry.id, entry) for entry in fetched)
+        return [found[entry_id].model_copy(deep=True) if entry_id in found else None for entry_id in entry_ids]
+
+    def _query_params(self, tags: Optional[List[str]], text: Optional[str], source: Optional[str]) -> Dict[str, str]:
+        params = {"select": "*", "order": "created_at.asc,id.asc"}
+        if tags:
+            params["tags"] = f"ov.{{{','.join(_pg_quote(tag) for tag in tags)}}}"
+        if source:
+            params["source"] = f"eq.{source}"
+        if text:
+            words = list(dict.fromkeys(tokenize(text))) or [text.lower()]
+            # Reason: ilike wildcards are '*' in PostgREST URLs; quoting keeps commas/parentheses literal.
+            patterns = [_pg_quote(f"*{_like_escape(word)}*") for word in words]
+            clauses = [f"or(title.ilike.{pattern},content.ilike.{pattern})" for pattern in patterns]
+            params["and"] = f"({','.join(clauses)})"
+        return params
+
+    def query_entries(
+        self,
+        tags: Optional[List[str]] = None,
+        text: Optional[str] = None,
+        source: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[KnowledgeBaseEntry]:
+        """
+        Query entries with filters evaluated by the database.
+        Args:
+            tags (Optional[List[str]]): Keep entries with any of these tags.
+            text (Optional[str]): Every word must appear in the title or content (case-insensitive).
+            source (Optional[str]): Keep entries from this source.
+            limit (Optional[int]): Maximum number of entries; None fetches every match page by page.
+            offset (int): Number of matching entries to skip.
+        Returns:
+            List[KnowledgeBaseEntry]: Matching entries ordered by creation time.
+        """
+        params = self._query_params(tags, text, source)
+        results: List[KnowledgeBaseEntry] = []
+        while limit is None or len(results) < limit:
+            page_size = self.page_size if limit is None else min(self.page_size, limit - len(results))
+            rows = self._request("GET", params=dict(params, limit=str(page_size), offset=str(offset + len(results))))
+            results.extend(_row_to_entry(row) for row in rows)
+            if len(rows) < page_size:
+                break
+        # Reason: results are not cached; copying whole result sets into the id LRU would only evict hot entries.
+        return results
+
+    def update_entry(self, entry_id: str, content: str, metadata: Optional[dict] = None) -> bool:
+        values: Dict[str, Any] = {"content": content, "updated_at": _pg_timestamp(datetime.utcnow())}
+        if metadata:
+            values["metadata"] = metadata
+        rows = self._request("PATCH", params={"id": f"eq.{entry_id}"}, json=values, prefer="return=representation")
+        self._cache.discard([entry_id])
+        if not rows:
+            return False
+        self._cache.put([_row_to_entry(rows[0])])
+        return True
+
+    def delete_entry(self, entry_id: str) -> bool:
+        return self.delete_entries([entry_id]) == 1
+
+    def delete_entries(self, entry_ids: List[str]) -> int:
+        """
+        Delete entries with one request per batch_size ids.
+        Args:
+            entry_ids (List[str]): Entry ids; unknown ids are ignored.
+        Returns:
+            int: Number of entries deleted.
+        """
+        unique_ids = list(dict.fromkeys(entry_ids))
+        self._cache.discard(unique_ids)
+        deleted = 0
+        for batch in self._batches(unique_ids):
+            rows = self._request("DELETE", params={"select": "id", "id": self._id_filter(batch)}, prefer="return=representation")
+            deleted += len(rows)
+        return deleted
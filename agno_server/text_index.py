@@ -0,0 +1,119 @@
+"""
+text_index.py
+Incrementally maintained inverted index with BM25 ranking.
+
+Purpose:
+- Replace full-corpus substring scans in KnowledgeBase.query_entries with postings lookups,
+  so query cost scales with the number of matching postings instead of corpus size.
+
+Design:
+1. Text is tokenized into lowercase word tokens (Unicode-aware).
+2. Postings map term -> {doc_id: term frequency}; per-document term sets allow O(terms) removal.
+3. search() intersects postings starting from the rarest term (all query terms must match)
+   and ranks matches with Okapi BM25.
+4. Not thread-safe on its own; callers hold their store lock while mutating or searching.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase word tokens.
+    Args:
+        text (str): Text to tokenize.
+    Returns:
+        List[str]: Tokens in document order.
+    """
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+class InvertedIndex:
+    """
+    BM25-ranked inverted index over string document ids.
+    Args:
+        k1 (float): BM25 term-frequency saturation parameter.
+        b (float): BM25 document-length normalization parameter.
+    """
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_terms: Dict[str, Tuple[str, ...]] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def add(self, doc_id: str, text: str) -> None:
+        """
+        Index (or re-index) a document.
+        Args:
+            doc_id (str): Document identifier.
+            text (str): Full text to index.
+        """
+        if doc_id in self._doc_lengths:
+            self.remove(doc_id)
+        tokens = tokenize(text)
+        counts = Counter(tokens)
+        for term, frequency in counts.items():
+            self._postings.setdefault(term, {})[doc_id] = frequency
+        self._doc_terms[doc_id] = tuple(counts)
+        self._doc_lengths[doc_id] = len(tokens)
+        self._total_length += len(tokens)
+
+    def remove(self, doc_id: str) -> bool:
+        """
+        Remove a document from the index.
+        Args:
+            doc_id (str): Document identifier.
+        Returns:
+            bool: True if the document was indexed.
+        """
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return False
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        return True
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        Find documents containing every query term, ranked by BM25.
+        Args:
+            query (str): Free-text query.
+            limit (Optional[int]): Maximum number of results.
+        Returns:
+            List[Tuple[str, float]]: (doc_id, score) pairs, best first.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not self._doc_lengths:
+            return []
+        postings = [self._postings.get(term) for term in terms]
+        if any(p is None for p in postings):
+            return []
+        postings.sort(key=len)
+        candidates = [doc_id for doc_id in postings[0] if all(doc_id in p for p in postings[1:])]
+        doc_count = len(self._doc_lengths)
+        avg_length = self._total_length / doc_count or 1.0
+        idf = [math.log(1 + (doc_count - len(p) + 0.5) / (len(p) + 0.5)) for p in postings]
+        scored = []
+        for doc_id in candidates:
+            norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+            score = 0.0
+            for term_idf, p in zip(idf, postings):
+                frequency = p[doc_id]
+                score += term_idf * frequency * (self.k1 + 1) / (frequency + norm)
+            scored.append((doc_id, score))
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:limit] if limit is not None else scored
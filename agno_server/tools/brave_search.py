@@ -1,30 +1,370 @@
 from .base import SupabaseTool
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from importlib.util import find_spec
+from threading import Lock
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from weakref import WeakKeyDictionary
+import asyncio
 import httpx
 import os
+import random
+import time
+
+SearchResults = List[Dict[str, Optional[str]]]
+
+_POOL_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=30.0)
+_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+# Reason: HTTP/2 multiplexes concurrent searches over one connection, but needs the optional h2 package.
+_HTTP2 = find_spec("h2") is not None
+_client_lock = Lock()
+_client: Optional[httpx.Client] = None
+_async_clients: "WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = WeakKeyDictionary()
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Return the process-wide pooled httpx.Client used for Brave requests.
+    Returns:
+        httpx.Client: Shared client with keep-alive connections.
+    """
+    global _client
+    with _client_lock:
+        if _client is None or _client.is_closed:
+            _client = httpx.Client(limits=_POOL_LIMITS, timeout=_TIMEOUT, http2=_HTTP2)
+        return _client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Return the pooled httpx.AsyncClient for the running event loop.
+    Returns:
+        httpx.AsyncClient: Client shared by every coroutine on this loop.
+    """
+    # Reason: an AsyncClient's connections belong to the loop that opened them, so keep one per loop.
+    loop = asyncio.get_running_loop()
+    with _client_lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = _async_clients[loop] = httpx.AsyncClient(limits=_POOL_LIMITS, timeout=_TIMEOUT, http2=_HTTP2)
+        return client
+
+
+async def aclose_http_clients() -> None:
+    """
+    Close the shared sync client and the running loop's async client (call on application shutdown).
+    """
+    global _client
+    loop = asyncio.get_running_loop()
+    with _client_lock:
+        client, _client = _client, None
+        async_client = _async_clients.pop(loop, None)
+    if client is not None:
+        client.close()
+    if async_client is not None:
+        await async_client.aclose()
+
+
+class SearchCache:
+    """
+    Thread-safe TTL + LRU cache of search results that also coalesces identical in-flight queries.
+    search() and asearch() share one in-flight registry, so a query already running on either path
+    is joined rather than sent upstream again.
+    Args:
+        max_entries (int): Maximum cached queries.
+        ttl (float): Seconds a cached result stays fresh.
+    """
+    def __init__(self, max_entries: int = 512, ttl: float = 900.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._items: "OrderedDict[Tuple[str, int], Tuple[float, SearchResults]]" = OrderedDict()
+        # Reason: a concurrent.futures.Future can be waited on from threads and (via wrap_future) event loops;
+        # async leaders also keep their fill task here so it is strongly referenced until it finishes.
+        self._in_flight: Dict[Tuple[str, int], Tuple[Future, "Optional[asyncio.Task[None]]"]] = {}
+        self._lock = Lock()
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+
+    @staticmethod
+    def _new_future() -> Future:
+        future: Future = Future()
+        # Reason: a running future cannot be cancelled, so a cancelled awaiter cannot cancel it for the others.
+        future.set_running_or_notify_cancel()
+        return future
+
+    def _land(self, key: Tuple[str, int], future: Future, results: Optional[SearchResults] = None) -> None:
+        with self._lock:
+            flight = self._in_flight.get(key)
+            if flight is not None and flight[0] is future:
+                del self._in_flight[key]
+            if results is not None:
+                self._store(key, results)
+
+    def get_or_fetch(self, key: Tuple[str, int], fetch) -> SearchResults:
+        """
+        Return a fresh cached result, join an identical in-flight fetch, or run fetch() once.
+        Args:
+            key (Tuple[str, int]): Normalized query and result count.
+            fetch (Callable[[], SearchResults]): Performs the upstream request.
+        Returns:
+            SearchResults: Search results (shared; callers must not mutate them).
+        """
+        try:
+            running_loop: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        with self._lock:
+            cached = self._lookup(key)
+            if cached is not None:
+                return cached
+            flight = self._in_flight.get(key)
+            # Reason: blocking on a fetch that runs on this thread's own event loop would deadlock it.
+            leader = flight is None or (flight[1] is not None and flight[1].get_loop() is running_loop)
+            if leader:
+                future = self._new_future()
+                self._in_flight[key] = (future, None)
+                self.misses += 1
+            else:
+                future = flight[0]
+                self.coalesced += 1
+        if not leader:
+            # Reason: followers block on the leader's request instead of issuing their own; errors propagate too.
+            return future.result()
+        try:
+            results = fetch()
+        except BaseException as exc:
+            self._land(key, future)
+            future.set_exception(exc)
+            raise
+        self._land(key, future, results)
+        future.set_result(results)
+        return results
+
+    async def aget_or_fetch(self, key: Tuple[str, int], fetch: Callable[[], Awaitable[SearchResults]]) -> SearchResults:
+        """
+        Async counterpart of get_or_fetch; joins identical in-flight queries from either path.
+        Args:
+            key (Tuple[str, int]): Normalized query and result count.
+            fetch (Callable[[], Awaitable[SearchResults]]): Performs the upstream request.
+        Returns:
+            SearchResults: Search results (shared; callers must not mutate them).
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            cached = self._lookup(key)
+            if cached is not None:
+                return cached
+            flight = self._in_flight.get(key)
+            if flight is None:
+                future = self._new_future()
+                self._in_flight[key] = (future, loop.create_task(self._afill(key, fetch, future)))
+                self.misses += 1
+            else:
+                future = flight[0]
+                self.coalesced += 1
+        return await asyncio.wrap_future(future)
+
+    async def _afill(self, key: Tuple[str, int], fetch: Callable[[], Awaitable[SearchResults]], future: Future) -> None:
+        try:
+            results = await fetch()
+        except BaseException as exc:
+            self._land(key, future)
+            future.set_exception(exc)
+            # Reason: callers receive the error through the future; only cancellation ends the task itself.
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            return
+        self._land(key, future, results)
+        future.set_result(results)
+
+    def _lookup(self, key: Tuple[str, int]) -> Optional[SearchResults]:
+        item = self._items.get(key)
+        if item is None or item[0] <= time.monotonic():
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def _store(self, key: Tuple[str, int], results: SearchResults) -> None:
+        self._items[key] = (time.monotonic() + self.ttl, results)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "coalesced": self.coalesced, "misses": self.misses, "entries": len(self._items)}
+
+
+# Reason: shared by every BraveSearchTool so identical queries from concurrent refinements hit one cache.
+_shared_cache = SearchCache()
+
 
 class BraveSearchTool(SupabaseTool):
     name = "BraveSearch"
     description = "Searches the web using Brave Search API. Returns a summary of top results."
+    url = "https://api.search.brave.com/res/v1/web/search"
 
-    def __init__(self, api_key: str = None):
+    def __init__(
+        self,
+        api_key: str = None,
+        cache: Optional[SearchCache] = None,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        max_backoff: float = 8.0,
+        client: Optional[httpx.Client] = None,
+        async_client: Optional[httpx.AsyncClient] = None,
+        max_concurrency: int = 8,
+    ):
         self.api_key = api_key or os.getenv("BRAVE_SEARCH_API_KEY")
         if not self.api_key:
             raise ValueError("BRAVE_SEARCH_API_KEY is required.")
+        self.cache = cache if cache is not None else _shared_cache
+        self._client = client
+        self._async_client = async_client
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
 
-    def run(self, query: str) -> str:
-        url = "https://api.search.brave.com/res/v1/web/search"
-        headers = {"Accept": "application/json", "X-Subscription-Token": self.api_key}
-        params = {"q": query, "count": 5}
-        resp = httpx.get(url, headers=headers, params=params, timeout=10)
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    def _retry_delay(self, response: Any, attempt: int) -> float:
+        headers = response.headers
+        retry_after = headers.get("Retry-After")
+        if retry_after is None:
+            # Reason: Brave reports "<seconds until per-second window resets>, <seconds until monthly reset>".
+            reset = headers.get("X-RateLimit-Reset")
+            retry_after = reset.split(",")[0] if reset else None
+        try:
+            delay = float(retry_after)
+        except (TypeError, ValueError):
+            delay = self.backoff_base * (2 ** attempt) * (1 + random.random())
+        return min(max(delay, 0.0), self.max_backoff)
+
+    def _request_args(self, query: str, count: int) -> Dict[str, Any]:
+        return {
+            "headers": {"Accept": "application/json", "X-Subscription-Token": self.api_key},
+            "params": {"q": query, "count": count},
+        }
+
+    @staticmethod
+    def _parse(resp: httpx.Response) -> SearchResults:
         resp.raise_for_status()
         data = resp.json()
-        results = []
-        for item in data.get("web", {}).get("results", []):
-            title = item.get("title")
-            url = item.get("url")
-            snippet = item.get("description")
-            results.append(f"- {title}: {url}\n  {snippet}")
-        return "\n".join(results) if results else "No results found."
+        return [
+            {"title": item.get("title"), "url": item.get("url"), "description": item.get("description")}
+            for item in data.get("web", {}).get("results", [])
+        ]
+
+    def _fetch(self, query: str, count: int) -> SearchResults:
+        client = self._client or get_http_client()
+        for attempt in range(self.max_retries + 1):
+            resp = client.get(self.url, **self._request_args(query, count))
+            if resp.status_code != 429 or attempt == self.max_retries:
+                break
+            time.sleep(self._retry_delay(resp, attempt))
+        return self._parse(resp)
+
+    async def _afetch(self, query: str, count: int) -> SearchResults:
+        client = self._async_client or get_async_http_client()
+        for attempt in range(self.max_retries + 1):
+            resp = await client.get(self.url, **self._request_args(query, count))
+            if resp.status_code != 429 or attempt == self.max_retries:
+                break
+            await asyncio.sleep(self._retry_delay(resp, attempt))
+        return self._parse(resp)
+
+    def search(self, query: str, count: int = 5) -> SearchResults:
+        """
+        Return structured results, served from the shared cache when possible.
+        Args:
+            query (str): Search query.
+            count (int): Number of results requested from Brave.
+        Returns:
+            SearchResults: Dicts with title, url and description, in ranking order.
+        """
+        normalized = self.normalize_query(query)
+        results = self.cache.get_or_fetch((normalized, count), lambda: self._fetch(query, count))
+        return [dict(item) for item in results]
+
+    async def asearch(self, query: str, count: int = 5) -> SearchResults:
+        """
+        Async search() over the pooled AsyncClient.
+        Args:
+            query (str): Search query.
+            count (int): Number of results requested from Brave.
+        Returns:
+            SearchResults: Dicts with title, url and description, in ranking order.
+        """
+        normalized = self.normalize_query(query)
+        results = await self.cache.aget_or_fetch((normalized, count), lambda: self._afetch(query, count))
+        return [dict(item) for item in results]
+
+    def search_many(self, queries: List[str], count: int = 5, return_exceptions: bool = False) -> List[Any]:
+        """
+        Run several searches concurrently over the pooled client.
+        Args:
+            queries (List[str]): Search queries.
+            count (int): Number of results per query.
+            return_exceptions (bool): Return a failed query's exception in its slot instead of raising.
+        Returns:
+            List[Any]: SearchResults (or exceptions) aligned with queries.
+        """
+        def one(query: str) -> Any:
+            try:
+                return self.search(query, count)
+            except Exception as exc:
+                if not return_exceptions:
+                    raise
+                return exc
+
+        if len(queries) <= 1:
+            return [one(query) for query in queries]
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(queries))) as pool:
+            return list(pool.map(one, queries))
+
+    async def asearch_many(self, queries: List[str], count: int = 5, return_exceptions: bool = False) -> List[Any]:
+        """
+        Run several searches concurrently on the event loop, at most max_concurrency at a time.
+        Args:
+            queries (List[str]): Search queries.
+            count (int): Number of results per query.
+            return_exceptions (bool): Return a failed query's exception in its slot instead of raising.
+        Returns:
+            List[Any]: SearchResults (or exceptions) aligned with queries.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def bounded(query: str) -> SearchResults:
+            async with semaphore:
+                return await self.asearch(query, count)
+
+        return list(await asyncio.gather(*(bounded(query) for query in queries), return_exceptions=return_exceptions))
+
+    @staticmethod
+    def format_results(results: SearchResults) -> str:
+        lines = [f"- {item['title']}: {item['url']}\n  {item['description']}" for item in results]
+        return "\n".join(lines) if lines else "No results found."
+
+    def run(self, query: str) -> str:
+        return self.format_results(self.search(query))
+
+    async def arun(self, query: str) -> str:
+        return self.format_results(await self.asearch(query))
+
+    def run_many(self, queries: List[str]) -> List[str]:
+        return [self.format_results(results) for results in self.search_many(queries)]
+
+    async def arun_many(self, queries: List[str]) -> List[str]:
+        return [self.format_results(results) for results in await self.asearch_many(queries)]
 
     def execute(self, params: dict) -> str:
         """
@@ -0,0 +1,206 @@
+"""
+vector_index.py
+Embedding-backed semantic retrieval for the KnowledgeBase.
+
+Purpose:
+- Deliver the "semantic querying" promised by knowledge_base.py so agents can retrieve
+  relevant prior research in milliseconds instead of re-searching.
+
+Design:
+1. HashingEmbedder: deterministic, offline feature-hashing embedder (word tokens + word bigrams),
+   producing L2-normalized float32 vectors. Any object with `dim` and `embed(texts)` can replace it.
+2. VectorIndex: one contiguous float32 matrix (grown by doubling) with swap-delete removal;
+   exact top-k is a single matrix-vector product plus argpartition, and search_batch
+   scores many queries with one matrix-matrix product.
+3. Optional IVF approximation: build_ivf() clusters rows with k-means; searches with nprobe
+   only score rows whose list is among the nprobe closest centroids.
+4. Not thread-safe on its own; callers hold their store lock while mutating or searching.
+"""
+
+import hashlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .text_index import tokenize
+
+
+class HashingEmbedder:
+    """
+    Deterministic bag-of-words embedder using signed feature hashing.
+    Args:
+        dim (int): Embedding dimensionality.
+    """
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        tokens = tokenize(text)
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Embed a batch of texts.
+        Args:
+            texts (Sequence[str]): Texts to embed.
+        Returns:
+            np.ndarray: float32 array of shape (len(texts), dim), rows L2-normalized.
+        """
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                # Reason: blake2b is stable across processes, unlike the salted built-in hash().
+                digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+                vectors[row, digest % self.dim] += 1.0 if (digest >> 63) & 1 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+class VectorIndex:
+    """
+    Cosine-similarity index over a contiguous float32 matrix.
+    Args:
+        dim (int): Vector dimensionality.
+        initial_capacity (int): Rows preallocated before the first resize.
+    """
+    def __init__(self, dim: int, initial_capacity: int = 1024):
+        self.dim = dim
+        self._matrix = np.zeros((initial_capacity, dim), dtype=np.float32)
+        self._lists = np.full(initial_capacity, -1, dtype=np.int32)
+        self._ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._centroids: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+    def _reserve(self, rows: int) -> None:
+        capacity = self._matrix.shape[0]
+        if rows <= capacity:
+            return
+        while capacity < rows:
+            capacity *= 2
+        matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        matrix[:len(self._ids)] = self._matrix[:len(self._ids)]
+        lists = np.full(capacity, -1, dtype=np.int32)
+        lists[:len(self._ids)] = self._lists[:len(self._ids)]
+        self._matrix, self._lists = matrix, lists
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray) -> None:
+        """
+        Insert or replace vectors.
+        Args:
+            ids (Sequence[str]): Identifiers, one per row.
+            vectors (np.ndarray): Array of shape (len(ids), dim).
+        """
+        vectors = self._normalize(np.atleast_2d(vectors))
+        self._reserve(len(self._ids) + len(ids))
+        for item_id, vector in zip(ids, vectors):
+            position = self._positions.get(item_id)
+            if position is None:
+                position = len(self._ids)
+                self._ids.append(item_id)
+                self._positions[item_id] = position
+            self._matrix[position] = vector
+            if self._centroids is not None:
+                self._lists[position] = int(np.argmax(self._centroids @ vector))
+
+    def remove(self, item_id: str) -> bool:
+        """
+        Remove a vector by swapping the last row into its slot.
+        Args:
+            item_id (str): Identifier to remove.
+        Returns:
+            bool: True if the id was present.
+        """
+        position = self._positions.pop(item_id, None)
+        if position is None:
+            return False
+        last = len(self._ids) - 1
+        if position != last:
+            moved_id = self._ids[last]
+            self._matrix[position] = self._matrix[last]
+            self._lists[position] = self._lists[last]
+            self._ids[position] = moved_id
+            self._positions[moved_id] = position
+        self._ids.pop()
+        self._matrix[last] = 0.0
+        self._lists[last] = -1
+        return True
+
+    def build_ivf(self, n_lists: int, iterations: int = 10, seed: int = 0) -> None:
+        """
+        Cluster the current vectors into n_lists inverted lists (spherical k-means).
+        Vectors added later are assigned to their nearest centroid.
+        Args:
+            n_lists (int): Number of clusters.
+            iterations (int): k-means iterations.
+            seed (int): Seed for centroid initialization.
+        """
+        size = len(self._ids)
+        if size == 0:
+            return
+        data = self._matrix[:size]
+        rng = np.random.default_rng(seed)
+        centroids = data[rng.choice(size, size=min(n_lists, size), replace=False)].copy()
+        for _ in range(iterations):
+            assignments = np.argmax(data @ centroids.T, axis=1)
+            for cluster in range(len(centroids)):
+                members = data[assignments == cluster]
+                if len(members):
+                    centroids[cluster] = members.sum(axis=0)
+            centroids = self._normalize(centroids)
+        self._centroids = centroids
+        self._lists[:size] = np.argmax(data @ centroids.T, axis=1)
+
+    def search(self, vector: np.ndarray, k: int = 5, nprobe: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        Return the k most similar ids by cosine similarity.
+        Args:
+            vector (np.ndarray): Query vector of shape (dim,).
+            k (int): Number of results.
+            nprobe (Optional[int]): With an IVF built, only score the nprobe closest lists.
+        Returns:
+            List[Tuple[str, float]]: (id, similarity) pairs, best first.
+        """
+        return self.search_batch(np.atleast_2d(vector), k, nprobe)[0]
+
+    def search_batch(self, vectors: np.ndarray, k: int = 5, nprobe: Optional[int] = None) -> List[List[Tuple[str, float]]]:
+        """
+        Top-k search for many queries at once.
+        Args:
+            vectors (np.ndarray): Query vectors of shape (n, dim).
+            k (int): Number of results per query.
+            nprobe (Optional[int]): With an IVF built, only score the nprobe closest lists.
+        Returns:
+            List[List[Tuple[str, float]]]: Results per query, best first.
+        """
+        queries = self._normalize(np.atleast_2d(vectors))
+        size = len(self._ids)
+        if size == 0 or k <= 0:
+            return [[] for _ in range(len(queries))]
+        data = self._matrix[:size]
+        if nprobe is None or self._centroids is None:
+            return [self._top_k(scores, np.arange(size), k) for scores in queries @ data.T]
+        results = []
+        lists = self._lists[:size]
+        for query in queries:
+            probes = np.argsort(-(self._centroids @ query))[:nprobe]
+            candidates = np.flatnonzero(np.isin(lists, probes))
+            results.append(self._top_k(data[candidates] @ query, candidates, k))
+        return results
+
+    def _top_k(self, scores: np.ndarray, rows: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        if len(scores) == 0:
+            return []
+        k = min(k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(self._ids[rows[i]], float(scores[i])) for i in best]
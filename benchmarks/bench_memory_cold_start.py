@@ -0,0 +1,46 @@
+"""
+Cold-start benchmark for the durable MemoryStore backend.
+
+Writes N long_term entries through LogBackend, compacts them into the snapshot, then times
+how long a fresh MemoryStore takes to load them. Run from the repository root:
+
+    python -m benchmarks.bench_memory_cold_start [--entries 200000]
+"""
+
+import argparse
+import tempfile
+import time
+from uuid import uuid4
+
+from agno_server.communication import AgentRole
+from agno_server.memory import MemoryEntry, MemoryStore, _MemoryRecord
+from agno_server.memory_backend import LogBackend
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=200000)
+    parser.add_argument("--batch", type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        backend = LogBackend(directory, compact_min_ops=args.entries * 2)
+        template = MemoryEntry(agent=AgentRole.INTERNET_RESEARCHER, type="long_term", data={"finding": "x" * 64}, tags=["research", "web"])
+        start = time.perf_counter()
+        for offset in range(0, args.entries, args.batch):
+            count = min(args.batch, args.entries - offset)
+            record = _MemoryRecord.from_entry(template).to_dict()
+            backend.put([dict(record, id=str(uuid4())) for _ in range(count)])
+        backend.compact(backend.load().values())
+        backend.close()
+        print(f"wrote {args.entries} entries in {time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        store = MemoryStore(backend=LogBackend(directory))
+        elapsed = time.perf_counter() - start
+        loaded = len(store.query_entries(type="long_term"))
+        print(f"cold start loaded {loaded} entries in {elapsed:.2f}s ({loaded / elapsed:,.0f} entries/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Contention benchmark for MemoryStore reads vs. writes.
+
+One writer thread calls add_entry while a growing number of reader threads run wide query_entries
+scans. Reports writer throughput and p99 add_entry latency, plus reader throughput, for the current
+store (queries hold the lock only for their index lookups) against the previous read path, which
+held the lock for the whole scan. Run from the repository root:
+
+    python -m benchmarks.bench_memory_contention [--seconds 2] [--entries 20000]
+"""
+
+import argparse
+import random
+import threading
+import time
+from typing import List, Tuple
+
+from agno_server.communication import AgentRole
+from agno_server.memory import MemoryEntry, MemoryStore
+from agno_server.secondary_index import intersect
+
+TAGS = [f"tag{i}" for i in range(50)]
+AGENTS = list(AgentRole)
+
+
+class LockedScanStore(MemoryStore):
+    """
+    Baseline: the previous query_entries, which filtered, ordered and touched under the store lock.
+    """
+    def query_entries(self, agent=None, type=None, tags=None, conversation_id=None):
+        with self._lock:
+            now = self._clock()
+            candidate_sets = []
+            if agent:
+                candidate_sets.append(self._by_agent.lookup([agent]))
+            if type:
+                candidate_sets.append(self._by_type.lookup([type]))
+            if tags:
+                candidate_sets.append(self._by_tag.lookup(tags))
+            if not candidate_sets:
+                keys = list(self._store)
+            else:
+                keys = sorted(intersect(candidate_sets), key=self._order.__getitem__)
+            keys = [key for key in keys if self._is_live(key, now)]
+            for key in keys:
+                if key in self._short_term_lru:
+                    self._short_term_lru.move_to_end(key)
+            records = [self._store[key] for key in keys]
+        return [record.to_entry() for record in records]
+
+
+def make_entry(rng: random.Random) -> MemoryEntry:
+    return MemoryEntry(
+        agent=rng.choice(AGENTS),
+        type=rng.choice(["short_term", "long_term"]),
+        data={"value": rng.random()},
+        tags=rng.sample(TAGS, 3),
+    )
+
+
+def build_store(cls, entries: int) -> MemoryStore:
+    store = cls()
+    rng = random.Random(0)
+    store.add_entries([make_entry(rng) for _ in range(entries)])
+    return store
+
+
+def run(store: MemoryStore, readers: int, seconds: float, think: float) -> Tuple[float, float, float]:
+    """
+    Returns:
+        Tuple[float, float, float]: writer ops/s, writer p99 latency (ms), reader queries/s.
+    """
+    stop = time.perf_counter() + seconds
+    latencies: List[float] = []
+    reads = [0] * readers
+
+    def writer() -> None:
+        rng = random.Random(-1)
+        while time.perf_counter() < stop:
+            entry = make_entry(rng)
+            start = time.perf_counter()
+            store.add_entry(entry)
+            latencies.append(time.perf_counter() - start)
+
+    def reader(slot: int) -> None:
+        rng = random.Random(slot)
+        while time.perf_counter() < stop:
+            # Reason: a wide scan (half the store) is the query that used to stall writers.
+            store.query_entries(type=rng.choice(["short_term", "long_term"]))
+            reads[slot] += 1
+            # Reason: agents do I/O or LLM work between memory calls, which releases the GIL.
+            time.sleep(think)
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader, args=(slot,)) for slot in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0.0
+    return len(latencies) / seconds, p99, sum(reads) / seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--readers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--think", type=float, default=0.05, help="seconds each reader sleeps between queries")
+    args = parser.parse_args()
+
+    print(f"{'readers':>7} {'store':>12} {'writes/s':>9} {'write p99 ms':>13} {'queries/s':>10}")
+    for readers in args.readers:
+        for label, cls in (("locked scan", LockedScanStore), ("current", MemoryStore)):
+            writes, p99, queries = run(build_store(cls, args.entries), readers, args.seconds, args.think)
+            print(f"{readers:>7} {label:>12} {writes:>9.0f} {p99:>13.2f} {queries:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
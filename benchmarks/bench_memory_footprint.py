@@ -0,0 +1,104 @@
+"""
+Memory-footprint benchmark for the compact record representation.
+
+Measures retained bytes per entry (via tracemalloc) for:
+- before: a dict of pydantic MemoryEntry / KnowledgeBaseEntry models keyed by id
+  (how MemoryStore/KnowledgeBase held entries before compact records),
+- after: a dict of the compact records that replace them, keyed by their binary ids, and
+- store: a full MemoryStore / KnowledgeBase holding the same entries, including every index.
+
+Payloads (data dicts, content strings) are created before measuring, so both numbers cover
+only per-entry overhead. Run from the repository root:
+
+    python -m benchmarks.bench_memory_footprint [--entries 100000]
+"""
+
+import argparse
+import gc
+import tracemalloc
+from typing import Callable, List
+
+from agno_server.communication import AgentRole
+from agno_server.knowledge_base import KnowledgeBase, KnowledgeBaseEntry, _KnowledgeRecord
+from agno_server.memory import MemoryEntry, MemoryStore, _MemoryRecord
+
+AGENTS = list(AgentRole)
+TAGS = ["research", "web", "prd", "draft", "final", "summary"]
+
+
+def retained_bytes(build: Callable[[], object]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        keep = build()
+        gc.collect()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del keep
+    return current
+
+
+def memory_inputs(entries: int) -> List[dict]:
+    return [
+        {"agent": AGENTS[i % len(AGENTS)], "type": "long_term", "data": {"n": i}, "tags": [TAGS[i % 6], TAGS[(i + 1) % 6]]}
+        for i in range(entries)
+    ]
+
+
+def knowledge_inputs(entries: int) -> List[dict]:
+    return [
+        {"title": f"t{i}", "content": f"c{i}", "source": f"https://example.com/{i % 50}", "tags": [TAGS[i % 6]]}
+        for i in range(entries)
+    ]
+
+
+def report(name: str, n: int, before: Callable, after: Callable, store: Callable) -> None:
+    before_bytes, after_bytes, store_bytes = (retained_bytes(build) / n for build in (before, after, store))
+    print(
+        f"{name:<13} before {before_bytes:6.0f} B/entry  after {after_bytes:6.0f} B/entry "
+        f"({1 - after_bytes / before_bytes:.0%} smaller)  full store incl. indexes {store_bytes:6.0f} B/entry"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100000)
+    args = parser.parse_args()
+    n = args.entries
+
+    inputs = memory_inputs(n)
+
+    def memory_before() -> dict:
+        return {e.id: e for e in (MemoryEntry(**kwargs) for kwargs in inputs)}
+
+    def memory_after() -> dict:
+        return {r.key: r for r in (_MemoryRecord.from_entry(MemoryEntry(**kwargs)) for kwargs in inputs)}
+
+    def memory_store() -> MemoryStore:
+        store = MemoryStore()
+        for kwargs in inputs:
+            store.add_entry(MemoryEntry(**kwargs))
+        return store
+
+    report("MemoryStore", n, memory_before, memory_after, memory_store)
+
+    inputs = knowledge_inputs(n)
+
+    def knowledge_before() -> dict:
+        return {e.id: e for e in (KnowledgeBaseEntry(**kwargs) for kwargs in inputs)}
+
+    def knowledge_after() -> dict:
+        return {r.key: r for r in (_KnowledgeRecord.from_entry(KnowledgeBaseEntry(**kwargs)) for kwargs in inputs)}
+
+    def knowledge_store() -> KnowledgeBase:
+        kb = KnowledgeBase()
+        for kwargs in inputs:
+            kb.add_entry(KnowledgeBaseEntry(**kwargs))
+        return kb
+
+    report("KnowledgeBase", n, knowledge_before, knowledge_after, knowledge_store)
+
+
+if __name__ == "__main__":
+    main()
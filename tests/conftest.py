@@ -1,7 +1,15 @@
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, AsyncMock, MagicMock
 
 @pytest.fixture(autouse=True, scope="session")
-def patch_supabase_create_client():
-    with patch("agno_server.main.create_client", return_value=MagicMock()):
+def patch_supabase_db():
+    with patch("agno_server.main.get_db", new=AsyncMock(return_value=MagicMock())):
         yield
+
+@pytest.fixture(autouse=True)
+def reset_llm_registry():
+    # Reason: tests construct GeminiLLM with different keys; start each one from an empty registry.
+    from agno_server.llm import reset_shared_models
+    reset_shared_models()
+    yield
+    reset_shared_models()
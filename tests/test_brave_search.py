@@ -1,35 +1,177 @@
 """
 Unit test for BraveSearchTool (WebSearch tool interface).
 """
+import asyncio
 import os
+import threading
+import time
+import httpx
 import pytest
-from agno_server.tools.brave_search import BraveSearchTool
+from agno_server.tools.brave_search import BraveSearchTool, SearchCache
 
-class DummyResponse:
-    def __init__(self, json_data):
-        self._json = json_data
-    def json(self):
-        return self._json
-    def raise_for_status(self):
-        pass
+RESULTS = {
+    "web": {
+        "results": [
+            {"title": "Test Title", "url": "https://example.com", "description": "Test snippet."}
+        ]
+    }
+}
+
+class FakeBrave:
+    """
+    Mock transport standing in for the Brave API; records every request it serves.
+    """
+    def __init__(self):
+        self.requests = []
+        self.responses = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if self.responses:
+            return self.responses.pop(0)
+        return httpx.Response(200, json=RESULTS)
 
 @pytest.fixture(autouse=True)
-def patch_httpx(monkeypatch):
-    def dummy_get(url, headers, params, timeout):
-        return DummyResponse({
-            "web": {
-                "results": [
-                    {"title": "Test Title", "url": "https://example.com", "description": "Test snippet."}
-                ]
-            }
-        })
-    monkeypatch.setattr("httpx.get", dummy_get)
-
-
-def test_brave_search_tool(monkeypatch):
+def brave(monkeypatch):
+    fake = FakeBrave()
+    transport = httpx.MockTransport(fake.handler)
+    monkeypatch.setattr("agno_server.tools.brave_search.get_http_client", lambda: httpx.Client(transport=transport))
+    monkeypatch.setattr("agno_server.tools.brave_search.get_async_http_client", lambda: httpx.AsyncClient(transport=transport))
+    return fake
+
+
+def test_brave_search_tool(monkeypatch, brave):
     monkeypatch.setenv("BRAVE_SEARCH_API_KEY", "dummy-key")
-    tool = BraveSearchTool()
+    tool = BraveSearchTool(cache=SearchCache())
     result = tool.run("Agno AI")
     assert "Test Title" in result
     assert "https://example.com" in result
     assert "Test snippet." in result
+    request = brave.requests[0]
+    assert request.headers["X-Subscription-Token"] == "dummy-key"
+    assert request.url.params["q"] == "Agno AI"
+
+
+def test_search_caches_on_normalized_query(brave):
+    tool = BraveSearchTool(api_key="k", cache=SearchCache())
+    first = tool.search("Agno  AI")
+    first[0]["title"] = "mutated"
+    assert tool.search("agno ai")[0]["title"] == "Test Title"
+    assert len(brave.requests) == 1
+    tool.search("agno ai", count=10)
+    assert len(brave.requests) == 2
+    assert tool.cache.stats()["hits"] == 1
+
+
+def test_concurrent_identical_queries_are_coalesced():
+    calls = []
+    release = threading.Event()
+    def slow_handler(request):
+        calls.append(request)
+        release.wait(5)
+        return httpx.Response(200, json=RESULTS)
+    client = httpx.Client(transport=httpx.MockTransport(slow_handler))
+    tool = BraveSearchTool(api_key="k", cache=SearchCache(), client=client)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(tool.search("same query"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    while tool.cache.stats()["coalesced"] < 7:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert len(results) == 8 and all(r[0]["url"] == "https://example.com" for r in results)
+
+
+def test_rate_limited_requests_back_off_and_retry(monkeypatch, brave):
+    brave.responses = [
+        httpx.Response(429, headers={"Retry-After": "0.01"}),
+        httpx.Response(429, headers={"X-RateLimit-Reset": "0, 86400"}),
+    ]
+    sleeps = []
+    monkeypatch.setattr("agno_server.tools.brave_search.time.sleep", sleeps.append)
+    tool = BraveSearchTool(api_key="k", cache=SearchCache())
+    assert tool.search("q")[0]["title"] == "Test Title"
+    assert sleeps == [0.01, 0.0]
+
+
+def test_rate_limit_gives_up_after_max_retries(monkeypatch, brave):
+    brave.responses = [httpx.Response(429) for _ in range(3)]
+    monkeypatch.setattr("agno_server.tools.brave_search.time.sleep", lambda delay: None)
+    tool = BraveSearchTool(api_key="k", cache=SearchCache(), max_retries=2)
+    with pytest.raises(httpx.HTTPStatusError):
+        tool.search("q")
+    assert tool.cache.stats()["entries"] == 0
+
+
+def test_run_many_searches_concurrently(brave):
+    tool = BraveSearchTool(api_key="k", cache=SearchCache())
+    summaries = tool.run_many(["alpha", "beta", "gamma", "alpha"])
+    assert len(summaries) == 4 and all("Test Title" in s for s in summaries)
+    assert sorted(r.url.params["q"] for r in brave.requests) == ["alpha", "beta", "gamma"]
+
+
+def test_async_search_overlaps_requests_and_coalesces():
+    in_flight = 0
+    peak = 0
+    calls = []
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        calls.append(request.url.params["q"])
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        return httpx.Response(200, json=RESULTS)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            tool = BraveSearchTool(api_key="k", cache=SearchCache(), async_client=client)
+            summaries = await tool.arun_many([f"query {i}" for i in range(6)] + ["query 0"])
+            single = await tool.arun("query 0")
+            return summaries, single
+
+    summaries, single = asyncio.run(scenario())
+    assert len(summaries) == 7 and all("Test Title" in s for s in summaries)
+    assert "Test Title" in single
+    assert sorted(calls) == [f"query {i}" for i in range(6)]
+    assert peak == 6
+
+
+def test_sync_and_async_callers_share_one_in_flight_request():
+    calls = []
+
+    async def async_handler(request):
+        calls.append("async")
+        while tool.cache.stats()["coalesced"] < 1:
+            await asyncio.sleep(0.01)
+        return httpx.Response(200, json=RESULTS)
+
+    def sync_handler(request):
+        calls.append("sync")
+        return httpx.Response(200, json=RESULTS)
+
+    tool = BraveSearchTool(
+        api_key="k",
+        cache=SearchCache(),
+        client=httpx.Client(transport=httpx.MockTransport(sync_handler)),
+        async_client=httpx.AsyncClient(transport=httpx.MockTransport(async_handler)),
+    )
+    sync_results = []
+
+    async def scenario():
+        pending = asyncio.ensure_future(tool.asearch("Shared Query"))
+        while not calls:
+            await asyncio.sleep(0.01)
+        thread = threading.Thread(target=lambda: sync_results.append(tool.search("shared query")))
+        thread.start()
+        results = await pending
+        await asyncio.to_thread(thread.join)
+        return results
+
+    results = asyncio.run(scenario())
+    assert calls == ["async"]
+    assert results == sync_results[0] and results[0]["url"] == "https://example.com"
@@ -0,0 +1,52 @@
+"""
+Unit tests for agno_server.compact (compact record helpers).
+"""
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from agno_server.communication import AgentRole
+from agno_server.compact import decode_id, encode_id, from_epoch_us, intern_tags, to_epoch_us
+from agno_server.knowledge_base import KnowledgeBase, KnowledgeBaseEntry
+from agno_server.memory import MemoryEntry, MemoryStore
+
+def test_uuid_ids_are_stored_as_16_bytes():
+    entry_id = str(uuid4())
+    key = encode_id(entry_id)
+    assert isinstance(key, bytes) and len(key) == 16
+    assert decode_id(key) == entry_id
+
+def test_non_canonical_ids_round_trip_unchanged():
+    for entry_id in ("e1", str(uuid4()).upper(), "x" * 36):
+        assert encode_id(entry_id) == entry_id
+        assert decode_id(encode_id(entry_id)) == entry_id
+
+def test_epoch_timestamps_round_trip():
+    now = datetime.utcnow()
+    assert from_epoch_us(to_epoch_us(now)) == now
+    aware = datetime(2024, 1, 1, 12, tzinfo=timezone(timedelta(hours=2)))
+    assert from_epoch_us(to_epoch_us(aware)) == datetime(2024, 1, 1, 10)
+
+def test_tags_are_interned():
+    first = intern_tags(["".join(["re", "search"])])
+    second = intern_tags(["".join(["res", "earch"])])
+    assert first[0] is second[0]
+    assert intern_tags(None) is None
+
+def test_memory_entries_round_trip_through_compact_records():
+    store = MemoryStore()
+    entry = MemoryEntry(agent=AgentRole.PRD_WRITER, type="long_term", data={"k": 1}, tags=["prd"], metadata={"m": 2})
+    custom = MemoryEntry(id="custom-id", agent=AgentRole.TEAM_LEAD, type="short_term", data={})
+    store.add_entry(entry)
+    store.add_entry(custom)
+    assert store.get_entry(entry.id) == entry
+    assert store.get_entry("custom-id") == custom
+
+def test_returned_entries_are_detached_copies():
+    store = MemoryStore()
+    kb = KnowledgeBase()
+    entry_id = store.add_entry(MemoryEntry(agent=AgentRole.TEAM_LEAD, type="long_term", data={}, tags=["a"]))
+    kb_id = kb.add_entry(KnowledgeBaseEntry(title="T", content="C", tags=["a"]))
+    store.get_entry(entry_id).tags.append("b")
+    kb.get_entry(kb_id).tags.append("b")
+    assert store.get_entry(entry_id).tags == ["a"]
+    assert kb.get_entry(kb_id).tags == ["a"]
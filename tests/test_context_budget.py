@@ -0,0 +1,40 @@
+"""
+Unit tests for agno_server.context_budget.
+"""
+from agno_server.context_budget import ContextBudget, TokenUsageStats, compact_text, dedupe_sections, estimate_tokens
+
+PARAGRAPH = "Caching reduces latency for repeated reads. It also lowers backend load considerably."
+
+
+def test_dedupe_sections_earlier_wins():
+    tags = f"- {PARAGRAPH}\n\nShort"
+    research = f"Intro\n\n{PARAGRAPH}\n\nshort\n\nOutro\n\n{PARAGRAPH.upper()}"
+    assert dedupe_sections([tags, research]) == [tags, "Intro\n\nOutro"]
+
+
+def test_dedupe_sections_drops_repeated_long_lines():
+    line = "A long repeated line that appears in more than one paragraph."
+    result = dedupe_sections([f"{line}\nfirst", f"{line}\nsecond"])
+    assert result == [f"{line}\nfirst", "second"]
+
+
+def test_compact_text_keeps_every_paragraph_within_budget():
+    text = "\n\n".join(f"Paragraph {i}. " + "word " * 200 for i in range(5))
+    compacted = compact_text(text, 100)
+    assert estimate_tokens(compacted) <= 100
+    assert all(f"Paragraph {i}." in compacted for i in range(5))
+    assert compact_text("small", 100) == "small"
+
+
+def test_context_budget_fit_records_usage():
+    stats = TokenUsageStats()
+    budget = ContextBudget({"stage": 40}, stats=stats)
+    fitted = budget.fit("stage", {"a": PARAGRAPH, "b": f"{PARAGRAPH}\n\n" + "extra " * 100})
+    assert fitted["a"].startswith("Caching reduces")
+    assert "Caching" not in fitted["b"]
+    assert sum(estimate_tokens(text) for text in fitted.values()) <= 40
+    assert budget.usage["stage"]["sent_tokens"] <= 40
+    snapshot = stats.snapshot()["stage"]
+    assert snapshot["calls"] == 1
+    assert snapshot["saved_tokens"] == snapshot["original_tokens"] - snapshot["sent_tokens"] > 0
+    assert budget.budget_for("other") == budget.default_budget
@@ -0,0 +1,202 @@
+"""
+Unit tests for agno_server.db against a mocked PostgREST transport.
+"""
+import asyncio
+import json
+
+import httpx
+
+from agno_server.db import SupabaseDB, chunked
+
+
+class FakeRest:
+    """
+    Mock transport standing in for PostgREST; records requests and tracks overlap.
+    """
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.requests = []
+        self.in_flight = 0
+        self.peak = 0
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        body = json.loads(request.content) if request.content else None
+        return httpx.Response(200, json=body if isinstance(body, list) else [{"id": 1}])
+
+
+class FakeTable:
+    """
+    In-memory table answering the eq/gt/order/limit subset of PostgREST reads.
+    """
+    def __init__(self, rows):
+        self.rows = rows
+        self.requests = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        rows = self.rows
+        for name, value in request.url.params.multi_items():
+            op, _, operand = value.partition(".")
+            if op == "eq":
+                rows = [row for row in rows if str(row[name]) == operand]
+            elif op == "gt":
+                rows = [row for row in rows if row[name] > type(row[name])(operand)]
+        order = request.url.params.get("order")
+        if order:
+            column = order.split(".")[0]
+            rows = sorted(rows, key=lambda row: row[column])
+        if "limit" in request.url.params:
+            rows = rows[:int(request.url.params["limit"])]
+        return httpx.Response(200, json=rows)
+
+
+async def connect(fake) -> SupabaseDB:
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(fake.handler))
+    return await SupabaseDB.connect("http://supabase.test", "service-key", http_client=http_client)
+
+
+def test_crud_builds_postgrest_requests():
+    fake = FakeRest()
+
+    async def scenario():
+        db = await connect(fake)
+        try:
+            assert (await db.read_rows("items", {"owner": "ann"}, limit=5)).rows == [{"id": 1}]
+            assert await db.insert("items", [{"name": "a"}]) == [{"name": "a"}]
+            await db.update("items", {"id": 1}, {"name": "b"})
+            await db.delete("items", {"id": 1})
+        finally:
+            await db.aclose()
+
+    asyncio.run(scenario())
+    methods = [(r.method, r.url.path, dict(r.url.params)) for r in fake.requests]
+    assert methods[0] == ("GET", "/rest/v1/items", {"select": "*", "owner": "eq.ann", "limit": "5"})
+    assert [m[0] for m in methods[1:]] == ["POST", "PATCH", "DELETE"]
+    assert methods[2][2] == {"id": "eq.1"} and methods[3][2] == {"id": "eq.1"}
+    assert all(r.headers["apikey"] == "service-key" for r in fake.requests)
+
+
+def test_concurrent_reads_overlap_on_one_event_loop():
+    fake = FakeRest(delay=0.05)
+
+    async def scenario():
+        db = await connect(fake)
+        try:
+            return await asyncio.gather(*(db.read_rows("items", {"id": i}) for i in range(200)))
+        finally:
+            await db.aclose()
+
+    results = asyncio.run(scenario())
+    assert len(results) == 200
+    # Reason: sync endpoints would top out at the threadpool size (40 by default).
+    assert fake.peak == 200
+
+
+def test_iter_pages_walks_table_with_keyset_cursor():
+    table = FakeTable([{"id": i, "group": i % 2} for i in range(25, 0, -1)])
+
+    async def scenario():
+        db = await connect(table)
+        try:
+            return [page async for page in db.iter_pages("items", "id", {"group": 1}, page_size=5)]
+        finally:
+            await db.aclose()
+
+    pages = asyncio.run(scenario())
+    assert [len(page) for page in pages] == [5, 5, 3]
+    assert [row["id"] for page in pages for row in page] == list(range(1, 26, 2))
+    cursors = [r.url.params.get("id") for r in table.requests]
+    assert cursors == [None, "gt.9", "gt.19"]
+
+
+def test_insert_chunks_bounds_parallelism_and_reports_each_chunk():
+    fake = FakeRest(delay=0.02)
+    calls = 0
+
+    async def handler(request):
+        nonlocal calls
+        calls += 1
+        if calls == 2:
+            return httpx.Response(413, json={"message": "Payload too large"})
+        return await fake.handler(request)
+
+    async def scenario():
+        http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        db = await SupabaseDB.connect("http://supabase.test", "service-key", http_client=http_client)
+        try:
+            records = ({"n": i} for i in range(1000))
+            results = [result async for result in db.insert_chunks("items", chunked(records, 100), max_concurrency=3)]
+            return sorted(results, key=lambda result: result["chunk"])
+        finally:
+            await db.aclose()
+
+    results = asyncio.run(scenario())
+    assert [r["chunk"] for r in results] == list(range(10))
+    assert [r["offset"] for r in results] == list(range(0, 1000, 100))
+    assert sum(r["inserted"] for r in results) == 900
+    assert [r["error"] is not None for r in results].count(True) == 1
+    assert fake.peak == 3
+    assert all(r.headers["prefer"].startswith("return=minimal") for r in fake.requests)
+
+
+def test_projection_operator_filters_order_and_count_are_pushed_down():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        rows = [] if request.method == "HEAD" else [{"id": 1}]
+        return httpx.Response(200, json=rows, headers={"Content-Range": "0-0/42"})
+
+    filters = {"age": {"gte": 18, "lt": 65}, "status": {"in": ["new", "open,pending"]}, "name": {"ilike": "%bob%"}, "deleted_at": {"is": None}, "team": "core"}
+
+    async def scenario():
+        http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        db = await SupabaseDB.connect("http://supabase.test", "service-key", http_client=http_client)
+        try:
+            read = await db.read_rows("items", filters, limit=10, columns=["id", "name"], order=["age.desc.nullslast", "id"], count="exact")
+            counted = await db.read_rows("items", {"team": "core"}, limit=0, count="exact")
+            updated = await db.update("items", {"age": {"lt": 18}}, {"minor": True}, columns=["id"], count="exact")
+            deleted = await db.delete("items", {"age": {"neq": 1}}, columns=["id"])
+            return read, counted, updated, deleted
+        finally:
+            await db.aclose()
+
+    read, counted, updated, deleted = asyncio.run(scenario())
+    assert read.rows == [{"id": 1}] and read.count == 42
+    params = requests[0].url.params
+    assert params["select"] == "id,name"
+    assert params.get_list("age") == ["gte.18", "lt.65"]
+    assert params["status"] == 'in.(new,"open,pending")'
+    assert params["name"] == "ilike.%bob%" and params["deleted_at"] == "is.null" and params["team"] == "eq.core"
+    assert params["order"] == "age.desc.nullslast,id.asc" and params["limit"] == "10"
+    assert "count=exact" in requests[0].headers["prefer"]
+    assert counted == ([], 42) and requests[1].method == "HEAD" and "limit" not in requests[1].url.params
+    assert updated.count == 42 and requests[2].url.params["select"] == "id" and requests[2].url.params["age"] == "lt.18"
+    assert deleted.count is None and requests[3].url.params["select"] == "id"
+
+
+def test_invalid_filters_and_order_are_rejected():
+    async def scenario(call):
+        http_client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, json=[])))
+        db = await SupabaseDB.connect("http://supabase.test", "service-key", http_client=http_client)
+        try:
+            await call(db)
+        finally:
+            await db.aclose()
+
+    for call in (
+        lambda db: db.read_rows("items", {"age": {"between": [1, 2]}}),
+        lambda db: db.read_rows("items", {"age": {"in": 3}}),
+        lambda db: db.delete("items", {"age": {"is": "maybe"}}),
+        lambda db: db.read_rows("items", order=["age.sideways"]),
+    ):
+        try:
+            asyncio.run(scenario(call))
+        except ValueError:
+            continue
+        raise AssertionError("expected ValueError")
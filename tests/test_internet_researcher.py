@@ -10,3 +10,60 @@ def test_internet_researcher_system_prompt_presence():
     assert "Internet Researcher Agent" in agent.system_prompt
     assert "WebSearch tool" in agent.system_prompt
     assert "source-attributed summary" in agent.system_prompt
+
+class FakeSearchTool:
+    def __init__(self, fail=()):
+        self.queries = []
+        self.fail = fail
+
+    def _results(self, query):
+        if query in self.fail:
+            return RuntimeError("boom")
+        return [{"title": f"Result for {query}", "url": "https://shared.example.com", "description": "shared page"},
+                {"title": query, "url": f"https://example.com/{len(query)}", "description": "unique"}]
+
+    def search_many(self, queries, count=5, return_exceptions=False):
+        self.queries.append(list(queries))
+        return [self._results(q) for q in queries]
+
+    async def asearch_many(self, queries, count=5, return_exceptions=False):
+        return self.search_many(queries, count, return_exceptions)
+
+class RecordingLLM:
+    def __init__(self):
+        self.prompts = []
+
+    def chat(self, prompt, system=None):
+        self.prompts.append(prompt)
+        return "summary"
+
+    async def achat(self, prompt, system=None):
+        return self.chat(prompt, system)
+
+def test_researcher_sends_ranked_digest_of_parallel_searches():
+    tool = FakeSearchTool()
+    llm = RecordingLLM()
+    agent = InternetResearcherAgent(name="InternetResearcher", llm=llm, search_tool=tool, max_queries=3)
+    assert agent.act({"user_idea": "Build a news summarizer"}) == "summary"
+    assert len(tool.queries) == 1 and len(tool.queries[0]) == 3
+    prompt = llm.prompts[0]
+    assert "Build a news summarizer" in prompt
+    assert prompt.count("https://shared.example.com") == 1
+    assert "1. Result for Build a news summarizer — https://shared.example.com" in prompt
+
+def test_researcher_async_tolerates_failed_subqueries():
+    import asyncio
+    idea = "Build a news summarizer"
+    tool = FakeSearchTool(fail={idea})
+    llm = RecordingLLM()
+    agent = InternetResearcherAgent(name="InternetResearcher", llm=llm, search_tool=tool)
+    assert asyncio.run(agent.aact({"user_idea": idea})) == "summary"
+    assert "https://shared.example.com" in llm.prompts[0]
+
+def test_researcher_without_search_tool_falls_back(monkeypatch):
+    monkeypatch.delenv("BRAVE_SEARCH_API_KEY", raising=False)
+    llm = RecordingLLM()
+    agent = InternetResearcherAgent(name="InternetResearcher", llm=llm)
+    assert agent.search_tool is None
+    agent.act({"user_idea": "idea"})
+    assert llm.prompts[0].endswith("\nidea")
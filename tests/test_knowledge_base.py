@@ -53,3 +53,82 @@ def test_delete_entry():
     ok = kb.delete_entry(entry_id)
     assert ok
     assert kb.get_entry(entry_id) is None
+
+def test_query_entries_by_text_ranks_and_tracks_updates():
+    kb = KnowledgeBase()
+    e1 = KnowledgeBaseEntry(title="Caching", content="A note about caching layers")
+    e2 = KnowledgeBaseEntry(title="Caching guide", content="Caching, caching and more caching")
+    e3 = KnowledgeBaseEntry(title="Other", content="Nothing relevant", tags=["misc"])
+    for entry in (e1, e2, e3):
+        kb.add_entry(entry)
+    assert [e.title for e in kb.query_entries(text="CACHING")] == ["Caching guide", "Caching"]
+    kb.update_entry(e3.id, content="Now about caching too")
+    assert kb.query_entries(text="caching", tags=["misc"])[0].id == e3.id
+    kb.delete_entry(e2.id)
+    assert e2.id not in [e.id for e in kb.query_entries(text="caching")]
+
+def test_query_entries_non_word_text_falls_back_to_substring():
+    kb = KnowledgeBase()
+    kb.add_entry(KnowledgeBaseEntry(title="C++", content="Uses ++ operators"))
+    kb.add_entry(KnowledgeBaseEntry(title="Python", content="No operators here"))
+    results = kb.query_entries(text="++")
+    assert [e.title for e in results] == ["C++"]
+
+def test_semantic_query_with_local_embedder():
+    from agno_server.vector_index import HashingEmbedder
+    kb = KnowledgeBase(embedder=HashingEmbedder())
+    kb.add_entry(KnowledgeBaseEntry(title="Reminders", content="smart location based task reminders", tags=["tasks"]))
+    kb.add_entry(KnowledgeBaseEntry(title="Payments", content="stripe billing and invoices", tags=["billing"]))
+    gone = KnowledgeBaseEntry(title="Reminder widget", content="task reminders widget")
+    kb.add_entry(gone)
+    kb.delete_entry(gone.id)
+    results = kb.semantic_query("location task reminders", top_k=2)
+    assert results[0].title == "Reminders"
+    assert gone.id not in [e.id for e in results]
+    assert [e.title for e in kb.semantic_query("reminders", tags=["billing"])] == ["Payments"]
+
+def test_semantic_query_requires_embedder():
+    kb = KnowledgeBase()
+    with pytest.raises(RuntimeError):
+        kb.semantic_query("anything")
+
+def test_query_entries_by_source_and_tags():
+    kb = KnowledgeBase()
+    kb.add_entry(KnowledgeBaseEntry(title="A", content="x", source="web", tags=["t1"]))
+    kb.add_entry(KnowledgeBaseEntry(title="B", content="x", source="agent", tags=["t1"]))
+    kb.add_entry(KnowledgeBaseEntry(title="C", content="x", source="web", tags=["t2"]))
+    assert [e.title for e in kb.query_entries(source="web")] == ["A", "C"]
+    assert [e.title for e in kb.query_entries(source="web", tags=["t1"])] == ["A"]
+    assert [e.title for e in kb.query_entries(text="x", source="agent")] == ["B"]
+    assert kb.query_entries(source="missing") == []
+
+def test_bulk_operations_embed_once():
+    from agno_server.vector_index import HashingEmbedder
+
+    class CountingEmbedder(HashingEmbedder):
+        calls = 0
+
+        def embed(self, texts):
+            CountingEmbedder.calls += 1
+            return super().embed(texts)
+
+    kb = KnowledgeBase(embedder=CountingEmbedder())
+    entries = [KnowledgeBaseEntry(title=f"Finding {i}", content=f"research note {i}", tags=["research"]) for i in range(20)]
+    ids = kb.add_entries(entries)
+    assert CountingEmbedder.calls == 1
+    assert [e.title for e in kb.get_entries([ids[3], "missing"]) if e] == ["Finding 3"]
+    counts = kb.upsert_entries([entries[0].model_copy(update={"content": "revised note"}), KnowledgeBaseEntry(title="New", content="fresh")])
+    assert counts == {"inserted": 1, "updated": 1}
+    assert kb.query_entries(text="revised")[0].id == ids[0]
+    assert kb.delete_entries(ids[:10]) == 10
+    assert len(kb.query_entries(tags=["research"])) == 10
+
+def test_mutating_returned_entries_does_not_change_the_store():
+    kb = KnowledgeBase()
+    entry_id = kb.add_entry(KnowledgeBaseEntry(title="T", content="C", tags=["a"], metadata={"refs": [1]}))
+    fetched = kb.get_entry(entry_id)
+    fetched.metadata["refs"].append(2)
+    fetched.tags.append("b")
+    kb.query_entries(tags=["a"])[0].metadata["extra"] = True
+    entry = kb.get_entry(entry_id)
+    assert entry.metadata == {"refs": [1]} and entry.tags == ["a"]
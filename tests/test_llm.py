@@ -0,0 +1,87 @@
+"""
+Unit tests for agno_server.llm (shared Gemini client registry).
+"""
+import pytest
+from agno_server import llm as llm_module
+from agno_server.llm import GeminiLLM, reset_shared_models
+
+@pytest.fixture
+def fake_genai(monkeypatch):
+    calls = {"clients": []}
+    class FakeClient:
+        def __init__(self, api_key):
+            calls["clients"].append(api_key)
+    monkeypatch.setattr(llm_module.genai, "Client", FakeClient)
+    reset_shared_models()
+    yield calls
+    reset_shared_models()
+
+def test_instances_share_one_model(fake_genai):
+    first = GeminiLLM(api_key="key")
+    second = GeminiLLM(api_key="key")
+    assert first.model is second.model
+    assert fake_genai == {"clients": ["key"]}
+
+def test_each_key_gets_its_own_client(fake_genai):
+    first = GeminiLLM(api_key="key-a")
+    second = GeminiLLM(api_key="key-b")
+    assert first.model.client is not second.model.client
+    assert GeminiLLM(api_key="key-a").model is first.model
+    assert fake_genai == {"clients": ["key-a", "key-b"]}
+
+def test_missing_api_key_raises(monkeypatch):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    with pytest.raises(RuntimeError):
+        GeminiLLM()
+
+def test_sync_stream_yields_chunks_and_fills_cache():
+    from agno_server.llm_cache import LLMCache
+
+    class Chunk:
+        def __init__(self, text):
+            self.text = text
+
+    class StreamingModel:
+        calls = 0
+        def generate_content(self, prompt, stream=False):
+            StreamingModel.calls += 1
+            assert stream
+            return iter([Chunk("Hel"), Chunk("lo")])
+
+    llm = GeminiLLM(api_key="dummy", cache=LLMCache())
+    llm.model = StreamingModel()
+    assert list(llm.stream("hi")) == ["Hel", "lo"]
+    assert list(llm.stream("hi")) == ["Hello"]
+    assert StreamingModel.calls == 1
+
+def test_shared_model_sends_config_through_the_client():
+    import asyncio
+    from types import SimpleNamespace
+    from agno_server.llm import SharedModel
+
+    requests = []
+
+    class Models:
+        def generate_content(self, **kwargs):
+            requests.append(("sync", kwargs))
+            return SimpleNamespace(text="ok")
+
+    class AsyncModels:
+        async def generate_content_stream(self, **kwargs):
+            requests.append(("async-stream", kwargs))
+            async def chunks():
+                yield SimpleNamespace(text="o")
+                yield SimpleNamespace(text="k")
+            return chunks()
+
+    client = SimpleNamespace(models=Models(), aio=SimpleNamespace(models=AsyncModels()))
+    llm = GeminiLLM(api_key="dummy")
+    llm.model = SharedModel(client, llm.model_name, llm.generation_config)
+
+    async def stream():
+        return [chunk async for chunk in llm.astream("hi", system="sys")]
+
+    assert llm.chat("hi") == "ok"
+    assert asyncio.run(stream()) == ["o", "k"]
+    assert [kind for kind, _ in requests] == ["sync", "async-stream"]
+    assert requests[1][1]["contents"] == "sys\n\nhi" and requests[1][1]["config"].top_k == 64
@@ -0,0 +1,105 @@
+"""
+Unit tests for agno_server.llm_cache (LLM response cache).
+"""
+import asyncio
+from agno_server.llm import GeminiLLM
+from agno_server.llm_cache import LLMCache, make_cache_key
+
+class FakeModel:
+    def __init__(self):
+        self.calls = 0
+    def generate_content(self, prompt):
+        self.calls += 1
+        return type("Response", (), {"text": f"reply to {prompt}"})()
+    async def generate_content_async(self, prompt):
+        return self.generate_content(prompt)
+
+def test_make_cache_key_is_content_addressed():
+    config = {"temperature": 1, "top_p": 0.95}
+    k1 = make_cache_key("m", config, "sys", "prompt")
+    assert k1 == make_cache_key("m", dict(reversed(list(config.items()))), "sys", "prompt")
+    assert k1 != make_cache_key("m", config, "sys", "other prompt")
+    assert k1 != make_cache_key("m", {"temperature": 0}, "sys", "prompt")
+    assert k1 != make_cache_key("other-model", config, "sys", "prompt")
+
+def test_lru_eviction_and_stats():
+    cache = LLMCache(max_entries=2)
+    cache.set("a", "A")
+    cache.set("b", "B")
+    assert cache.get("a") == "A"
+    cache.set("c", "C")  # evicts "b", the least recently used
+    assert cache.get("b") is None
+    assert cache.get("c") == "C"
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["memory_entries"] == 2
+
+def test_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("agno_server.llm_cache.time.time", lambda: now[0])
+    cache = LLMCache(ttl=10)
+    cache.set("k", "v")
+    assert cache.get("k") == "v"
+    now[0] += 11
+    assert cache.get("k") is None
+
+def test_disk_tier_survives_new_instance(tmp_path):
+    db_path = str(tmp_path / "llm_cache.sqlite")
+    LLMCache(db_path=db_path).set("k", "persisted")
+    cache = LLMCache(db_path=db_path)
+    assert cache.get("k") == "persisted"
+    assert cache.stats()["disk_hits"] == 1
+
+def test_disk_tier_is_size_bounded(tmp_path):
+    cache = LLMCache(max_entries=1, db_path=str(tmp_path / "c.sqlite"), max_disk_entries=2)
+    for i in range(5):
+        cache.set(f"k{i}", str(i))
+    rows = cache._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+    assert rows == 2
+
+def test_gemini_chat_served_from_cache():
+    llm = GeminiLLM(api_key="dummy", cache=LLMCache())
+    llm.model = FakeModel()
+    first = llm.chat("idea", system="sys")
+    second = llm.chat("idea", system="sys")
+    assert first == second
+    assert llm.model.calls == 1
+    assert asyncio.run(llm.achat("idea", system="sys")) == first
+    assert llm.model.calls == 1
+    llm.chat("different idea", system="sys")
+    assert llm.model.calls == 2
+
+def test_async_disk_tier_runs_off_the_event_loop(tmp_path):
+    import threading
+    db_path = str(tmp_path / "llm.sqlite")
+    LLMCache(db_path=db_path).set("k", "V")
+    cache = LLMCache(db_path=db_path)
+    threads = []
+    original = cache._get_disk
+    def recording_get_disk(key, now):
+        threads.append(threading.get_ident())
+        return original(key, now)
+    cache._get_disk = recording_get_disk
+
+    async def scenario():
+        loop_thread = threading.get_ident()
+        value = await cache.aget("k")
+        await cache.aset("k2", "V2")
+        return loop_thread, value, await cache.aget("k")
+
+    loop_thread, value, memory_value = asyncio.run(scenario())
+    assert value == memory_value == "V"
+    assert threads and loop_thread not in threads
+    assert cache.stats()["disk_hits"] == 1
+    assert LLMCache(db_path=db_path).get("k2") == "V2"
+
+def test_disk_hit_access_times_are_batched(tmp_path):
+    db_path = str(tmp_path / "llm.sqlite")
+    LLMCache(db_path=db_path).set("k", "V")
+    cache = LLMCache(db_path=db_path)
+    before = cache._db.execute("SELECT accessed_at FROM llm_cache WHERE key = 'k'").fetchone()[0]
+    assert cache.get("k") == "V"
+    assert cache._db.execute("SELECT accessed_at FROM llm_cache WHERE key = 'k'").fetchone()[0] == before
+    cache.set("other", "O")
+    assert cache._db.execute("SELECT accessed_at FROM llm_cache WHERE key = 'k'").fetchone()[0] > before
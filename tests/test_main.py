@@ -1,10 +1,10 @@
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, AsyncMock, MagicMock
 
 @pytest.fixture(scope="module")
 def test_client():
-    with patch("agno_server.main.create_client", return_value=MagicMock()):
+    with patch("agno_server.main.get_db", new=AsyncMock(return_value=MagicMock())):
         from agno_server.main import app
     return TestClient(app)
 
@@ -15,3 +15,94 @@ def test_root(test_client):
     response = test_client.get("/")
     assert response.status_code == 200
     assert response.json() == {"status": "Agno MCP server running"}
+
+def test_refine_prompt_awaits_orchestrator(test_client, monkeypatch):
+    """
+    Test that /refine_prompt awaits the async orchestrator path.
+    """
+    from agno_server import main
+
+    async def fake_arefine_prompt(user_idea):
+        return f"refined: {user_idea}"
+
+    monkeypatch.setattr(main.orchestrator, "arefine_prompt", fake_arefine_prompt)
+    response = test_client.post("/refine_prompt", json={"user_idea": "todo app"})
+    assert response.status_code == 200
+    assert response.json() == {"prompt": "refined: todo app"}
+
+def test_refine_prompt_stream_emits_ndjson_events(test_client, monkeypatch):
+    """
+    Test that /refine_prompt/stream relays orchestrator events as NDJSON.
+    """
+    import json
+    from agno_server import main
+
+    async def fake_stream(user_idea):
+        yield {"event": "stage_start", "stage": "research"}
+        yield {"event": "token", "stage": "final_prompt", "text": "Hello"}
+        yield {"event": "done", "prompt": "Hello"}
+
+    monkeypatch.setattr(main.orchestrator, "astream_refine_prompt", fake_stream)
+    response = test_client.post("/refine_prompt/stream", json={"user_idea": "todo app"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines() if line]
+    assert [e["event"] for e in events] == ["stage_start", "token", "done"]
+
+def test_refine_prompt_stream_reports_errors_in_band(test_client, monkeypatch):
+    """
+    Test that failures after the stream starts become an error event.
+    """
+    import json
+    from agno_server import main
+
+    async def failing_stream(user_idea):
+        yield {"event": "stage_start", "stage": "research"}
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(main.orchestrator, "astream_refine_prompt", failing_stream)
+    response = test_client.post("/refine_prompt/stream", json={"user_idea": "x"})
+    events = [json.loads(line) for line in response.text.splitlines() if line]
+    assert events[-1]["event"] == "error"
+    assert "boom" in events[-1]["detail"]
+
+def test_llm_cache_metrics(test_client):
+    """
+    Test that the LLM cache counters are exposed.
+    """
+    response = test_client.get("/metrics/llm_cache")
+    assert response.status_code == 200
+    assert {"hits", "misses", "hit_rate"} <= set(response.json())
+
+def test_token_usage_metrics(test_client):
+    """
+    Test that per-stage token usage is exposed.
+    """
+    response = test_client.get("/metrics/token_usage")
+    assert response.status_code == 200
+    assert isinstance(response.json(), dict)
+
+def test_refine_prompt_batch(test_client, monkeypatch):
+    """
+    Test that /refine_prompt/batch returns ordered results or an NDJSON stream.
+    """
+    import json
+    from agno_server import main
+
+    async def fake_arefine_prompt(user_idea):
+        return f"refined: {user_idea}"
+
+    monkeypatch.setattr(main.orchestrator, "arefine_prompt", fake_arefine_prompt)
+    response = test_client.post("/refine_prompt/batch", json={"user_ideas": ["a", "b"]})
+    assert response.status_code == 200
+    assert response.json()["results"] == [
+        {"index": 0, "prompt": "refined: a", "error": None},
+        {"index": 1, "prompt": "refined: b", "error": None},
+    ]
+    response = test_client.post("/refine_prompt/batch", json={"user_ideas": ["a", "b"], "stream": True})
+    streamed = [json.loads(line) for line in response.text.splitlines() if line]
+    assert sorted(r["index"] for r in streamed) == [0, 1]
+
+def test_refine_prompt_batch_rejects_bad_concurrency(test_client):
+    response = test_client.post("/refine_prompt/batch", json={"user_ideas": ["a"], "max_concurrency": 0})
+    assert response.status_code == 422
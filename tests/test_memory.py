@@ -2,6 +2,7 @@
 Unit tests for agno_server.memory (memory management system).
 """
 import pytest
+from agno_server.compact import encode_id
 from agno_server.memory import MemoryEntry, MemoryStore
 from agno_server.communication import AgentRole
 from datetime import datetime, timedelta
@@ -52,3 +53,147 @@ def test_delete_entry():
     ok = store.delete_entry(entry_id)
     assert ok
     assert store.get_entry(entry_id) is None
+
+def test_query_entries_combines_indexes_in_insertion_order():
+    store = MemoryStore()
+    entries = [
+        MemoryEntry(agent=AgentRole.PRD_WRITER, type="long_term", data={"i": i}, tags=["prd"] if i % 2 else ["draft"])
+        for i in range(6)
+    ]
+    for entry in entries:
+        store.add_entry(entry)
+    store.add_entry(MemoryEntry(agent=AgentRole.TEAM_LEAD, type="long_term", data={}, tags=["prd"]))
+    results = store.query_entries(agent=AgentRole.PRD_WRITER, type="long_term", tags=["prd", "missing"])
+    assert [e.data["i"] for e in results] == [1, 3, 5]
+    store.delete_entry(entries[3].id)
+    replaced = entries[1].model_copy(update={"tags": ["draft"]})
+    store.add_entry(replaced)
+    results = store.query_entries(agent=AgentRole.PRD_WRITER, tags=["prd"])
+    assert [e.data["i"] for e in results] == [5]
+    assert [e.data["i"] for e in store.query_entries(tags=["draft"])] == [0, 1, 2, 4]
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def test_short_term_entries_expire_after_ttl():
+    clock = FakeClock()
+    store = MemoryStore(short_term_ttl=10, clock=clock)
+    short = MemoryEntry(agent=AgentRole.TEAM_LEAD, type="short_term", data={})
+    long = MemoryEntry(agent=AgentRole.TEAM_LEAD, type="long_term", data={})
+    store.add_entry(short)
+    store.add_entry(long)
+    custom = store.add_entry(MemoryEntry(agent=AgentRole.TEAM_LEAD, type="short_term", data={}), ttl=100)
+    clock.now = 11
+    assert store.get_entry(short.id) is None
+    assert [e.id for e in store.query_entries()] == [long.id, custom]
+    assert store.expire() == 1
+    assert store.stats()["entries"] == 2
+
+def test_update_restarts_short_term_ttl():
+    clock = FakeClock()
+    store = MemoryStore(short_term_ttl=10, clock=clock)
+    entry_id = store.add_entry(MemoryEntry(agent=AgentRole.TEAM_LEAD, type="short_term", data={}))
+    clock.now = 8
+    store.update_entry(entry_id, {"x": 1})
+    clock.now = 15
+    assert store.get_entry(entry_id).data == {"x": 1}
+    clock.now = 19
+    assert store.get_entry(entry_id) is None
+
+def test_update_keeps_per_entry_ttl():
+    clock = FakeClock()
+    store = MemoryStore(short_term_ttl=3600, clock=clock)
+    entry_id = store.add_entry(MemoryEntry(agent=AgentRole.TEAM_LEAD, type="short_term", data={}), ttl=10)
+    clock.now = 5
+    store.update_entry(entry_id, {"x": 1})
+    clock.now = 14
+    assert store.get_entry(entry_id) is not None
+    clock.now = 16
+    assert store.get_entry(entry_id) is None
+
+def test_conversation_namespaces():
+    store = MemoryStore()
+    a = MemoryEntry(agent=AgentRole.TEAM_LEAD, type="short_term", data={}, conversation_id="a")
+    b = MemoryEntry(agent=AgentRole.TEAM_LEAD, type="short_term", data={}, conversation_id="b")
+    kept = MemoryEntry(agent=AgentRole.TEAM_LEAD, type="long_term", data={}, conversation_id="a")
+    for entry in (a, b, kept):
+        store.add_entry(entry)
+    assert [e.id for e in store.query_entries(conversation_id="a")] == [a.id, kept.id]
+    assert store.clear_conversation("a") == 1
+    assert [e.id for e in store.query_entries(conversation_id="a")] == [kept.id]
+    assert store.get_entry(b.id) is not None
+
+def test_short_term_bytes_cap_evicts_least_recently_used():
+    store = MemoryStore(short_term_max_bytes=2000)
+    ids = [store.add_entry(MemoryEntry(agent=AgentRole.TEAM_LEAD, type="short_term", data={"x": "y" * 300})) for _ in range(3)]
+    store.get_entry(ids[0])
+    for _ in range(200):
+        store.add_entry(MemoryEntry(agent=AgentRole.TEAM_LEAD, type="short_term", data={"x": "y" * 300}))
+        assert store.stats()["short_term_bytes"] <= 2000
+    assert store.get_entry(ids[1]) is None
+    assert store.stats()["entries"] < 10
+
+def test_sustained_traffic_keeps_expiry_heap_bounded():
+    clock = FakeClock()
+    store = MemoryStore(short_term_ttl=5, clock=clock)
+    for step in range(2000):
+        clock.now = step
+        store.add_entry(MemoryEntry(agent=AgentRole.TEAM_LEAD, type="short_term", data={}))
+    assert store.stats()["entries"] <= 6
+    assert len(store._expiry_heap) <= 2 * 6 + 64
+
+def test_bulk_add_get_delete_entries():
+    store = MemoryStore()
+    entries = [MemoryEntry(agent=AgentRole.INTERNET_RESEARCHER, type="long_term", data={"i": i}, tags=["finding"]) for i in range(5)]
+    ids = store.add_entries(entries)
+    assert ids == [e.id for e in entries]
+    fetched = store.get_entries([ids[0], "missing", ids[4]])
+    assert fetched[0].data == {"i": 0} and fetched[1] is None and fetched[2].data == {"i": 4}
+    assert store.delete_entries([ids[1], ids[2], "missing"]) == 2
+    assert [e.data["i"] for e in store.query_entries(tags=["finding"])] == [0, 3, 4]
+
+def test_upsert_entries_keeps_created_at_and_position():
+    store = MemoryStore()
+    first = MemoryEntry(agent=AgentRole.TEAM_LEAD, type="long_term", data={"v": 1}, created_at=datetime(2024, 1, 1))
+    second = MemoryEntry(agent=AgentRole.TEAM_LEAD, type="long_term", data={})
+    store.add_entries([first, second])
+    counts = store.upsert_entries([first.model_copy(update={"data": {"v": 2}, "created_at": datetime(2030, 1, 1)}), MemoryEntry(agent=AgentRole.TEAM_LEAD, type="long_term", data={})])
+    assert counts == {"inserted": 1, "updated": 1}
+    upserted = store.get_entry(first.id)
+    assert upserted.data == {"v": 2}
+    assert upserted.created_at == datetime(2024, 1, 1)
+    assert upserted.updated_at > first.updated_at
+    assert store.query_entries()[0].id == first.id
+
+def test_mutating_returned_entries_does_not_change_the_store():
+    store = MemoryStore()
+    entry_id = store.add_entry(MemoryEntry(agent=AgentRole.TEAM_LEAD, type="short_term", data={"items": [1]}, metadata={"k": "v"}))
+    before = store.stats()["short_term_bytes"]
+    fetched = store.get_entry(entry_id)
+    fetched.data["items"].append(2)
+    fetched.metadata["k"] = "changed"
+    store.query_entries()[0].data["extra"] = "x" * 1000
+    entry = store.get_entry(entry_id)
+    assert entry.data == {"items": [1]} and entry.metadata == {"k": "v"}
+    assert store.stats()["short_term_bytes"] == before
+
+def test_query_filters_and_materializes_without_holding_the_lock():
+    store = MemoryStore()
+    ids = [store.add_entry(MemoryEntry(agent=AgentRole.TEAM_LEAD, type="short_term", data={"i": i}, tags=["t"])) for i in range(3)]
+    held = []
+    is_live = store._is_live
+    def spy(key, now):
+        held.append(store._lock.locked())
+        return is_live(key, now)
+    store._is_live = spy
+    assert [e.id for e in store.query_entries(tags=["t"])] == ids
+    assert [e.id for e in store.get_entries(ids)] == ids
+    assert held and not any(held)
+    store._is_live = is_live
+    store.add_entry(MemoryEntry(agent=AgentRole.TEAM_LEAD, type="short_term", data={}))
+    # Reason: buffered read touches are replayed into the LRU by the next write.
+    assert not store._touched and list(store._short_term_lru)[:3] == [encode_id(i) for i in ids]
@@ -0,0 +1,113 @@
+"""
+Unit tests for agno_server.memory_backend (durable MemoryStore persistence).
+"""
+from agno_server.communication import AgentRole
+from agno_server.memory import MemoryEntry, MemoryStore
+import pytest
+
+from agno_server.memory_backend import LogBackend
+
+def reopen(tmp_path) -> MemoryStore:
+    return MemoryStore(backend=LogBackend(str(tmp_path)))
+
+def test_long_term_entries_survive_restart(tmp_path):
+    backend = LogBackend(str(tmp_path))
+    store = MemoryStore(backend=backend)
+    kept = MemoryEntry(agent=AgentRole.PRD_WRITER, type="long_term", data={"prd": "v1"}, tags=["prd"])
+    removed = MemoryEntry(agent=AgentRole.TEAM_LEAD, type="long_term", data={})
+    session = MemoryEntry(agent=AgentRole.TEAM_LEAD, type="short_term", data={"scratch": True})
+    for entry in (kept, removed, session):
+        store.add_entry(entry)
+    store.update_entry(kept.id, {"prd": "v2"})
+    store.delete_entry(removed.id)
+    backend.close()
+
+    reloaded = reopen(tmp_path)
+    entry = reloaded.get_entry(kept.id)
+    assert entry.data == {"prd": "v2"}
+    assert entry.agent == AgentRole.PRD_WRITER
+    assert entry.created_at == kept.created_at
+    assert reloaded.get_entry(removed.id) is None
+    assert reloaded.get_entry(session.id) is None
+    assert [e.id for e in reloaded.query_entries(tags=["prd"])] == [kept.id]
+
+def test_demoting_to_short_term_removes_persisted_copy(tmp_path):
+    backend = LogBackend(str(tmp_path))
+    store = MemoryStore(backend=backend)
+    entry = MemoryEntry(agent=AgentRole.TEAM_LEAD, type="long_term", data={})
+    store.add_entry(entry)
+    store.add_entry(entry.model_copy(update={"type": "short_term"}))
+    backend.close()
+    assert reopen(tmp_path).get_entry(entry.id) is None
+
+def test_compaction_truncates_log(tmp_path):
+    backend = LogBackend(str(tmp_path), compact_min_ops=5)
+    store = MemoryStore(backend=backend)
+    entry = MemoryEntry(agent=AgentRole.TEAM_LEAD, type="long_term", data={"n": 0})
+    store.add_entry(entry)
+    for n in range(1, 5):
+        store.update_entry(entry.id, {"n": n})
+    # Reason: the fifth logged op reaches compact_min_ops and triggers auto-compaction.
+    assert (tmp_path / "memory.log").stat().st_size == 0
+    assert (tmp_path / "memory.snapshot").read_text().count("\n") == 1
+    backend.close()
+    assert reopen(tmp_path).get_entry(entry.id).data == {"n": 4}
+
+def test_torn_log_line_is_ignored(tmp_path):
+    backend = LogBackend(str(tmp_path))
+    store = MemoryStore(backend=backend)
+    entry = MemoryEntry(agent=AgentRole.TEAM_LEAD, type="long_term", data={})
+    store.add_entry(entry)
+    backend.close()
+    with open(tmp_path / "memory.log", "ab") as log:
+        log.write(b'{"op": "put", "record": {"id": "half')
+    assert reopen(tmp_path).get_entry(entry.id) is not None
+
+def test_appends_after_torn_line_are_readable(tmp_path):
+    with open(tmp_path / "memory.log", "ab") as log:
+        log.write(b'{"op": "put", "rec')
+    backend = LogBackend(str(tmp_path))
+    store = MemoryStore(backend=backend)
+    entry = MemoryEntry(agent=AgentRole.TEAM_LEAD, type="long_term", data={})
+    store.add_entry(entry)
+    backend.close()
+    assert reopen(tmp_path).get_entry(entry.id) is not None
+
+def test_corrupt_line_before_the_end_raises(tmp_path):
+    backend = LogBackend(str(tmp_path))
+    store = MemoryStore(backend=backend)
+    store.add_entry(MemoryEntry(agent=AgentRole.TEAM_LEAD, type="long_term", data={}))
+    with open(tmp_path / "memory.log", "ab") as log:
+        log.write(b'{"op": "put", "rec\n')
+    store.add_entry(MemoryEntry(agent=AgentRole.TEAM_LEAD, type="long_term", data={}))
+    backend.close()
+    with pytest.raises(ValueError, match="corrupt log entry"):
+        reopen(tmp_path)
+
+def test_directory_in_use_is_refused(tmp_path):
+    backend = LogBackend(str(tmp_path))
+    with pytest.raises(RuntimeError, match="already in use"):
+        LogBackend(str(tmp_path))
+    backend.close()
+    LogBackend(str(tmp_path)).close()
+
+def test_bulk_operations_issue_one_backend_write(tmp_path):
+    class CountingBackend(LogBackend):
+        def __init__(self, directory):
+            super().__init__(directory)
+            self.writes = 0
+
+        def _append(self, lines):
+            self.writes += 1
+            super()._append(lines)
+
+    backend = CountingBackend(str(tmp_path))
+    store = MemoryStore(backend=backend)
+    entries = [MemoryEntry(agent=AgentRole.INTERNET_RESEARCHER, type="long_term", data={"i": i}) for i in range(100)]
+    store.add_entries(entries + [MemoryEntry(agent=AgentRole.TEAM_LEAD, type="short_term", data={})])
+    assert backend.writes == 1
+    store.delete_entries([e.id for e in entries[:50]])
+    assert backend.writes == 2
+    backend.close()
+    reloaded = reopen(tmp_path)
+    assert [e.data["i"] for e in reloaded.query_entries(type="long_term")] == list(range(50, 100))
@@ -32,3 +32,155 @@ def test_refine_prompt_empty(monkeypatch, orchestrator):
     orchestrator.prompt_crafter.act = lambda ctx: ""
     prompt = orchestrator.refine_prompt("")
     assert prompt == ""
+
+def test_arefine_prompt_runs_concurrently(orchestrator):
+    import asyncio
+    import time
+
+    async def slow(result):
+        await asyncio.sleep(0.05)
+        return result
+
+    orchestrator.researcher.aact = lambda ctx: slow("research")
+    orchestrator.tagger.aact = lambda ctx: slow("tags")
+    orchestrator.prd_writer.aact = lambda ctx: slow("prd")
+    orchestrator.prompt_crafter.aact = lambda ctx: slow(f"prompt for {ctx['user_idea']}")
+
+    async def run_many():
+        return await asyncio.gather(*(orchestrator.arefine_prompt(f"idea {i}") for i in range(20)))
+
+    start = time.perf_counter()
+    prompts = asyncio.run(run_many())
+    elapsed = time.perf_counter() - start
+    assert prompts == [f"prompt for idea {i}" for i in range(20)]
+    # Reason: 20 sequential runs would take ~4s; concurrent runs share the loop.
+    assert elapsed < 1.0
+
+def test_astream_refine_prompt_events(orchestrator):
+    import asyncio
+
+    async def value(result):
+        return result
+
+    async def crafter_stream(ctx):
+        for chunk in ["Final ", "prompt"]:
+            yield chunk
+
+    orchestrator.researcher.aact = lambda ctx: value("research")
+    orchestrator.tagger.aact = lambda ctx: value("tags")
+    orchestrator.prd_writer.aact = lambda ctx: value("prd")
+    orchestrator.prompt_crafter.astream = crafter_stream
+
+    async def collect():
+        return [event async for event in orchestrator.astream_refine_prompt("idea")]
+
+    events = asyncio.run(collect())
+    assert events[0] == {"event": "stage_start", "stage": "research"}
+    assert {"event": "stage_done", "stage": "prd", "output": "prd"} in events
+    tokens = [e["text"] for e in events if e["event"] == "token"]
+    assert tokens == ["Final ", "prompt"]
+    assert events[-1] == {"event": "done", "prompt": "Final prompt"}
+
+def test_incremental_handoff_tags_sections_before_research_finishes():
+    import asyncio
+    from agno_server.orchestrator import AgnoOrchestrator
+
+    orchestrator = AgnoOrchestrator(incremental_handoff=True, handoff_min_chars=10)
+    timeline = []
+
+    async def research_stream(ctx):
+        for section in ["## Market\nlots of tools\n\n", "## Users\nbusy people\n\n", "## Risks\nprivacy"]:
+            yield section
+            await asyncio.sleep(0.02)
+        timeline.append("research done")
+
+    class FakeLLM:
+        async def achat(self, prompt, system=None):
+            timeline.append("tag call")
+            return "tagged"
+
+    async def value(result):
+        return result
+
+    orchestrator.researcher.astream = research_stream
+    orchestrator.tagger.llm = FakeLLM()
+    orchestrator.prd_writer.aact = lambda ctx: value(f"prd from {ctx['structured_info']}")
+    orchestrator.prompt_crafter.aact = lambda ctx: value(ctx["prd"])
+
+    prompt = asyncio.run(orchestrator.arefine_prompt("idea"))
+    assert prompt.startswith("prd from tagged")
+    assert timeline.index("tag call") < timeline.index("research done")
+
+def test_incremental_handoff_fits_sections_to_tagging_budget(monkeypatch):
+    import asyncio
+    from agno_server.orchestrator import AgnoOrchestrator
+
+    monkeypatch.setenv("INCREMENTAL_HANDOFF", "true")
+    monkeypatch.setenv("HANDOFF_MIN_CHARS", "10")
+    orchestrator = AgnoOrchestrator(stage_budgets={"tagging": 60})
+    assert orchestrator.incremental_handoff and orchestrator.handoff_min_chars == 10
+    repeated = "A repeated paragraph that every section quotes verbatim."
+    prompts = []
+
+    async def research_stream(ctx):
+        for i in range(4):
+            yield f"## Part {i}\n{repeated}\n\n" + "x " * 30 + "\n\n"
+
+    class FakeLLM:
+        async def achat(self, prompt, system=None):
+            prompts.append(prompt)
+            return "tagged"
+
+    async def value(result):
+        return result
+
+    orchestrator.researcher.astream = research_stream
+    orchestrator.tagger.llm = FakeLLM()
+    orchestrator.prd_writer.aact = lambda ctx: value("prd")
+    orchestrator.prompt_crafter.aact = lambda ctx: value(ctx["prd"])
+
+    asyncio.run(orchestrator.arefine_prompt("idea"))
+    assert sum(prompt.count(repeated) for prompt in prompts) == 1
+    usage = orchestrator.token_stats.snapshot()["tagging"]
+    assert usage["sent_tokens"] <= 60 < usage["original_tokens"]
+
+def test_arefine_batch_bounds_concurrency_and_dedupes(orchestrator):
+    import asyncio
+
+    in_flight = {"now": 0, "max": 0}
+    calls = []
+
+    async def fake_refine(user_idea):
+        calls.append(user_idea)
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        if user_idea == "bad":
+            raise RuntimeError("refinement failed")
+        return f"prompt for {user_idea}"
+
+    orchestrator.arefine_prompt = fake_refine
+    ideas = [f"idea {i}" for i in range(10)] + ["idea 0", "bad"]
+    results = asyncio.run(orchestrator.arefine_batch(ideas, max_concurrency=3))
+    assert [r["index"] for r in results] == list(range(12))
+    assert results[10] == {"index": 10, "prompt": "prompt for idea 0"}
+    assert results[11] == {"index": 11, "error": "refinement failed"}
+    assert in_flight["max"] <= 3
+    assert len(calls) == 11
+
+def test_refine_prompt_dedupes_and_budgets_stage_inputs():
+    orchestrator = AgnoOrchestrator(stage_budgets={"tagging": 50, "prd": 4000, "final_prompt": 4000})
+    research = "\n\n".join(f"Finding {i}: caching layers reduce latency for repeated reads in service {i}." for i in range(20))
+    seen = {}
+    orchestrator.researcher.act = lambda ctx: research
+    orchestrator.tagger.act = lambda ctx: seen.setdefault("raw_data", ctx["raw_data"]) and research.split("\n\n")[0]
+    orchestrator.prd_writer.act = lambda ctx: "PRD text"
+    orchestrator.prompt_crafter.act = lambda ctx: seen.setdefault("agent_outputs", ctx["agent_outputs"])
+    orchestrator.refine_prompt("idea")
+    assert len(seen["raw_data"]) <= 50 * 4
+    # Reason: the paragraph the tagger echoed is sent once, under Tags, not again under Research.
+    assert seen["agent_outputs"].count("Finding 0:") == 1
+    usage = orchestrator.token_stats.snapshot()
+    assert usage["tagging"]["saved_tokens"] > 0
+    assert usage["final_prompt"]["calls"] == 1
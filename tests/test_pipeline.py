@@ -0,0 +1,137 @@
+"""
+Unit tests for agno_server.pipeline (stage DAG executor).
+"""
+import asyncio
+import time
+import pytest
+from agno_server.pipeline import Pipeline, Stage
+
+def delayed(result, delay=0.1):
+    async def run(ctx):
+        await asyncio.sleep(delay)
+        return result
+    return run
+
+def test_independent_stages_run_concurrently():
+    pipeline = Pipeline([
+        Stage("a", delayed("A"), inputs=["idea"]),
+        Stage("b", delayed("B"), inputs=["idea"]),
+        Stage("c", delayed("C"), inputs=["idea"]),
+        Stage("join", lambda ctx: delayed(ctx["a"] + ctx["b"] + ctx["c"])(ctx), inputs=["a", "b", "c"]),
+    ])
+    start = time.perf_counter()
+    context = asyncio.run(pipeline.run({"idea": "x"}))
+    elapsed = time.perf_counter() - start
+    assert context["join"] == "ABC"
+    # Reason: critical path is two stages (~0.2s); serial execution would be ~0.4s.
+    assert elapsed < 0.35
+
+def test_events_and_streaming_stage():
+    async def tokens(ctx):
+        for chunk in ["he", "llo"]:
+            yield chunk
+
+    events = []
+    pipeline = Pipeline([
+        Stage("first", delayed("1", 0), inputs=["idea"], output="one"),
+        Stage("words", tokens, inputs=["one"], stream=True),
+    ])
+    context = asyncio.run(pipeline.run({"idea": "x"}, on_event=events.append))
+    assert context["words"] == "hello"
+    assert events == [
+        {"event": "stage_start", "stage": "first"},
+        {"event": "stage_done", "stage": "first", "output": "1"},
+        {"event": "stage_start", "stage": "words"},
+        {"event": "token", "stage": "words", "text": "he"},
+        {"event": "token", "stage": "words", "text": "llo"},
+        {"event": "stage_done", "stage": "words"},
+    ]
+
+def test_unsatisfiable_inputs_raise():
+    pipeline = Pipeline([Stage("a", delayed("A", 0), inputs=["missing"])])
+    with pytest.raises(ValueError):
+        asyncio.run(pipeline.run({}))
+
+def test_duplicate_outputs_rejected():
+    with pytest.raises(ValueError):
+        Pipeline([Stage("a", delayed("A"), output="x"), Stage("b", delayed("B"), output="x")])
+
+def test_failure_cancels_running_stages():
+    cancelled = []
+
+    async def slow(ctx):
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def fail(ctx):
+        raise RuntimeError("stage failed")
+
+    async def main():
+        with pytest.raises(RuntimeError):
+            await Pipeline([Stage("slow", slow), Stage("fail", fail)]).run({})
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert cancelled == [True]
+
+def test_text_channel_replays_to_late_readers():
+    from agno_server.pipeline import TextChannel
+
+    async def main():
+        channel = TextChannel()
+        channel.put("a")
+
+        async def read():
+            return [chunk async for chunk in channel]
+
+        early = asyncio.ensure_future(read())
+        await asyncio.sleep(0)
+        channel.put("b")
+        channel.close()
+        late = await read()
+        return await early, late
+
+    assert asyncio.run(main()) == (["a", "b"], ["a", "b"])
+
+def test_iter_sections_splits_on_boundaries():
+    from agno_server.pipeline import iter_sections
+
+    async def chunks():
+        for piece in ["# One\nfirst para", "graph\n\n# Two\nsecond", " part\n\ntail"]:
+            yield piece
+
+    async def collect():
+        return [section async for section in iter_sections(chunks(), min_chars=10)]
+
+    sections = asyncio.run(collect())
+    assert sections[0] == "# One\nfirst paragraph"
+    assert "".join(sections).replace("\n", "") == "# Onefirst paragraph# Twosecond parttail"
+    assert all(not section.startswith("\n") for section in sections)
+
+def test_partial_output_lets_consumers_start_early():
+    timeline = []
+
+    async def producer(ctx):
+        for chunk in ["x", "y"]:
+            timeline.append(f"produce {chunk}")
+            yield chunk
+            await asyncio.sleep(0.01)
+        timeline.append("producer done")
+
+    async def consumer(ctx):
+        seen = []
+        async for chunk in ctx["partial"]:
+            timeline.append(f"consume {chunk}")
+            seen.append(chunk)
+        return "".join(seen)
+
+    pipeline = Pipeline([
+        Stage("producer", producer, stream=True, partial_output="partial", output="full"),
+        Stage("consumer", consumer, inputs=["partial"]),
+    ])
+    context = asyncio.run(pipeline.run({}))
+    assert context["full"] == context["consumer"] == "xy"
+    assert timeline.index("consume x") < timeline.index("producer done")
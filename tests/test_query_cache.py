@@ -0,0 +1,131 @@
+"""
+Unit tests for agno_server.query_cache.
+"""
+import asyncio
+import gc
+
+from agno_server.query_cache import QueryCache, make_query_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_make_query_key_ignores_filter_order():
+    assert make_query_key("t", filters={"a": 1, "b": 2}, limit=5) == make_query_key("t", limit=5, filters={"b": 2, "a": 1})
+    assert make_query_key("t", filters={"a": 1}) != make_query_key("u", filters={"a": 1})
+
+
+def test_ttl_hits_and_staleness():
+    clock = FakeClock()
+    cache = QueryCache(ttl=2.0, clock=clock)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return [{"id": len(calls)}]
+
+    async def scenario():
+        key = make_query_key("t", limit=1)
+        first = await cache.get_or_fetch(key, fetch)
+        clock.now = 1.5
+        second = await cache.get_or_fetch(key, fetch)
+        clock.now = 2.5
+        third = await cache.get_or_fetch(key, fetch)
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+    assert first == second == [{"id": 1}] and third == [{"id": 2}]
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2
+    assert stats["avg_hit_age"] == stats["max_hit_age"] == 1.5
+
+
+def test_concurrent_misses_share_one_fetch():
+    cache = QueryCache()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return [{"id": 1}]
+
+    async def scenario():
+        key = make_query_key("t")
+        return await asyncio.gather(*(cache.get_or_fetch(key, fetch) for _ in range(10)))
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1 and all(r == [{"id": 1}] for r in results)
+    assert cache.stats()["coalesced"] == 9
+
+
+def test_invalidate_drops_table_entries_and_in_flight_results():
+    cache = QueryCache()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return [{"n": len(calls)}]
+
+    async def scenario():
+        t_key, u_key = make_query_key("t"), make_query_key("u")
+        await cache.get_or_fetch(u_key, fetch)
+        in_flight = asyncio.ensure_future(cache.get_or_fetch(t_key, fetch))
+        await asyncio.sleep(0)
+        # Reason: a write lands while the read is in flight; its pre-write rows must not be cached.
+        cache.invalidate("t")
+        await in_flight
+        after_write = await cache.get_or_fetch(t_key, fetch)
+        untouched = await cache.get_or_fetch(u_key, fetch)
+        return after_write, untouched
+
+    after_write, untouched = asyncio.run(scenario())
+    assert after_write == [{"n": 3}]
+    assert untouched == [{"n": 1}]
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_failed_fetch_with_no_waiters_is_not_reported_as_unretrieved():
+    cache = QueryCache()
+    unhandled = []
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def scenario():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: unhandled.append(context))
+        caller = asyncio.ensure_future(cache.get_or_fetch(make_query_key("t"), fetch))
+        await asyncio.sleep(0)
+        caller.cancel()
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+    gc.collect()
+    assert unhandled == []
+
+
+def test_clear_drops_in_flight_fetches():
+    cache = QueryCache()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        call = len(calls)
+        await asyncio.sleep(0.02)
+        return call
+
+    async def scenario():
+        key = make_query_key("t")
+        first = asyncio.ensure_future(cache.get_or_fetch(key, fetch))
+        await asyncio.sleep(0)
+        cache.clear()
+        return await asyncio.gather(first, cache.get_or_fetch(key, fetch))
+
+    assert asyncio.run(scenario()) == [1, 2]
+    assert len(calls) == 2
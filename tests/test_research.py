@@ -0,0 +1,31 @@
+"""
+Unit tests for agno_server.research (search fan-out helpers).
+"""
+from agno_server.research import build_digest, derive_queries, estimate_tokens, normalize_url, rank_results
+
+def test_derive_queries_uses_idea_and_keywords():
+    queries = derive_queries("Build a tool for summarizing news articles", max_queries=3)
+    assert queries[0] == "Build a tool for summarizing news articles"
+    assert len(queries) == 3
+    assert all("summarizing news articles" in q for q in queries[1:])
+    assert derive_queries("   ") == []
+
+def test_normalize_url_collapses_variants():
+    assert normalize_url("https://www.Example.com/docs/?ref=x#top") == normalize_url("http://example.com/docs")
+
+def test_rank_results_dedupes_and_fuses_ranks():
+    a = {"title": "A", "url": "https://a.com/", "description": "short"}
+    a_longer = {"title": "A", "url": "https://www.a.com", "description": "a much longer snippet"}
+    b = {"title": "B", "url": "https://b.com", "description": ""}
+    c = {"title": "C", "url": "https://c.com", "description": ""}
+    ranked = rank_results([[b, a], [a_longer, c], [c]])
+    assert [item["title"] for item in ranked] == ["A", "C", "B"]
+    assert ranked[0]["description"] == "a much longer snippet"
+
+def test_build_digest_respects_token_budget():
+    results = [{"title": f"T{i}", "url": f"https://x.com/{i}", "description": "word " * 200} for i in range(20)]
+    digest = build_digest(results, token_budget=200, max_snippet_chars=100)
+    assert estimate_tokens(digest) <= 200
+    assert digest.startswith("1. T0 — https://x.com/0")
+    assert "…" in digest
+    assert build_digest([], token_budget=100) == ""
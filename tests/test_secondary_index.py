@@ -0,0 +1,25 @@
+"""
+Unit tests for agno_server.secondary_index (attribute -> ids indexes).
+"""
+from agno_server.secondary_index import SecondaryIndex, intersect
+
+def test_lookup_is_union_of_values():
+    index = SecondaryIndex()
+    index.add("a", ["x", "y"])
+    index.add("b", ["y"])
+    index.add("c", None)
+    assert index.lookup(["x"]) == {"a"}
+    assert index.lookup(["x", "y"]) == {"a", "b"}
+    assert index.lookup(["missing"]) == set()
+
+def test_remove_drops_empty_values():
+    index = SecondaryIndex()
+    index.add("a", ["x"])
+    index.remove("a", ["x"])
+    index.remove("a", ["never-added"])
+    assert index.lookup(["x"]) == set()
+    assert index._ids == {}
+
+def test_intersect():
+    assert intersect([{"a", "b", "c"}, {"b", "c"}, {"c", "d"}]) == {"c"}
+    assert intersect([{"a"}, set()]) == set()
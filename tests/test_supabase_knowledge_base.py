@@ -0,0 +1,195 @@
+"""
+Unit tests for agno_server.supabase_knowledge_base against a local PostgREST stand-in.
+"""
+import json
+import re
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+
+from agno_server.knowledge_base import KnowledgeBaseEntry
+from agno_server.supabase_knowledge_base import SupabaseKnowledgeBase
+
+QUOTED = re.compile(r'"((?:[^"\\]|\\.)*)"')
+WORD_CLAUSE = re.compile(r'or\(title\.ilike\."\*(.*?)\*",content\.ilike\."\*.*?\*"\)')
+
+
+def _unescape(value):
+    return re.sub(r"\\(.)", r"\1", value)
+
+
+def _quoted_values(text):
+    return [_unescape(value) for value in QUOTED.findall(text)]
+
+
+class FakePostgrest:
+    """
+    Minimal in-memory subset of PostgREST covering the filters the adapter emits.
+    """
+    def __init__(self):
+        self.rows = {}
+        self.requests = []
+
+    def matches(self, row, params):
+        for name, value in params:
+            if name == "id":
+                if value.startswith("eq.") and row["id"] != value[3:]:
+                    return False
+                if value.startswith("in.") and row["id"] not in _quoted_values(value):
+                    return False
+            elif name == "source" and row.get("source") != value[3:]:
+                return False
+            elif name == "tags" and not set(row.get("tags") or []) & set(_quoted_values(value)):
+                return False
+            elif name == "and":
+                text = f"{row['title']}\n{row['content']}".lower()
+                # Reason: undo the PostgREST quoting, then the LIKE escaping, to get the literal word.
+                words = [_unescape(_unescape(word)) for word in WORD_CLAUSE.findall(value)]
+                if not all(word.lower() in text for word in words):
+                    return False
+        return True
+
+    def handle(self, method, path, params, body, prefer):
+        self.requests.append((method, params))
+        selected = [row for row in self.rows.values() if self.matches(row, params)]
+        options = dict(params)
+        if method == "GET":
+            selected.sort(key=lambda row: (row["created_at"], row["id"]))
+            offset = int(options.get("offset", 0))
+            limit = int(options.get("limit", len(selected)))
+            return selected[offset:offset + limit]
+        if method == "POST":
+            assert "resolution=merge-duplicates" in prefer
+            assert len({tuple(sorted(row)) for row in body}) == 1
+            for row in body:
+                merged = dict(self.rows.get(row["id"], {"created_at": datetime.utcnow().isoformat() + "+00:00"}))
+                merged.update(row)
+                self.rows[row["id"]] = merged
+            return None
+        if method == "PATCH":
+            for row in selected:
+                row.update(body)
+            return selected
+        if method == "DELETE":
+            for row in selected:
+                del self.rows[row["id"]]
+            return [{"id": row["id"]} for row in selected]
+
+
+@pytest.fixture
+def postgrest():
+    fake = FakePostgrest()
+
+    class Handler(BaseHTTPRequestHandler):
+        def _dispatch(self):
+            parts = urlsplit(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length)) if length else None
+            assert self.headers["apikey"] == "test-key"
+            result = fake.handle(self.command, parts.path, parse_qsl(parts.query), body, self.headers.get("Prefer", ""))
+            payload = json.dumps(result).encode() if result is not None else b""
+            self.send_response(200 if payload else 201)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        do_GET = do_POST = do_PATCH = do_DELETE = _dispatch
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    fake.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield fake
+    server.shutdown()
+    server.server_close()
+
+
+def make_kb(postgrest, **kwargs):
+    return SupabaseKnowledgeBase(postgrest.url, "test-key", **kwargs)
+
+
+def test_add_get_update_delete(postgrest):
+    with make_kb(postgrest) as kb:
+        entry = KnowledgeBaseEntry(title="Foo", content="Bar content", tags=["foo"], source="web")
+        kb.add_entry(entry)
+        fetched = kb.get_entry(entry.id)
+        assert fetched.title == "Foo" and fetched.tags == ["foo"]
+        assert fetched.created_at == entry.created_at
+        assert kb.update_entry(entry.id, content="New content", metadata={"a": 1})
+        assert kb.get_entry(entry.id).content == "New content"
+        assert not kb.update_entry("missing", content="x")
+        assert kb.delete_entry(entry.id)
+        assert kb.get_entry(entry.id) is None
+        assert not kb.delete_entry(entry.id)
+
+
+def test_batched_writes_and_cached_reads(postgrest):
+    with make_kb(postgrest, batch_size=10) as kb:
+        entries = [KnowledgeBaseEntry(title=f"T{i}", content=f"note {i}") for i in range(25)]
+        kb.add_entries(entries)
+        assert [method for method, _ in postgrest.requests] == ["POST"] * 3
+        postgrest.requests.clear()
+        fetched = kb.get_entries([entries[0].id, "missing", entries[24].id])
+        assert fetched[0].title == "T0" and fetched[1] is None and fetched[2].title == "T24"
+        assert [method for method, _ in postgrest.requests] == ["GET"]
+        assert kb.delete_entries([e.id for e in entries]) == 25
+        assert [method for method, _ in postgrest.requests].count("DELETE") == 3
+
+
+def test_query_filters_run_server_side_with_pagination(postgrest):
+    with make_kb(postgrest, page_size=2) as kb:
+        kb.add_entries([
+            KnowledgeBaseEntry(title="Caching", content="Notes on HTTP caching", tags=["web"], source="a"),
+            KnowledgeBaseEntry(title="Queues", content="Caching queue results", tags=["infra"], source="b"),
+            KnowledgeBaseEntry(title="Other", content="Unrelated", tags=["web"], source="a"),
+            KnowledgeBaseEntry(title="HTTP", content="Caching proxies", tags=["web", "infra"], source="a"),
+        ])
+        postgrest.requests.clear()
+        assert [e.title for e in kb.query_entries(text="caching")] == ["Caching", "Queues", "HTTP"]
+        assert len(postgrest.requests) == 2
+        assert [e.title for e in kb.query_entries(tags=["infra"], source="a")] == ["HTTP"]
+        assert [e.title for e in kb.query_entries(text="http caching")] == ["Caching", "HTTP"]
+        assert [e.title for e in kb.query_entries(tags=["web"], limit=1, offset=1)] == ["Other"]
+
+
+def test_upsert_keeps_created_at(postgrest):
+    with make_kb(postgrest) as kb:
+        entry = KnowledgeBaseEntry(title="T", content="old", created_at=datetime(2024, 1, 1))
+        kb.add_entry(entry)
+        counts = kb.upsert_entries([
+            entry.model_copy(update={"content": "new", "created_at": datetime(2030, 1, 1)}),
+            KnowledgeBaseEntry(title="U", content="fresh"),
+        ])
+        assert counts == {"inserted": 1, "updated": 1}
+        stored = kb.get_entry(entry.id)
+        assert stored.content == "new"
+        assert stored.created_at == datetime(2024, 1, 1)
+
+
+def test_cache_returns_copies(postgrest):
+    with make_kb(postgrest) as kb:
+        entry_id = kb.add_entry(KnowledgeBaseEntry(title="T", content="C", tags=["a"]))
+        kb.get_entry(entry_id).tags.append("b")
+        assert kb.get_entry(entry_id).tags == ["a"]
+
+
+def test_query_escapes_like_wildcards_and_skips_the_cache(postgrest):
+    with make_kb(postgrest) as writer:
+        writer.add_entries([
+            KnowledgeBaseEntry(title="snake_case names", content="x"),
+            KnowledgeBaseEntry(title="snakeXcase names", content="y"),
+        ])
+    with make_kb(postgrest) as kb:
+        postgrest.requests.clear()
+        results = kb.query_entries(text="snake_case")
+        assert [e.title for e in results] == ["snake_case names"]
+        assert '"*snake\\\\_case*"' in dict(postgrest.requests[0][1])["and"]
+        kb.get_entry(results[0].id)
+        assert [method for method, _ in postgrest.requests] == ["GET", "GET"]
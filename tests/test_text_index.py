@@ -0,0 +1,37 @@
+"""
+Unit tests for agno_server.text_index (inverted index with BM25 ranking).
+"""
+from agno_server.text_index import InvertedIndex, tokenize
+
+def test_tokenize_lowercases_words():
+    assert tokenize("Hello, World! It's 2025") == ["hello", "world", "it", "s", "2025"]
+    assert tokenize("") == []
+
+def test_search_requires_all_terms():
+    index = InvertedIndex()
+    index.add("a", "quick brown fox")
+    index.add("b", "quick red car")
+    assert {doc for doc, _ in index.search("quick")} == {"a", "b"}
+    assert [doc for doc, _ in index.search("quick fox")] == ["a"]
+    assert index.search("quick zebra") == []
+
+def test_bm25_ranks_denser_matches_first():
+    index = InvertedIndex()
+    index.add("sparse", "prompt " + "filler " * 50)
+    index.add("dense", "prompt prompt prompt engineering")
+    index.add("other", "unrelated text")
+    ranked = index.search("prompt")
+    assert [doc for doc, _ in ranked] == ["dense", "sparse"]
+    assert ranked[0][1] > ranked[1][1]
+    assert len(index.search("prompt", limit=1)) == 1
+
+def test_remove_and_reindex_update_postings():
+    index = InvertedIndex()
+    index.add("a", "alpha beta")
+    index.add("a", "gamma")
+    assert index.search("alpha") == []
+    assert [doc for doc, _ in index.search("gamma")] == ["a"]
+    assert index.remove("a")
+    assert not index.remove("a")
+    assert index.search("gamma") == []
+    assert len(index) == 0
@@ -1,22 +1,32 @@
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, AsyncMock, MagicMock
+from agno_server.db import SupabaseDB
 
 @pytest.fixture(scope="module")
 def test_client():
-    with patch("agno_server.main.create_client", return_value=MagicMock()):
+    with patch("agno_server.main.get_db", new=AsyncMock(return_value=MagicMock())):
         from agno_server.main import app
         return TestClient(app)
 
+@pytest.fixture(autouse=True)
+def clear_query_cache():
+    from agno_server.main import query_cache
+    query_cache.clear()
+
+def mock_db(test_client):
+    # Patch the async data-access layer on app.state
+    client = MagicMock()
+    test_client.app.state.db = SupabaseDB(client)
+    return client
+
 # --- ReadRowsTool tests ---
 def test_read_rows_success(monkeypatch, test_client):
     class MockResponse:
         data = [{"id": 1, "foo": "bar"}]
-    def mock_execute(*args, **kwargs):
-        return MockResponse()
-    # Patch supabase on app.state
-    test_client.app.state.supabase = MagicMock()
-    test_client.app.state.supabase.table.return_value.select.return_value.eq.return_value.limit.return_value.execute = mock_execute
+        count = None
+    client = mock_db(test_client)
+    client.table.return_value.select.return_value.limit.return_value.execute = AsyncMock(return_value=MockResponse())
     response = test_client.post("/tools/read_rows", json={"table": "test_table"})
     assert response.status_code == 200
     assert "rows" in response.json()
@@ -25,11 +35,9 @@ def test_read_rows_success(monkeypatch, test_client):
 def test_create_record_success(monkeypatch, test_client):
     class MockResponse:
         data = [{"id": 1, "foo": "bar"}]
-    def mock_execute(*args, **kwargs):
-        return MockResponse()
-    # Patch supabase on app.state
-    test_client.app.state.supabase = MagicMock()
-    test_client.app.state.supabase.table.return_value.insert.return_value.execute = mock_execute
+        count = None
+    client = mock_db(test_client)
+    client.table.return_value.insert.return_value.execute = AsyncMock(return_value=MockResponse())
     response = test_client.post("/tools/create_record", json={"table": "test_table", "records": [{"foo": "bar"}]})
     assert response.status_code == 200
     assert "inserted" in response.json()
@@ -38,11 +46,9 @@ def test_create_record_success(monkeypatch, test_client):
 def test_update_record_success(monkeypatch, test_client):
     class MockResponse:
         data = [{"id": 1, "foo": "baz"}]
-    def mock_execute(*args, **kwargs):
-        return MockResponse()
-    # Patch supabase on app.state
-    test_client.app.state.supabase = MagicMock()
-    test_client.app.state.supabase.table.return_value.eq.return_value.update.return_value.execute = mock_execute
+        count = None
+    client = mock_db(test_client)
+    client.table.return_value.update.return_value.eq.return_value.execute = AsyncMock(return_value=MockResponse())
     response = test_client.post("/tools/update_record", json={"table": "test_table", "filters": {"id": 1}, "values": {"foo": "baz"}})
     assert response.status_code == 200
     assert "updated" in response.json()
@@ -51,11 +57,9 @@ def test_update_record_success(monkeypatch, test_client):
 def test_delete_record_success(monkeypatch, test_client):
     class MockResponse:
         data = []
-    def mock_execute(*args, **kwargs):
-        return MockResponse()
-    # Patch supabase on app.state
-    test_client.app.state.supabase = MagicMock()
-    test_client.app.state.supabase.table.return_value.eq.return_value.delete.return_value.execute = mock_execute
+        count = None
+    client = mock_db(test_client)
+    client.table.return_value.delete.return_value.eq.return_value.execute = AsyncMock(return_value=MockResponse())
     response = test_client.post("/tools/delete_record", json={"table": "test_table", "filters": {"id": 1}})
     assert response.status_code == 200
     assert "deleted" in response.json()
@@ -63,8 +67,8 @@ def test_delete_record_success(monkeypatch, test_client):
 # --- Edge and failure cases ---
 def test_read_rows_invalid_table(test_client):
     # Simulate an error for nonexistent table
-    test_client.app.state.supabase = MagicMock()
-    test_client.app.state.supabase.table.side_effect = Exception("Table does not exist")
+    client = mock_db(test_client)
+    client.table.side_effect = Exception("Table does not exist")
     response = test_client.post("/tools/read_rows", json={"table": "nonexistent_table"})
     assert response.status_code in (400, 422)
 
@@ -79,3 +83,120 @@ def test_update_record_missing_filters(test_client):
 def test_delete_record_missing_filters(test_client):
     response = test_client.post("/tools/delete_record", json={"table": "test_table"})
     assert response.status_code == 422
+
+# --- Keyset pagination and NDJSON export ---
+def keyset_db(test_client, rows):
+    import asyncio
+    import httpx
+    from tests.test_db import FakeTable
+    table = FakeTable(rows)
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(table.handler))
+    test_client.app.state.db = asyncio.run(SupabaseDB.connect("http://supabase.test", "key", http_client=http_client))
+    return table
+
+def test_read_rows_keyset_cursor(test_client):
+    keyset_db(test_client, [{"id": i} for i in range(1, 6)])
+    first = test_client.post("/tools/read_rows", json={"table": "t", "limit": 2, "order_by": "id"}).json()
+    assert [row["id"] for row in first["rows"]] == [1, 2] and first["next_cursor"] == 2
+    request = {"table": "t", "limit": 2, "order_by": "id", "cursor": 4}
+    last = test_client.post("/tools/read_rows", json=request).json()
+    assert [row["id"] for row in last["rows"]] == [5] and last["next_cursor"] is None
+
+def test_read_rows_stream_exports_ndjson(test_client):
+    import json
+    table = keyset_db(test_client, [{"id": i} for i in range(1, 26)])
+    response = test_client.post("/tools/read_rows", json={"table": "t", "order_by": "id", "stream": True, "page_size": 10})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == list(range(1, 26))
+    assert len(table.requests) == 3
+
+def test_read_rows_cursor_requires_order_by(test_client):
+    response = test_client.post("/tools/read_rows", json={"table": "t", "stream": True})
+    assert response.status_code == 422
+
+# --- Bulk ingest ---
+def test_bulk_create_record_streams_ndjson_in_chunks(test_client):
+    import json
+    client = mock_db(test_client)
+    sent = []
+    def insert(chunk, **kwargs):
+        sent.append(chunk)
+        return MagicMock(execute=AsyncMock(return_value=MagicMock(data=[])))
+    client.table.return_value.insert.side_effect = insert
+    body = "".join(json.dumps({"n": i}) + "\n" for i in range(25)).encode()
+    def body_stream():
+        for start in range(0, len(body), 7):
+            yield body[start:start + 7]
+    response = test_client.post("/tools/create_record/bulk?table=t&chunk_size=10", content=body_stream())
+    assert response.status_code == 200
+    result = response.json()
+    assert result["inserted"] == 25 and result["failed"] == 0 and result["error"] is None
+    assert [(c["chunk"], c["offset"], c["count"]) for c in result["chunks"]] == [(0, 0, 10), (1, 10, 10), (2, 20, 5)]
+    assert [r["n"] for chunk in sent for r in chunk] == list(range(25))
+
+def test_bulk_create_record_reports_bad_line(test_client):
+    client = mock_db(test_client)
+    client.table.return_value.insert.return_value.execute = AsyncMock(return_value=MagicMock(data=[]))
+    body = b'{"n": 1}\n{"n": 2}\nnot json\n{"n": 4}'
+    result = test_client.post("/tools/create_record/bulk?table=t&chunk_size=1", content=body).json()
+    assert result["inserted"] == 2
+    assert result["error"].startswith("line 3:")
+
+def test_bulk_create_record_rejects_oversized_line(test_client):
+    import json
+    client = mock_db(test_client)
+    sent = []
+    def insert(chunk, **kwargs):
+        sent.append(chunk)
+        return MagicMock(execute=AsyncMock(return_value=MagicMock(data=[])))
+    client.table.return_value.insert.side_effect = insert
+    big = json.dumps({"blob": "x" * 5000}).encode()
+    body = b'{"n": 1}\n' + big + b'\n{"n": 3}\n'
+    def body_stream():
+        for start in range(0, len(body), 512):
+            yield body[start:start + 512]
+    result = test_client.post("/tools/create_record/bulk?table=t&chunk_size=10&max_chunk_bytes=1024", content=body_stream()).json()
+    assert result["inserted"] == 2 and result["failed"] == 1 and result["error"] is None
+    assert [(c["chunk"], c["offset"], c["count"]) for c in result["chunks"]] == [(0, 0, 1), (1, 1, 1), (2, 2, 1)]
+    assert result["chunks"][1]["error"].startswith("line 2:")
+    assert sent == [[{"n": 1}], [{"n": 3}]]
+
+# --- Query cache ---
+def test_read_rows_served_from_cache_until_write(test_client):
+    client = mock_db(test_client)
+    execute = AsyncMock(return_value=MagicMock(data=[{"id": 1}]))
+    client.table.return_value.select.return_value.eq.return_value.eq.return_value.limit.return_value.execute = execute
+    client.table.return_value.update.return_value.eq.return_value.execute = AsyncMock(return_value=MagicMock(data=[]))
+    before = test_client.get("/metrics/query_cache").json()
+    read = {"table": "dash", "filters": {"a": 1, "b": 2}, "limit": 10}
+    reordered = {"table": "dash", "filters": {"b": 2, "a": 1}, "limit": 10}
+    assert test_client.post("/tools/read_rows", json=read).json()["rows"] == [{"id": 1}]
+    assert test_client.post("/tools/read_rows", json=reordered).status_code == 200
+    assert execute.await_count == 1
+    test_client.post("/tools/update_record", json={"table": "dash", "filters": {"id": 1}, "values": {"a": 2}})
+    test_client.post("/tools/read_rows", json=read)
+    assert execute.await_count == 2
+    test_client.post("/tools/read_rows", json=dict(read, cache=False))
+    assert execute.await_count == 3
+    stats = test_client.get("/metrics/query_cache").json()
+    assert stats["hits"] - before["hits"] == 1
+    assert stats["misses"] - before["misses"] == 2
+    assert stats["invalidations"] - before["invalidations"] == 1
+
+# --- Projection, operator filters and count ---
+def test_read_rows_pushes_down_columns_operators_and_count(test_client):
+    import asyncio
+    import httpx
+    requests = []
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json=[{"id": 3}], headers={"Content-Range": "0-0/7"})
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    test_client.app.state.db = asyncio.run(SupabaseDB.connect("http://supabase.test", "key", http_client=http_client))
+    request = {"table": "t", "filters": {"score": {"gt": 5}}, "columns": ["id"], "order": ["score.desc"], "count": "exact"}
+    response = test_client.post("/tools/read_rows", json=request)
+    assert response.json() == {"rows": [{"id": 3}], "next_cursor": None, "count": 7}
+    assert requests[0].url.params["score"] == "gt.5" and requests[0].url.params["select"] == "id"
+    bad = test_client.post("/tools/read_rows", json={"table": "t", "filters": {"score": {"between": 1}}})
+    assert bad.status_code == 400 and "between" in bad.json()["detail"]
@@ -0,0 +1,45 @@
+"""
+Unit tests for agno_server.vector_index (embedder and vector index).
+"""
+import numpy as np
+import pytest
+from agno_server.vector_index import HashingEmbedder, VectorIndex
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    embedder = HashingEmbedder(dim=64)
+    first = embedder.embed(["smart task reminders", ""])
+    second = HashingEmbedder(dim=64).embed(["smart task reminders", ""])
+    assert first.dtype == np.float32
+    assert first.shape == (2, 64)
+    np.testing.assert_array_equal(first, second)
+    assert np.linalg.norm(first[0]) == pytest.approx(1.0)
+    assert not first[1].any()
+
+def test_exact_search_and_batch():
+    index = VectorIndex(dim=3, initial_capacity=1)
+    index.add(["x", "y", "z"], np.eye(3, dtype=np.float32))
+    assert index.search(np.array([0.9, 0.1, 0.0]), k=1)[0][0] == "x"
+    batch = index.search_batch(np.array([[0, 1, 0], [0, 0, 1]]), k=2)
+    assert [results[0][0] for results in batch] == ["y", "z"]
+    assert len(batch[0]) == 2
+
+def test_remove_swaps_last_row():
+    index = VectorIndex(dim=3)
+    index.add(["x", "y", "z"], np.eye(3, dtype=np.float32))
+    assert index.remove("x")
+    assert not index.remove("x")
+    assert len(index) == 2
+    assert index.search(np.array([0, 0, 1]), k=1)[0][0] == "z"
+    assert "x" not in [i for i, _ in index.search(np.array([1, 0, 0]), k=5)]
+
+def test_ivf_search_matches_exact_when_probing_all_lists():
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(500, 16)).astype(np.float32)
+    index = VectorIndex(dim=16)
+    index.add([str(i) for i in range(500)], vectors)
+    query = rng.normal(size=16).astype(np.float32)
+    exact = index.search(query, k=10)
+    index.build_ivf(n_lists=8)
+    assert index.search(query, k=10, nprobe=8) == exact
+    approximate = index.search(query, k=10, nprobe=2)
+    assert len({i for i, _ in approximate} & {i for i, _ in exact}) >= 3